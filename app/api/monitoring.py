@@ -0,0 +1,89 @@
+import time
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import JSONResponse
+from app.core.extraction_scheduler import get_extraction_scheduler
+from app.core.http_client import get_http_client_pool
+from app.core.load_shedder import get_load_shedder
+from app.core.metrics import get_metrics, server_timing_header, start_server_timing
+from app.core.warmup import get_warm_up
+from app.schemas import HealthResponse, ReadinessResponse
+
+router = APIRouter(tags=["Monitoring"])
+
+# Start of the process, reported as uptime by /healthz
+STARTED_AT = time.monotonic()
+
+@router.get("/metrics", response_class=Response)
+async def get_metrics_text() -> Response:
+    """
+    Expose pipeline metrics in the Prometheus text format.
+
+    Returns:
+        Response with stage latency histograms, downloaded bytes, page
+        counts, poppler exit codes, error codes and in-flight gauges
+    """
+    metrics = get_metrics()
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@router.get("/healthz", response_model=HealthResponse)
+async def get_health() -> HealthResponse:
+    """
+    Report that the process is alive and its event loop responsive.
+
+    Independent of warm-up and load, so a saturated instance is not restarted.
+
+    Returns:
+        HealthResponse with the seconds since the process started
+    """
+    return HealthResponse(status="alive", uptime=round(time.monotonic() - STARTED_AT, 3))
+
+@router.get(
+    "/readyz",
+    response_model=ReadinessResponse,
+    responses={503: {"model": ReadinessResponse, "description": "Warming up, warm-up failed or saturated"}}
+)
+async def get_readiness() -> JSONResponse:
+    """
+    Report whether the service should be sent traffic.
+
+    Returns:
+        200 once the startup warm-up succeeded and while neither the
+        extractions nor the HTTP pool are saturated, 503 otherwise, with the
+        reasons, the warm-up steps and the current load against capacity
+    """
+    warm_up = get_warm_up()
+    shedder = get_load_shedder()
+    load = shedder.load(get_extraction_scheduler(), get_http_client_pool())
+    reasons = (warm_up.failures() if warm_up.done else ["warm_up"]) + shedder.saturation(load)
+    status = warm_up.status()
+    pdftotext = warm_up.steps.get("pdftotext")
+    readiness = ReadinessResponse(
+        ready=not reasons,
+        reasons=reasons,
+        pdftotext=pdftotext["ok"] if pdftotext is not None else None,
+        warm_up_ms=status["warm_up_ms"],
+        steps=status["steps"],
+        load=load
+    )
+    return JSONResponse(
+        content=readiness.model_dump(exclude_none=True),
+        status_code=200 if readiness.ready else 503
+    )
+
+async def server_timing_middleware(request: Request, call_next) -> Response:
+    """
+    Count the request as in flight and break its duration down by stage.
+
+    Stage durations recorded while the request is served are reported in
+    the Server-Timing header, with the total time until the response starts.
+    """
+    metrics = get_metrics()
+    timings = start_server_timing()
+    started_at = time.perf_counter()
+    metrics.requests_in_flight.inc()
+    try:
+        response = await call_next(request)
+    finally:
+        metrics.requests_in_flight.dec()
+    response.headers["Server-Timing"] = server_timing_header(timings, time.perf_counter() - started_at)
+    return response
@@ -1,37 +1,63 @@
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+from functools import lru_cache
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.requests import ClientDisconnect
+from app.config import get_settings
+from app.core.deadline import start_deadline
 from app.core.endpoint_controller import EndpointController
-from app.exceptions import (
-    PDFInvalidURLError, PDFNetworkError, PDFInvalidContentTypeError, PDFTimeoutError,
-    OCRToolNotFoundError, OCRExtractionError, OCRTimeoutError,
-    EmptyTextError, TextParsingError
+from app.core.extraction_scheduler import get_extraction_scheduler
+from app.core.http_client import get_http_client_pool
+from app.core.job_manager import Job, JobManager, build_job_manager
+from app.core.load_shedder import get_load_shedder
+from app.core.metrics import get_metrics
+from app.core.response_encoding import get_response_encoder
+from app.errors import describe_exception
+from app.exceptions import ClientDisconnectedError, ServiceOverloadedError
+from app.schemas import (
+    PDFResponse, PagedPDFResponse, LayoutPDFResponse, TableResponse, BatchExtractionRequest, BatchItemResult, ExtractionJobRequest,
+    ExtractionJob, CacheStats, SchedulerStats, CoalescingStats, ErrorResponse, ErrorDetail
 )
-from app.schemas import PDFResponse, ErrorResponse, ErrorDetail
-from typing import Dict, Any, Type, Optional
+from typing import Any, AsyncIterator, Awaitable, Dict, Type, Optional, Tuple, Union
 
 router = APIRouter(
     prefix="/api/v1",
     tags=["PDF Processing"]
 )
 
-# Exception mapping configuration
-EXCEPTION_HANDLERS = {
-    # 400 Bad Request errors
-    PDFInvalidURLError: (400, "PDF_INVALID_URL_ERROR"),
-    PDFInvalidContentTypeError: (400, "PDF_INVALID_CONTENT_TYPE_ERROR"),
-    PDFNetworkError: (400, "PDF_NETWORK_ERROR"),
-    
-    # 504 Gateway Timeout errors
-    PDFTimeoutError: (504, "PDF_TIMEOUT_ERROR"),
-    OCRTimeoutError: (504, "OCR_TIMEOUT_ERROR"),
-    
-    # 500 Internal Server Error - OCR errors
-    OCRToolNotFoundError: (500, "OCR_TOOL_NOT_FOUND_ERROR"),
-    OCRExtractionError: (500, "OCR_EXTRACTION_ERROR"),
-    
-    # 500 Internal Server Error - Text formatting errors
-    EmptyTextError: (500, "EMPTY_TEXT_ERROR"),
-    TextParsingError: (500, "TEXT_PARSING_ERROR"),
-}
+@lru_cache()
+def get_endpoint_controller() -> EndpointController:
+    """Get the controller shared by all requests."""
+    return EndpointController()
+
+@lru_cache()
+def get_job_manager() -> JobManager:
+    """
+    Get the job manager running extractions on the shared controller.
+
+    The controller is looked up for every job, so jobs started after a
+    configuration reload run on the rebuilt one.
+    """
+    return build_job_manager(
+        get_settings(),
+        lambda url, **options: get_endpoint_controller().process_pdf_async(url, **options),
+        lambda exception: error_detail(exception)[1].model_dump()
+    )
+
+def error_detail(exception: Exception) -> Tuple[int, ErrorDetail]:
+    """
+    Map an exception to its HTTP status code and error payload, counting
+    it in the error metrics.
+
+    Args:
+        exception: The exception to map
+
+    Returns:
+        Tuple of status code and ErrorDetail, see describe_exception
+    """
+    status_code, detail = describe_exception(exception)
+    get_metrics().errors.inc(code=detail.code)
+    return status_code, detail
 
 def handle_exception(exception: Exception) -> HTTPException:
     """
@@ -43,56 +69,490 @@ def handle_exception(exception: Exception) -> HTTPException:
     Returns:
         HTTPException with appropriate status code and details
     """
-    # Find the exception type in our mapping
-    for exc_type, (status_code, error_code) in EXCEPTION_HANDLERS.items():
-        if isinstance(exception, exc_type):
-            return HTTPException(
-                status_code=status_code,
-                detail=ErrorDetail(
-                    code=error_code,
-                    message=str(exception.message),
-                    details=exception.details
-                ).model_dump()
-            )
-    
-    # Default case for unhandled exceptions
+    status_code, detail = error_detail(exception)
+    retry_after = (detail.details or {}).get("retry_after")
     return HTTPException(
-        status_code=500,
-        detail=ErrorDetail(
-            code="INTERNAL_SERVER_ERROR",
-            message=f"An unexpected error occurred: {str(exception)}",
-            details={"error": str(exception)}
-        ).model_dump()
+        status_code=status_code,
+        detail=detail.model_dump(),
+        headers={"Retry-After": str(retry_after)} if retry_after is not None else None
+    )
+
+async def start_request_deadline(
+    timeout: Optional[float] = Query(
+        None, gt=0, description="Seconds the client waits for the response, capped by the server"
+    ),
+    x_request_timeout: Optional[float] = Header(
+        None, gt=0, description="Same as the timeout query parameter, which takes precedence"
     )
+) -> None:
+    """Start the deadline of the request, request_timeout_max when the client gives none."""
+    timeout_max = get_settings().request_timeout_max
+    start_deadline(min(timeout or x_request_timeout or timeout_max, timeout_max))
+
+async def shed_load() -> None:
+    """Reject new extractions with 503 while the pipeline is saturated, see LoadShedder."""
+    try:
+        get_load_shedder().check(get_extraction_scheduler(), get_http_client_pool())
+    except ServiceOverloadedError as e:
+        raise handle_exception(e)
+
+async def wait_for_disconnect(request: Request) -> None:
+    """Return once the client has disconnected."""
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+async def cancel_on_disconnect(request: Request, work: Awaitable[Any]) -> Any:
+    """
+    Await the work, cancelling it as soon as the client disconnects.
+
+    Args:
+        request: The request whose client is watched
+        work: Awaitable producing the response content
+
+    Returns:
+        The result of the work
+
+    Raises:
+        ClientDisconnectedError: If the client disconnected first
+    """
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(wait_for_disconnect(request))
+    try:
+        done, _ = await asyncio.wait((task, watcher), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+    if task not in done:
+        raise ClientDisconnectedError(message="Client disconnected", details={})
+    return task.result()
+
+async def stream_ndjson(records: AsyncIterator[Any], request: Request) -> StreamingResponse:
+    """
+    Stream records as NDJSON, one JSON value per line.
+
+    The first record is awaited before the response starts so failures of
+    the fetch or extraction still produce a regular error response. A
+    failure after that is reported as a final {"error": ...} record. The
+    records are abandoned as soon as the client disconnects. The stream is
+    compressed with the coding negotiated from Accept-Encoding, if any.
+
+    Args:
+        records: Asynchronous iterator of JSON serializable records
+        request: The request being answered
+
+    Returns:
+        StreamingResponse with media type application/x-ndjson
+    """
+    try:
+        first_record = await cancel_on_disconnect(request, records.__anext__())
+    except StopAsyncIteration:
+        first_record = None
+    except Exception as e:
+        await records.aclose()
+        raise handle_exception(e)
+
+    encoder = get_response_encoder()
+
+    async def lines() -> AsyncIterator[bytes]:
+        if first_record is None:
+            return
+        yield encoder.dumps_json(first_record) + b"\n"
+        try:
+            async for record in records:
+                yield encoder.dumps_json(record) + b"\n"
+        except Exception as e:
+            yield encoder.dumps_json({"error": handle_exception(e).detail}) + b"\n"
+        finally:
+            await records.aclose()
+
+    body = lines()
+    headers = {"Vary": "Accept-Encoding"}
+    coding = encoder.negotiate_coding(request.headers.get("Accept-Encoding"))
+    if coding is not None:
+        body = encoder.compress_stream(body, coding)
+        headers["Content-Encoding"] = coding
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
+
+async def encoded_response(request: Request, result: list) -> Response:
+    """
+    Serialize an extraction result as negotiated from the Accept and Accept-Encoding headers.
+
+    The result is written as it is, in JSON or msgpack, without validating
+    it against the response models, and compressed when it is large
+    enough, see ResponseEncoder.
+
+    Args:
+        request: The request being answered
+        result: Lines, pages or tables returned by the controller
+
+    Returns:
+        Response with the serialized, possibly compressed, result
+    """
+    encoder = get_response_encoder()
+    with get_metrics().stage("encode"):
+        media_type = encoder.negotiate_media_type(request.headers.get("Accept"))
+        body = encoder.serialize(result, media_type)
+        headers = {"Vary": "Accept, Accept-Encoding"}
+        coding = encoder.negotiate_coding(request.headers.get("Accept-Encoding"))
+        if coding is not None and len(body) >= encoder.min_size:
+            body = await encoder.compress_async(body, coding)
+            headers["Content-Encoding"] = coding
+    return Response(body, media_type=media_type, headers=headers)
+
+async def batch_records(results: AsyncIterator[Tuple[str, Union[list, Exception]]]) -> AsyncIterator[dict]:
+    """Turn the controller's batch results into BatchItemResult records."""
+    try:
+        async for url, outcome in results:
+            if isinstance(outcome, Exception):
+                status_code, detail = error_detail(outcome)
+                item = BatchItemResult(url=url, status_code=status_code, error=detail)
+            else:
+                item = BatchItemResult(url=url, status_code=200, lines=outcome)
+            yield item.model_dump(exclude_none=True)
+    finally:
+        await results.aclose()
 
 @router.get(
     "/documents/extract-text",
-    response_model=PDFResponse,
+    response_model=Union[PDFResponse, PagedPDFResponse, LayoutPDFResponse, TableResponse],
+    response_model_exclude_none=True,
+    dependencies=[Depends(shed_load), Depends(start_request_deadline)],
     responses={
+        200: {
+            "content": {"application/x-msgpack": {}, "application/x-ndjson": {}},
+            "description": "Extracted text lines"
+        },
         400: {"model": ErrorResponse, "description": "Bad request"},
+        413: {"model": ErrorResponse, "description": "PDF too large"},
         422: {"model": ErrorResponse, "description": "Validation error"},
         500: {"model": ErrorResponse, "description": "Processing error"},
+        503: {"model": ErrorResponse, "description": "Extraction queue full"},
         504: {"model": ErrorResponse, "description": "Timeout error"}
     }
 )
 async def extract_document_text(
-    file: str = Query(..., description="URL of the PDF file to process")
-) -> PDFResponse:
+    request: Request,
+    file: str = Query(
+        ..., description="URL of the PDF file to process, file:// and s3:// URLs when enabled by the settings"
+    ),
+    first_page: Optional[int] = Query(None, ge=1, description="First page to extract, 1-based"),
+    last_page: Optional[int] = Query(None, ge=1, description="Last page to extract"),
+    per_page: bool = Query(False, description="Return a list of pages, each a list of lines"),
+    columns: bool = Query(False, description="Return each line as the list of its column cells"),
+    offsets: bool = Query(False, description="Return each line with its page and line number"),
+    response_format: str = Query(
+        "json", alias="format", pattern="^(json|ndjson|table)$",
+        description=(
+            "json for a single array, ndjson to stream one JSON line per text line, "
+            "table for the header and rows of each page rebuilt from word positions"
+        )
+    ),
+    engine: Optional[str] = Query(
+        None, pattern="^(pdftotext|pdfium)$",
+        description="Extraction engine, defaults to the ocr_engine setting"
+    ),
+    controller: EndpointController = Depends(get_endpoint_controller)
+) -> Response:
     """
     Extract text from a PDF document.
+
+    The request is given the timeout asked for with the timeout query
+    parameter or X-Request-Timeout header, capped by the server, and its
+    work is cancelled when that passes or the client disconnects. The json
+    and table formats are sent as msgpack when the Accept header prefers
+    application/x-msgpack, and every format is compressed with the zstd, br
+    or gzip coding the Accept-Encoding header allows.
     
     Args:
+        request: The request being answered
         file: URL of the PDF file to process
+        first_page: First page to extract, defaults to the first page
+        last_page: Last page to extract, defaults to the last page
+        per_page: Whether to group the lines by page, json format only
+        columns: Whether to split each line at the column gutters of the layout
+        offsets: Whether to return each line as a TextLine with its page and line number
+        response_format: Response format, json, ndjson or table
+        engine: Extraction engine, pdftotext or pdfium, tables always use pdftotext
+        controller: Shared pipeline controller
         
     Returns:
-        PDFResponse containing extracted text lines
+        The lines of PDFResponse, the pages of PagedPDFResponse when
+        per_page is set, those of LayoutPDFResponse when columns or offsets
+        is set, the tables of TableResponse for the table format, or a
+        streamed NDJSON response
         
     Raises:
         HTTPException: If document processing fails
     """
+    if response_format == "ndjson":
+        return await stream_ndjson(
+            controller.stream_pdf_async(file, first_page, last_page, engine, columns, offsets), request
+        )
+
     try:
-        controller = EndpointController()
-        text_lines = controller.process_pdf(file)
-        return PDFResponse.model_validate(text_lines)
+        if response_format == "table":
+            result = await cancel_on_disconnect(request, controller.extract_tables_async(file, first_page, last_page))
+        else:
+            result = await cancel_on_disconnect(
+                request, controller.process_pdf_async(file, first_page, last_page, per_page, engine, columns, offsets)
+            )
     except Exception as e:
-        raise handle_exception(e) 
\ No newline at end of file
+        raise handle_exception(e)
+    return await encoded_response(request, result)
+
+@router.post(
+    "/documents/extract-text",
+    response_model=Union[PDFResponse, PagedPDFResponse, LayoutPDFResponse, TableResponse],
+    response_model_exclude_none=True,
+    dependencies=[Depends(shed_load), Depends(start_request_deadline)],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/pdf": {"schema": {"type": "string", "format": "binary"}},
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                        "required": ["file"]
+                    }
+                }
+            }
+        }
+    },
+    responses={
+        200: {"content": {"application/x-msgpack": {}}, "description": "Extracted text lines"},
+        400: {"model": ErrorResponse, "description": "Bad request"},
+        413: {"model": ErrorResponse, "description": "PDF too large"},
+        422: {"model": ErrorResponse, "description": "Validation error"},
+        500: {"model": ErrorResponse, "description": "Processing error"},
+        503: {"model": ErrorResponse, "description": "Extraction queue full"},
+        504: {"model": ErrorResponse, "description": "Timeout error"}
+    }
+)
+async def extract_uploaded_text(
+    request: Request,
+    first_page: Optional[int] = Query(None, ge=1, description="First page to extract, 1-based"),
+    last_page: Optional[int] = Query(None, ge=1, description="Last page to extract"),
+    per_page: bool = Query(False, description="Return a list of pages, each a list of lines"),
+    columns: bool = Query(False, description="Return each line as the list of its column cells"),
+    offsets: bool = Query(False, description="Return each line with its page and line number"),
+    response_format: str = Query(
+        "json", alias="format", pattern="^(json|table)$",
+        description="json for the text lines, table for the header and rows of each page"
+    ),
+    engine: Optional[str] = Query(
+        None, pattern="^(pdftotext|pdfium)$",
+        description="Extraction engine, defaults to the ocr_engine setting"
+    ),
+    controller: EndpointController = Depends(get_endpoint_controller)
+) -> Response:
+    """
+    Extract text from a PDF uploaded in the request body.
+
+    The body is either the raw PDF, sent as application/pdf, or a
+    multipart/form-data form with the PDF in its "file" field. It is
+    streamed into the extraction pipeline as it arrives, under the size
+    limit of fetched documents, and shares their cached results.
+
+    Args:
+        request: The request carrying the PDF
+        first_page: First page to extract, defaults to the first page
+        last_page: Last page to extract, defaults to the last page
+        per_page: Whether to group the lines by page
+        columns: Whether to split each line at the column gutters of the layout
+        offsets: Whether to return each line as a TextLine with its page and line number
+        response_format: Response format, json or table
+        engine: Extraction engine, pdftotext or pdfium, tables always use pdftotext
+        controller: Shared pipeline controller
+
+    Returns:
+        Same responses as the json and table formats of GET /documents/extract-text
+
+    Raises:
+        HTTPException: If the upload is invalid or document processing fails
+    """
+    tables = response_format == "table"
+    try:
+        try:
+            pdf_content = await controller.receive_pdf_async(
+                request.stream(), request.headers.get("Content-Type", ""), request.headers.get("Content-Length")
+            )
+        except ClientDisconnect:
+            raise ClientDisconnectedError(message="Client disconnected", details={})
+
+        result = await cancel_on_disconnect(request, controller.process_upload_async(
+            pdf_content, first_page, last_page, per_page, engine, columns, offsets, tables
+        ))
+    except Exception as e:
+        raise handle_exception(e)
+    return await encoded_response(request, result)
+
+@router.post(
+    "/documents/extract-text/batch",
+    response_class=StreamingResponse,
+    dependencies=[Depends(shed_load), Depends(start_request_deadline)],
+    responses={
+        200: {"content": {"application/x-ndjson": {}}, "description": "One BatchItemResult per line"},
+        413: {"model": ErrorResponse, "description": "Too many documents in batch"},
+        422: {"model": ErrorResponse, "description": "Validation error"}
+    }
+)
+async def extract_batch_text(
+    request: Request,
+    batch: BatchExtractionRequest,
+    controller: EndpointController = Depends(get_endpoint_controller)
+) -> StreamingResponse:
+    """
+    Extract text from several PDF documents concurrently.
+
+    Results are streamed as NDJSON in completion order, one BatchItemResult
+    per distinct URL. A failing document is reported in its own record with
+    the status code and error code of the single document endpoint. The
+    deadline applies to the whole batch.
+
+    Args:
+        request: The request being answered
+        batch: URLs and extraction options shared by all documents
+        controller: Shared pipeline controller
+
+    Returns:
+        Streamed NDJSON response of BatchItemResult records
+
+    Raises:
+        HTTPException: If the batch is too large
+    """
+    results = controller.process_batch_async(
+        batch.urls, batch.first_page, batch.last_page, batch.per_page, batch.concurrency, batch.engine
+    )
+    return await stream_ndjson(batch_records(results), request)
+
+def job_response(job: Job) -> ExtractionJob:
+    return ExtractionJob(
+        id=job.id,
+        url=job.url,
+        status=job.status,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        lines=job.lines,
+        error=job.error,
+        webhook_error=job.webhook_error
+    )
+
+@router.post(
+    "/documents/extract-jobs",
+    response_model=ExtractionJob,
+    status_code=202,
+    responses={
+        400: {"model": ErrorResponse, "description": "Bad request"},
+        422: {"model": ErrorResponse, "description": "Validation error"},
+        503: {"model": ErrorResponse, "description": "Job queue full"}
+    }
+)
+async def submit_extraction_job(
+    job_request: ExtractionJobRequest,
+    job_manager: JobManager = Depends(get_job_manager)
+) -> ExtractionJob:
+    """
+    Queue a text extraction and return immediately.
+
+    Submitting a URL with the same options as a queued or running job
+    returns that job. The finished job is POSTed to webhook_url if given.
+
+    Args:
+        job_request: URL, extraction options and optional completion webhook
+        job_manager: Shared job manager
+
+    Returns:
+        ExtractionJob to poll with its id
+
+    Raises:
+        HTTPException: If the webhook URL is invalid or the job queue is full
+    """
+    try:
+        job = await job_manager.submit(
+            job_request.url, job_request.first_page, job_request.last_page,
+            job_request.per_page, job_request.webhook_url, job_request.engine
+        )
+    except Exception as e:
+        raise handle_exception(e)
+    return job_response(job)
+
+@router.get(
+    "/documents/extract-jobs/{job_id}",
+    response_model=ExtractionJob,
+    responses={404: {"model": ErrorResponse, "description": "Job not found or expired"}}
+)
+async def get_extraction_job(
+    job_id: str,
+    job_manager: JobManager = Depends(get_job_manager)
+) -> ExtractionJob:
+    """
+    Report the status of an extraction job, with its lines or error once finished.
+
+    Args:
+        job_id: Id returned on submission
+        job_manager: Shared job manager
+
+    Returns:
+        ExtractionJob in its current state
+
+    Raises:
+        HTTPException: If the job is unknown or has expired
+    """
+    try:
+        return job_response(await job_manager.get_async(job_id))
+    except Exception as e:
+        raise handle_exception(e)
+
+@router.get("/cache/stats", response_model=CacheStats)
+async def get_cache_stats(
+    controller: EndpointController = Depends(get_endpoint_controller)
+) -> CacheStats:
+    """
+    Report hit, miss and eviction counters of the extraction result cache.
+
+    Args:
+        controller: Shared pipeline controller
+
+    Returns:
+        CacheStats of the shared result cache
+    """
+    stats = controller.cache_stats()
+    if stats is None:
+        return CacheStats(enabled=False)
+    return CacheStats(enabled=True, **stats)
+
+@router.get("/scheduler/stats", response_model=SchedulerStats)
+async def get_scheduler_stats(
+    controller: EndpointController = Depends(get_endpoint_controller)
+) -> SchedulerStats:
+    """
+    Report concurrency, queue depth and wait-time metrics of the extraction scheduler.
+
+    Args:
+        controller: Shared pipeline controller
+
+    Returns:
+        SchedulerStats of the shared scheduler
+    """
+    return SchedulerStats(**controller.scheduler_stats())
+
+@router.get("/coalescing/stats", response_model=CoalescingStats)
+async def get_coalescing_stats(
+    controller: EndpointController = Depends(get_endpoint_controller)
+) -> CoalescingStats:
+    """
+    Report how many requests shared an in-flight fetch and extraction.
+
+    Args:
+        controller: Shared pipeline controller
+
+    Returns:
+        CoalescingStats of the shared controller
+    """
+    stats = controller.coalescing_stats()
+    if stats is None:
+        return CoalescingStats(enabled=False)
+    return CoalescingStats(enabled=True, **stats)
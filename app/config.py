@@ -1,18 +1,153 @@
 """Application configuration."""
 from functools import lru_cache
-from pydantic import BaseModel
-from typing import Optional
-
-class Settings(BaseModel):
-    """Application settings."""
-    
-    model_config = {
-        "env_file": ".env",
-        "env_file_encoding": "utf-8",
-        "case_sensitive": False,
-    }
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import List, Literal, Optional
+
+class Settings(BaseSettings):
+    """
+    Application settings.
+
+    Every field can be set from an environment variable of the same name,
+    case-insensitive, or from a .env file in the working directory; the
+    environment wins. List fields take JSON, e.g. '["application/pdf"]'.
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,
+        extra="ignore",
+    )
+
+    # Pooled HTTP client used to fetch PDFs
+    http_max_connections: int = 100
+    http_max_connections_per_host: int = 10
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_http2: bool = True
+
+    # Fetch timeouts in seconds: establishing the connection, between two reads, whole download
+    fetch_connect_timeout: float = 5.0
+    fetch_read_timeout: float = 10.0
+    fetch_timeout: float = 30.0
+    fetch_max_size: int = 50 * 1024 * 1024
+    fetch_chunk_size: int = 64 * 1024
+    fetch_spool_size: int = 1024 * 1024
+    fetch_allowed_content_types: List[str] = [
+        "binary/octet-stream", "application/octet-stream", "application/pdf"
+    ]
+
+    # Conditional revalidation of fetched PDFs
+    fetch_cache_enabled: bool = True
+    fetch_cache_max_entries: int = 64
+    fetch_max_age: float = 0.0
+
+    # Directories file:// URLs may read from, file URLs are rejected when empty
+    source_allowed_roots: List[str] = []
+
+    # S3-compatible object store read by s3://bucket/key URLs, disabled without an endpoint;
+    # requests are signed with AWS Signature Version 4 when an access key is set
+    s3_endpoint_url: Optional[str] = None
+    s3_region: str = "us-east-1"
+    s3_access_key_id: Optional[str] = None
+    s3_secret_access_key: Optional[str] = None
+
+    # Extraction timeout: base seconds plus seconds per page, capped; documents whose page
+    # count cannot be estimated get the cap
+    ocr_timeout_base: float = 10.0
+    ocr_timeout_per_page: float = 0.5
+    ocr_timeout_max: float = 300.0
+
+    # pdftotext input
+    ocr_input_mode: Literal["auto", "memfd", "stdin", "tempfile"] = "auto"
+
+    # Extraction engine: pdftotext subprocess, or pdfium in the worker pool
+    # (requires the optional pypdfium2 package)
+    ocr_engine: Literal["pdftotext", "pdfium"] = "pdftotext"
+
+    # Run pdftotext from the worker pool instead of spawning it from the application process,
+    # off until bench_engines shows pdftotext-pool is no slower than pdftotext on the host
+    ocr_worker_pool: bool = False
+
+    # Persistent extraction workers, size defaults to the number of cores; a worker is
+    # replaced after max jobs or above max RSS (MiB), 0 disables either limit
+    worker_pool_size: Optional[int] = None
+    worker_max_jobs: int = 500
+    worker_max_rss_mb: float = 512.0
+
+    # Extraction scheduler, max workers defaults to the number of cores
+    extraction_max_workers: Optional[int] = None
+    extraction_max_queue: int = 32
+    extraction_retry_after: int = 1
+
+    # Load shedding: while every extraction worker is busy with the wait queue this full, or
+    # this share of the HTTP connections is in use, /readyz reports not ready and new
+    # extraction requests are rejected with 503 (ratios from 0 to 1)
+    load_shed_enabled: bool = True
+    load_shed_queue_ratio: float = 0.5
+    load_shed_http_ratio: float = 0.9
+
+    # Longest deadline a request may ask for with the timeout query parameter or the
+    # X-Request-Timeout header, and the deadline of requests asking for none
+    request_timeout_max: float = 300.0
+
+    # Share one fetch and extraction between concurrent identical requests
+    coalescing_enabled: bool = True
+
+    # Batch extraction: URLs accepted per request and documents processed at once
+    batch_max_items: int = 100
+    batch_concurrency: int = 8
+
+    # Documents with more pages are extracted as concurrent chunks of this many pages, 0 disables
+    page_chunk_size: int = 0
+
+    # Asynchronous extraction jobs, kept in memory unless a store path is set; an unfinished
+    # job whose manager stopped renewing its lease for job lease seconds is failed as interrupted
+    job_workers: int = 4
+    job_max_pending: int = 1000
+    job_ttl: float = 3600.0
+    job_store_path: Optional[str] = None
+    job_webhook_timeout: float = 10.0
+    job_lease: float = 30.0
+
+    # Extraction result cache
+    result_cache_enabled: bool = True
+    result_cache_max_entries: int = 256
+    result_cache_ttl: float = 3600.0
+    result_cache_path: Optional[str] = None
+    result_cache_disk_max_entries: int = 10000
+
+    # Extraction responses of at least min size (bytes) are compressed with the zstd, br or gzip
+    # coding the client accepts; zstd and br need the optional zstandard and brotli packages
+    response_compression_enabled: bool = True
+    response_compression_min_size: int = 1024
+    response_gzip_level: int = 6
+    response_zstd_level: int = 3
+    response_brotli_quality: int = 4
+
+    # Startup warm-up: check pdftotext, open the HTTP client, start the workers and extract a
+    # one-page document before /readyz reports ready; when disabled everything starts lazily
+    warmup_enabled: bool = True
+    warmup_timeout: float = 60.0
 
 @lru_cache()
 def get_settings() -> Settings:
     """Get cached settings."""
-    return Settings() 
\ No newline at end of file
+    return Settings()
+
+def reload_settings() -> Settings:
+    """
+    Re-read the environment and .env file.
+
+    Components reading get_settings() per call see the new values at once;
+    those built from the settings keep theirs until they are rebuilt.
+
+    Returns:
+        The new settings
+
+    Raises:
+        pydantic.ValidationError: If a value is invalid, the current settings are then kept
+    """
+    Settings()  # Validate before dropping the current settings
+    get_settings.cache_clear()
+    return get_settings()
@@ -1,7 +1,16 @@
 """Core components package."""
+import importlib
 
-from .pdf_fetcher import PDFFetcher
-from .ocr_processor import OCRProcessor
-from .text_line_formatter import TextLineFormatter
+# Re-exported lazily: extraction workers import single modules and should not pay for the HTTP stack
+_EXPORTS = {
+    "PDFFetcher": "pdf_fetcher",
+    "OCRProcessor": "ocr_processor",
+    "TextLineFormatter": "text_line_formatter",
+}
 
-__all__ = ["PDFFetcher", "OCRProcessor", "TextLineFormatter"] 
\ No newline at end of file
+__all__ = list(_EXPORTS)
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
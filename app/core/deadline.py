@@ -0,0 +1,70 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional, Tuple
+
+from app.exceptions import DeadlineExceededError
+
+# Monotonic time by which the current request must be answered, and the timeout it was set from
+_deadline: ContextVar[Optional[Tuple[float, float]]] = ContextVar("deadline", default=None)
+
+def start_deadline(timeout: Optional[float]) -> None:
+    """Give the current request `timeout` seconds from now, or no deadline when None."""
+    _deadline.set((time.monotonic() + timeout, timeout) if timeout is not None else None)
+
+def clear_deadline() -> None:
+    """Drop the deadline for work outliving the current request."""
+    _deadline.set(None)
+
+def time_remaining() -> Optional[float]:
+    """Return the seconds left before the deadline, None without a deadline."""
+    deadline = _deadline.get()
+    return deadline[0] - time.monotonic() if deadline is not None else None
+
+def deadline_budget(timeout: float) -> float:
+    """
+    Shorten a stage timeout to the time left before the deadline.
+
+    Args:
+        timeout: The stage's own timeout in seconds
+
+    Returns:
+        The smaller of the stage timeout and the time left
+
+    Raises:
+        DeadlineExceededError: If the deadline has already passed
+    """
+    left = time_remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise _exceeded()
+    return min(timeout, left)
+
+@asynccontextmanager
+async def enforce_deadline() -> AsyncIterator[None]:
+    """
+    Cancel the enclosed work when the deadline passes.
+
+    Raises:
+        DeadlineExceededError: If the work was cancelled by the deadline
+    """
+    left = time_remaining()
+    if left is None:
+        yield
+        return
+    if left <= 0:
+        raise _exceeded()
+    try:
+        async with asyncio.timeout(left):
+            yield
+    except TimeoutError:
+        raise _exceeded()
+
+def _exceeded() -> DeadlineExceededError:
+    deadline = _deadline.get()
+    return DeadlineExceededError(
+        message="Request deadline exceeded",
+        details={"timeout": deadline[1] if deadline is not None else None}
+    )
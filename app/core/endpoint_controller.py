@@ -1,41 +1,523 @@
-from typing import List
+import asyncio
+import json
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Optional, Tuple, Union
+from app.config import get_settings
+from app.core.deadline import clear_deadline, enforce_deadline
+from app.core.extraction_scheduler import ExtractionScheduler, get_extraction_scheduler
+from app.core.metrics import get_metrics
 from app.core.pdf_fetcher import PDFFetcher
-from app.core.ocr_processor import OCRProcessor
+from app.core.ocr_processor import OCRProcessor, clean_text
+from app.core.pdf_payload import PDFPayload
+from app.core.result_cache import ResultCache, get_result_cache
+from app.core.single_flight import SingleFlight
+from app.core.source_adapters import SourceAdapters, build_source_adapters
+from app.core.table_extractor import TableExtractor
 from app.core.text_line_formatter import TextLineFormatter
+from app.exceptions import BatchTooLargeError
 
 class EndpointController:
     """
     Controller for the PDF extraction endpoint.
     Orchestrates the PDF processing pipeline.
     """
-    
-    def __init__(self):
-        """Initialize the controller with its dependencies."""
+
+    # Options that change the extracted lines, part of the result cache key
+    EXTRACTION_OPTIONS = {"tool": "pdftotext", "layout": True}
+
+    def __init__(
+        self,
+        result_cache: Optional[ResultCache] = None,
+        scheduler: Optional[ExtractionScheduler] = None,
+        sources: Optional[SourceAdapters] = None
+    ):
+        """
+        Initialize the controller with its dependencies.
+
+        Args:
+            result_cache: Cache of extraction results, defaults to the shared cache
+            scheduler: Bounds concurrent extractions, defaults to the shared scheduler
+            sources: Adapters reading document URLs, defaults to those enabled by the settings
+        """
+        self.__settings = get_settings()
         self.__pdf_fetcher = PDFFetcher()
+        self.__sources = sources or build_source_adapters(self.__settings, self.__pdf_fetcher)
         self.__ocr_processor = OCRProcessor()
         self.__text_formatter = TextLineFormatter()
-    
-    def process_pdf(self, file_url: str) -> List[str]:
+        self.__table_extractor = TableExtractor()
+        self.__result_cache = result_cache or get_result_cache()
+        self.__scheduler = scheduler or get_extraction_scheduler()
+        self.__flights = SingleFlight() if self.__settings.coalescing_enabled else None
+        self.__metrics = get_metrics()
+
+    def process_pdf(
+        self,
+        file_url: str,
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        per_page: bool = False,
+        engine: Optional[str] = None,
+        columns: bool = False,
+        offsets: bool = False
+    ) -> Union[List[str], List[List[str]]]:
         """
         Process a PDF file from URL through the extraction pipeline.
-        
+
+        http(s) URLs are always accepted, file:// and s3:// URLs when their
+        source adapter is enabled by the settings.
+
         Args:
             file_url: URL of the PDF file to process
-            
+            first_page: First page to extract, 1-based, defaults to the first page
+            last_page: Last page to extract, defaults to the last page
+            per_page: Return a list of pages, each a list of lines, instead of a flat list
+            engine: Extraction engine, one of OCRProcessor.ENGINES, defaults to the ocr_engine setting
+            columns: Return each line as the list of its column cells
+            offsets: Return each line as a dict with its page and line number
+
         Returns:
-            List of extracted text lines
-            
+            List of extracted text lines, or list of pages of lines when per_page is set
+
         Raises:
             Various exceptions from the component classes:
-            - PDFInvalidURLError, PDFNetworkError, PDFInvalidContentTypeError, PDFTimeoutError
-            - OCRToolNotFoundError, OCRExtractionError, OCRTimeoutError
+            - PDFInvalidURLError, PDFNetworkError, PDFInvalidContentTypeError, PDFTimeoutError,
+              PDFTooLargeError
+            - OCRToolNotFoundError, OCRExtractionError, OCRInvalidPageRangeError, OCRTimeoutError
             - EmptyTextError, TextParsingError
         """
         # Fetch PDF content
-        pdf_content = self.__pdf_fetcher.fetch_pdf(file_url)
-        
+        with self.__metrics.stage("fetch"):
+            pdf_content = self.__sources.fetch(file_url)
+
+        options = self.__options(first_page, last_page, per_page, engine, columns, offsets)
+        cache_key, cached_lines = self.__lookup(pdf_content, options)
+        if cached_lines is not None:
+            return cached_lines
+
         # Extract text using OCR
-        extracted_text = self.__ocr_processor.extract_text(pdf_content)
-        
+        with self.__metrics.stage("ocr"):
+            extracted_text = self.__ocr_processor.extract_text(
+                pdf_content, first_page, last_page, engine=options["tool"]
+            )
+
         # Format text into lines
-        return self.__text_formatter.format_text(extracted_text) 
\ No newline at end of file
+        return self.__store(cache_key, self.__format(extracted_text, options))
+
+    async def process_pdf_async(
+        self,
+        file_url: str,
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        per_page: bool = False,
+        engine: Optional[str] = None,
+        columns: bool = False,
+        offsets: bool = False
+    ) -> Union[List[str], List[List[str]]]:
+        """
+        Process a PDF file from URL through the extraction pipeline without
+        blocking the event loop on network or pdftotext I/O.
+
+        When the page_chunk_size setting is positive, documents spanning more
+        pages are extracted as page chunks, concurrently on the request's
+        scheduler slot and the workers free at the time, and merged back
+        in page order.
+
+        Concurrent calls for the same URL and options share one fetch and
+        extraction, as do concurrent extractions of identical content
+        fetched from different URLs; every caller gets the shared result
+        or exception.
+
+        The work is cancelled when the request deadline passes, each stage
+        getting only the time left. Shared work runs without the deadline
+        of any one caller and is cancelled once no caller waits for it.
+
+        Args:
+            file_url: URL of the PDF file to process
+            first_page: First page to extract, 1-based, defaults to the first page
+            last_page: Last page to extract, defaults to the last page
+            per_page: Return a list of pages, each a list of lines, instead of a flat list
+            engine: Extraction engine, one of OCRProcessor.ENGINES, defaults to the ocr_engine setting
+            columns: Return each line as the list of its column cells
+            offsets: Return each line as a dict with its page and line number
+
+        Returns:
+            List of extracted text lines, or list of pages of lines when per_page is set
+
+        Raises:
+            Same exceptions as process_pdf, ExtractionQueueFullError when
+            the extraction scheduler rejects the work and DeadlineExceededError
+            when the request deadline passes
+        """
+        options = self.__options(first_page, last_page, per_page, engine, columns, offsets)
+        async with enforce_deadline():
+            return await self.__coalesce(
+                ("url", file_url, json.dumps(options, sort_keys=True)),
+                lambda: self.__process_async(file_url, options)
+            )
+
+    async def extract_tables_async(
+        self,
+        file_url: str,
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Rebuild the table of each page of a PDF from the positions of its words.
+
+        Word positions always come from pdftotext -bbox-layout. Results are
+        cached, coalesced and bounded by the deadline like process_pdf_async.
+
+        Args:
+            file_url: URL of the PDF file to process
+            first_page: First page to extract, 1-based, defaults to the first page
+            last_page: Last page to extract, defaults to the last page
+
+        Returns:
+            One table per non-empty page, see TableExtractor.extract_tables
+
+        Raises:
+            Same exceptions as process_pdf_async
+        """
+        options = self.__table_options(first_page, last_page)
+        async with enforce_deadline():
+            return await self.__coalesce(
+                ("url", file_url, json.dumps(options, sort_keys=True)),
+                lambda: self.__process_async(file_url, options)
+            )
+
+    async def receive_pdf_async(
+        self,
+        body: AsyncIterable[bytes],
+        content_type: str,
+        content_length: Optional[str] = None
+    ) -> PDFPayload:
+        """
+        Receive an uploaded PDF, see PDFFetcher.receive_pdf_async.
+
+        Raises:
+            Same exceptions as PDFFetcher.receive_pdf_async
+        """
+        with self.__metrics.stage("fetch"):
+            return await self.__pdf_fetcher.receive_pdf_async(body, content_type, content_length)
+
+    async def process_upload_async(
+        self,
+        pdf_content: PDFPayload,
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        per_page: bool = False,
+        engine: Optional[str] = None,
+        columns: bool = False,
+        offsets: bool = False,
+        tables: bool = False
+    ) -> Union[List[str], List[List[str]], List[dict]]:
+        """
+        Extract an uploaded PDF like process_pdf_async extracts a fetched one.
+
+        Results are cached and coalesced by content and options, so an
+        upload and a URL serving the same document share them.
+
+        Args:
+            pdf_content: PDF received with receive_pdf_async
+            first_page: First page to extract, 1-based, defaults to the first page
+            last_page: Last page to extract, defaults to the last page
+            per_page: Return a list of pages, each a list of lines, instead of a flat list
+            engine: Extraction engine, one of OCRProcessor.ENGINES, defaults to the ocr_engine setting
+            columns: Return each line as the list of its column cells
+            offsets: Return each line as a dict with its page and line number
+            tables: Return tables like extract_tables_async instead of lines
+
+        Returns:
+            Extracted lines, pages of lines or tables
+
+        Raises:
+            Same exceptions as process_pdf_async
+        """
+        if tables:
+            options = self.__table_options(first_page, last_page)
+        else:
+            options = self.__options(first_page, last_page, per_page, engine, columns, offsets)
+        async with enforce_deadline():
+            return await self.__process_content_async(pdf_content, options)
+
+    async def stream_pdf_async(
+        self,
+        file_url: str,
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        engine: Optional[str] = None,
+        columns: bool = False,
+        offsets: bool = False
+    ) -> AsyncIterator[Union[str, list, dict]]:
+        """
+        Stream the text lines of a PDF as pdftotext produces them.
+
+        Cached results are replayed, but streamed results are not stored so
+        memory stays flat regardless of document size.
+
+        Args:
+            file_url: URL of the PDF file to process
+            first_page: First page to extract, 1-based, defaults to the first page
+            last_page: Last page to extract, defaults to the last page
+            engine: Extraction engine, one of OCRProcessor.ENGINES, defaults to the ocr_engine setting
+            columns: Yield each line as the list of its column cells
+            offsets: Yield each line as a dict with its page and line number
+
+        Yields:
+            Extracted text lines
+
+        Raises:
+            Same exceptions as process_pdf_async
+        """
+        with self.__metrics.stage("fetch"):
+            pdf_content = await self.__sources.fetch_async(file_url)
+
+        options = self.__options(first_page, last_page, False, engine, columns, offsets)
+        _, cached_lines = await self.__lookup_async(pdf_content, options)
+        if cached_lines is not None:
+            for line in cached_lines:
+                yield line
+            return
+
+        async with self.__scheduler.slot():
+            raw_lines = self.__ocr_processor.iter_lines_async(
+                pdf_content, first_page, last_page, engine=options["tool"]
+            )
+            async for line in self.__text_formatter.aiter_format(raw_lines, columns, offsets):
+                yield line
+
+    async def process_batch_async(
+        self,
+        file_urls: Iterable[str],
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        per_page: bool = False,
+        concurrency: Optional[int] = None,
+        engine: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Union[list, Exception]]]:
+        """
+        Process several PDFs concurrently, yielding each result as it completes.
+
+        Duplicate URLs are processed once. A failing document yields its
+        exception instead of lines and does not stop the rest of the batch.
+
+        Args:
+            file_urls: URLs of the PDF files to process
+            first_page: First page to extract from every document
+            last_page: Last page to extract from every document
+            per_page: Return a list of pages, each a list of lines, instead of a flat list
+            concurrency: Documents processed at once, capped by the batch_concurrency setting
+            engine: Extraction engine, one of OCRProcessor.ENGINES, defaults to the ocr_engine setting
+
+        Yields:
+            Tuples of URL and either its extracted lines or the exception it raised
+
+        Raises:
+            BatchTooLargeError: If there are more distinct URLs than batch_max_items
+        """
+        urls = list(dict.fromkeys(file_urls))
+        if len(urls) > self.__settings.batch_max_items:
+            raise BatchTooLargeError(
+                message="Too many documents in batch",
+                details={"count": len(urls), "max_items": self.__settings.batch_max_items}
+            )
+
+        limit = asyncio.Semaphore(min(concurrency or self.__settings.batch_concurrency,
+                                      self.__settings.batch_concurrency))
+
+        async def process(url: str) -> Tuple[str, Union[list, Exception]]:
+            async with limit:
+                try:
+                    return url, await self.process_pdf_async(url, first_page, last_page, per_page, engine)
+                except Exception as e:
+                    return url, e
+
+        tasks = [asyncio.ensure_future(process(url)) for url in urls]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                yield await completed
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def cache_stats(self) -> Optional[dict]:
+        """Return the result cache counters, or None when caching is disabled."""
+        return self.__result_cache.stats() if self.__result_cache is not None else None
+
+    def scheduler_stats(self) -> dict:
+        """Return the load and wait-time counters of the extraction scheduler."""
+        return self.__scheduler.stats()
+
+    def coalescing_stats(self) -> Optional[dict]:
+        """Return the request coalescing counters, or None when coalescing is disabled."""
+        return self.__flights.stats() if self.__flights is not None else None
+
+    async def __coalesce(self, key: tuple, call):
+        """Run the call, sharing it with concurrent callers of the same key when coalescing."""
+        if self.__flights is None:
+            return await call()
+
+        async def shared_call():
+            # Callers enforce their own deadlines, the call must not end with the first one
+            clear_deadline()
+            return await call()
+
+        return await self.__flights.run(key, shared_call)
+
+    async def __process_async(self, file_url: str, options: dict) -> Union[List[str], List[List[str]]]:
+        with self.__metrics.stage("fetch"):
+            pdf_content = await self.__sources.fetch_async(file_url)
+        return await self.__process_content_async(pdf_content, options)
+
+    async def __process_content_async(
+        self,
+        pdf_content: Union[bytes, PDFPayload],
+        options: dict
+    ) -> Union[List[str], List[List[str]]]:
+        cache_key, cached_lines = await self.__lookup_async(pdf_content, options)
+        if cached_lines is not None:
+            return cached_lines
+
+        async def extract() -> Union[List[str], List[List[str]]]:
+            if options.get("tables"):
+                return await self.__store_async(cache_key, await self.__extract_tables(pdf_content, options))
+            extracted_text = await self.__extract_async(
+                pdf_content, options["first_page"], options["last_page"], options["tool"]
+            )
+            return await self.__store_async(cache_key, self.__format(extracted_text, options))
+
+        return await self.__coalesce(("content", cache_key or ResultCache.make_key(pdf_content, options)), extract)
+
+    async def __extract_async(
+        self,
+        pdf_content: Union[bytes, PDFPayload],
+        first_page: Optional[int],
+        last_page: Optional[int],
+        engine: str
+    ) -> str:
+        """
+        Extract the page range, split into concurrent page chunks when it is large.
+
+        The request holds a single scheduler slot, so it is admitted or
+        rejected as one extraction. Chunks run on that slot and on the
+        workers free at the time, never queueing behind other requests,
+        and the first failure cancels the remaining chunks.
+        """
+        chunk_size = self.__settings.page_chunk_size
+        if chunk_size <= 0:
+            async with self.__scheduler.slot():
+                return await self.__run_ocr(pdf_content, first_page, last_page, engine)
+
+        async with self.__scheduler.slot():
+            page_count = await self.__ocr_processor.count_pages_async(pdf_content)
+            first = first_page or 1
+            last = min(last_page or page_count, page_count)
+            if last - first + 1 <= chunk_size:
+                return await self.__run_ocr(pdf_content, first_page, last_page, engine)
+
+            ranges = [(start, min(start + chunk_size - 1, last)) for start in range(first, last + 1, chunk_size)]
+            chunks: List[str] = [""] * len(ranges)
+            pending = iter(range(len(ranges)))
+
+            async def extract_chunks() -> None:
+                # Workers share the iterator, each takes the next chunk once done with one
+                for index in pending:
+                    start, end = ranges[index]
+                    chunks[index] = await self.__run_ocr(pdf_content, start, end, engine, clean=False)
+
+            async def extract_chunks_on_spare_slot() -> None:
+                async with self.__scheduler.spare_slot() as taken:
+                    if taken:
+                        await extract_chunks()
+
+            try:
+                async with asyncio.TaskGroup() as group:
+                    for _ in range(len(ranges) - 1):
+                        group.create_task(extract_chunks_on_spare_slot())
+                    group.create_task(extract_chunks())
+            except ExceptionGroup as errors:
+                raise errors.exceptions[0]
+
+        # Chunks are joined raw and cleaned once, trimming only the ends of the whole range
+        return clean_text("".join(chunk if chunk.endswith("\f") else chunk + "\f" for chunk in chunks))
+
+    async def __run_ocr(
+        self,
+        pdf_content: Union[bytes, PDFPayload],
+        first_page: Optional[int],
+        last_page: Optional[int],
+        engine: str,
+        clean: bool = True
+    ) -> str:
+        with self.__metrics.stage("ocr"):
+            return await self.__ocr_processor.extract_text_async(
+                pdf_content, first_page, last_page, engine=engine, clean=clean
+            )
+
+    async def __extract_tables(self, pdf_content: Union[bytes, PDFPayload], options: dict) -> List[dict]:
+        async with self.__scheduler.slot():
+            with self.__metrics.stage("ocr"):
+                bbox_html = await self.__ocr_processor.extract_bbox_async(
+                    pdf_content, options["first_page"], options["last_page"]
+                )
+        with self.__metrics.stage("format"):
+            return self.__table_extractor.extract_tables(bbox_html, options["first_page"] or 1)
+
+    def __format(self, extracted_text: str, options: dict) -> Union[List[str], List[List[str]]]:
+        # pdftotext ends every page with a form feed
+        self.__metrics.pages.observe(extracted_text.count("\f"))
+        with self.__metrics.stage("format"):
+            if options["per_page"]:
+                return self.__text_formatter.format_pages(extracted_text, options["columns"], options["offsets"])
+            return self.__text_formatter.format_text(extracted_text, options["columns"], options["offsets"])
+
+    def __options(
+        self,
+        first_page: Optional[int],
+        last_page: Optional[int],
+        per_page: bool,
+        engine: Optional[str] = None,
+        columns: bool = False,
+        offsets: bool = False
+    ) -> dict:
+        """Return the options that shape the result, used in the cache key."""
+        tool = engine or self.__settings.ocr_engine
+        return dict(
+            self.EXTRACTION_OPTIONS,
+            tool=tool,
+            layout=tool == "pdftotext",
+            first_page=first_page,
+            last_page=last_page,
+            per_page=per_page,
+            columns=columns,
+            offsets=offsets
+        )
+
+    def __table_options(self, first_page: Optional[int], last_page: Optional[int]) -> dict:
+        """Return the options of table extraction, which always runs pdftotext -bbox-layout."""
+        return dict(self.__options(first_page, last_page, False, "pdftotext"), layout=False, tables=True)
+
+    def __lookup(self, pdf_content: Union[bytes, PDFPayload], options: dict):
+        """Return the cache key and the cached lines for the PDF, if any."""
+        if self.__result_cache is None:
+            return None, None
+        cache_key = ResultCache.make_key(pdf_content, options)
+        return cache_key, self.__result_cache.get(cache_key)
+
+    def __store(self, cache_key: Optional[str], lines: list) -> list:
+        """Store freshly extracted lines in the cache and return them."""
+        if cache_key is not None:
+            self.__result_cache.set(cache_key, lines)
+        return lines
+
+    async def __lookup_async(self, pdf_content: Union[bytes, PDFPayload], options: dict):
+        """Like __lookup, reading the disk tier off the event loop."""
+        if self.__result_cache is None:
+            return None, None
+        cache_key = ResultCache.make_key(pdf_content, options)
+        return cache_key, await self.__result_cache.get_async(cache_key)
+
+    async def __store_async(self, cache_key: Optional[str], lines: list) -> list:
+        """Like __store, writing the disk tier off the event loop."""
+        if cache_key is not None:
+            await self.__result_cache.set_async(cache_key, lines)
+        return lines
@@ -0,0 +1,141 @@
+import importlib.util
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List, Optional, Union
+
+from app.core.pdf_payload import PDFPayload, shared_path
+from app.core.worker_pool import WorkerPool, get_worker_pool
+from app.exceptions import OCRExtractionError, OCRToolNotFoundError
+
+class ExtractionEngine(ABC):
+    """In-process alternative to running pdftotext, selected by name in OCRProcessor."""
+
+    name = ""
+
+    @abstractmethod
+    def extract_text(
+        self,
+        pdf_data: Union[bytes, PDFPayload],
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> str:
+        """Extract the page range, each page followed by a form feed like pdftotext."""
+
+    @abstractmethod
+    async def extract_text_async(
+        self,
+        pdf_data: Union[bytes, PDFPayload],
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> str:
+        """Extract the page range without blocking the event loop."""
+
+    @abstractmethod
+    async def warm_up_async(self, pdf_data: bytes, timeout: Optional[float] = None) -> List[str]:
+        """Extract the document once in every worker, loading the engine in each, and return their texts."""
+
+class PdfiumEngine(ExtractionEngine):
+    """
+    Extract text with pypdfium2 in the persistent worker pool.
+
+    Workers import pdfium on their first document and keep it loaded, so a
+    document costs a pipe round trip instead of a fork/exec of pdftotext.
+    pypdfium2 is an optional dependency; without it every extraction
+    raises OCRToolNotFoundError.
+    """
+
+    name = "pdfium"
+
+    def __init__(self, worker_pool: Optional[WorkerPool] = None, timeout: float = 30):
+        """
+        Initialize the engine.
+
+        Args:
+            worker_pool: Pool running the extractions, defaults to the shared pool
+            timeout: Seconds allowed per document before its worker is replaced,
+                unless the call gives its own
+        """
+        self.worker_pool = worker_pool or get_worker_pool()
+        self.timeout = timeout
+
+    @staticmethod
+    def available() -> bool:
+        """pypdfium2 is installed."""
+        return importlib.util.find_spec("pypdfium2") is not None
+
+    def extract_text(
+        self,
+        pdf_data: Union[bytes, PDFPayload],
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> str:
+        self.__check_available()
+        with shared_path(pdf_data) as pdf_path:
+            return self.worker_pool.run(
+                _pdfium_extract, pdf_path, first_page, last_page, timeout=timeout or self.timeout
+            )
+
+    async def extract_text_async(
+        self,
+        pdf_data: Union[bytes, PDFPayload],
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> str:
+        self.__check_available()
+        with shared_path(pdf_data) as pdf_path:
+            return await self.worker_pool.run_async(
+                _pdfium_extract, pdf_path, first_page, last_page, timeout=timeout or self.timeout
+            )
+
+    async def warm_up_async(self, pdf_data: bytes, timeout: Optional[float] = None) -> List[str]:
+        self.__check_available()
+        with shared_path(pdf_data) as pdf_path:
+            return await self.worker_pool.run_on_each_async(
+                _pdfium_extract, pdf_path, None, None, timeout=timeout or self.timeout
+            )
+
+    def __check_available(self) -> None:
+        if not self.available():
+            raise OCRToolNotFoundError(
+                message="OCR tool not found",
+                details={"tool": "pypdfium2"}
+            )
+
+def _pdfium_extract(pdf_path: str, first_page: Optional[int], last_page: Optional[int]) -> str:
+    """Worker side of PdfiumEngine, reading the document at a shared path and returning pages ended by form feeds."""
+    import pypdfium2
+
+    # Opened here rather than by pdfium, which resolves the /proc path of a memfd to a name it cannot open
+    with open(pdf_path, "rb") as pdf_file:
+        try:
+            document = pypdfium2.PdfDocument(pdf_file)
+        except pypdfium2.PdfiumError as e:
+            raise OCRExtractionError(
+                message="Text extraction failed",
+                details={"engine": PdfiumEngine.name, "error": str(e)}
+            )
+        try:
+            page_count = len(document)
+            first = (first_page or 1) - 1
+            last = min(last_page or page_count, page_count)
+            pages = []
+            for index in range(first, last):
+                page = document[index]
+                text_page = page.get_textpage()
+                try:
+                    pages.append(text_page.get_text_range().replace("\r\n", "\n") + "\f")
+                finally:
+                    text_page.close()
+                    page.close()
+            return "".join(pages)
+        finally:
+            document.close()
+
+@lru_cache()
+def get_pdfium_engine() -> PdfiumEngine:
+    """Get the application-wide pdfium engine."""
+    return PdfiumEngine()
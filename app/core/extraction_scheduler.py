@@ -0,0 +1,126 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Dict
+
+from app.config import Settings, get_settings
+from app.core.deadline import enforce_deadline
+from app.exceptions import ExtractionQueueFullError
+
+class ExtractionScheduler:
+    """
+    Bound the number of concurrent extractions.
+
+    At most `max_workers` extractions run at once and at most `max_queue`
+    wait for a free worker; beyond that new work is rejected immediately
+    instead of piling up behind the pdftotext timeout.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, retry_after: int = 1):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_workers: Number of extractions allowed to run concurrently
+            max_queue: Number of extractions allowed to wait for a worker
+            retry_after: Seconds clients are asked to wait after a rejection
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.__workers = asyncio.Semaphore(max_workers)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Hold a worker slot for the duration of one extraction.
+
+        Raises:
+            ExtractionQueueFullError: If every worker is busy and the wait queue is full
+            DeadlineExceededError: If the request deadline passes while waiting for a worker
+        """
+        if self.__workers.locked() and self.queue_depth >= self.max_queue:
+            self.rejected += 1
+            raise ExtractionQueueFullError(
+                message="Extraction queue is full",
+                details={
+                    "max_workers": self.max_workers,
+                    "max_queue": self.max_queue,
+                    "retry_after": self.retry_after
+                }
+            )
+
+        self.queue_depth += 1
+        enqueued_at = time.monotonic()
+        try:
+            async with enforce_deadline():
+                await self.__workers.acquire()
+        finally:
+            self.queue_depth -= 1
+
+        wait_time = time.monotonic() - enqueued_at
+        self.admitted += 1
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.__workers.release()
+
+    @asynccontextmanager
+    async def spare_slot(self) -> AsyncIterator[bool]:
+        """
+        Hold a worker slot only if one is free right now, never queueing.
+
+        For extra work of an extraction already holding a slot, such as
+        further page chunks, which must not be rejected or wait behind
+        other requests. Yields whether a slot was taken.
+        """
+        if self.__workers.locked() or self.queue_depth:
+            yield False
+            return
+
+        await self.__workers.acquire()
+        self.admitted += 1
+        self.in_flight += 1
+        try:
+            yield True
+        finally:
+            self.in_flight -= 1
+            self.__workers.release()
+
+    def stats(self) -> Dict[str, float]:
+        """Return the current load and the admission and wait-time counters."""
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_time_avg": self.wait_time_total / self.admitted if self.admitted else 0.0,
+            "wait_time_max": self.wait_time_max,
+        }
+
+def build_extraction_scheduler(settings: Settings) -> ExtractionScheduler:
+    """Build the scheduler described by the settings, one worker per core by default."""
+    return ExtractionScheduler(
+        settings.extraction_max_workers or os.cpu_count() or 1,
+        settings.extraction_max_queue,
+        settings.extraction_retry_after
+    )
+
+@lru_cache()
+def get_extraction_scheduler() -> ExtractionScheduler:
+    """Get the application-wide extraction scheduler."""
+    return build_extraction_scheduler(get_settings())
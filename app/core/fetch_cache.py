@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Mapping, Optional
+
+from app.config import Settings, get_settings
+from app.core.pdf_payload import PDFPayload
+
+class CachedDocument:
+    """PDF content fetched from a URL together with its HTTP validators."""
+
+    __slots__ = ("content", "etag", "last_modified", "validated_at")
+
+    def __init__(self, content: PDFPayload, etag: Optional[str], last_modified: Optional[str]):
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.validated_at = time.monotonic()
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers asking the origin to answer 304 if the document is unchanged."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class FetchCache:
+    """
+    Per-URL store of fetched PDFs used for HTTP conditional revalidation.
+
+    Documents younger than `max_age` seconds are served without contacting
+    the origin; older ones are revalidated with their ETag/Last-Modified.
+    """
+
+    def __init__(self, max_entries: int, max_age: float = 0.0):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.fresh_hits = 0
+        self.revalidations = 0
+        self.__entries: "OrderedDict[str, CachedDocument]" = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[CachedDocument]:
+        """Return the stored document for the URL, if any."""
+        with self.__lock:
+            document = self.__entries.get(url)
+            if document is not None:
+                self.__entries.move_to_end(url)
+            return document
+
+    def is_fresh(self, document: CachedDocument) -> bool:
+        """Tell whether the document can be served without contacting the origin."""
+        if self.max_age <= 0 or time.monotonic() - document.validated_at >= self.max_age:
+            return False
+        self.fresh_hits += 1
+        return True
+
+    def store(self, url: str, content: PDFPayload, headers: Mapping[str, str]) -> None:
+        """Remember a 200 response when it carries validators or may be served fresh."""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not (etag or last_modified or self.max_age > 0):
+            return
+        with self.__lock:
+            self.__entries[url] = CachedDocument(content, etag, last_modified)
+            self.__entries.move_to_end(url)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+
+    def revalidated(self, document: CachedDocument) -> PDFPayload:
+        """Mark a document as confirmed unchanged by a 304 and return its content."""
+        document.validated_at = time.monotonic()
+        self.revalidations += 1
+        return document.content
+
+def build_fetch_cache(settings: Settings) -> Optional[FetchCache]:
+    """Build the fetch cache described by the settings, or None when disabled."""
+    if not settings.fetch_cache_enabled:
+        return None
+    return FetchCache(settings.fetch_cache_max_entries, settings.fetch_max_age)
+
+@lru_cache()
+def get_fetch_cache() -> Optional[FetchCache]:
+    """Get the application-wide fetch cache."""
+    return build_fetch_cache(get_settings())
@@ -0,0 +1,110 @@
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import Settings, get_settings
+
+class HTTPClientPool:
+    """
+    Application-lifetime HTTP client with keep-alive connection pooling.
+
+    Total and keep-alive connection limits are enforced by the underlying
+    httpx connection pool; the per-host limit is enforced with one semaphore
+    per origin so a single slow host cannot take the whole pool.
+    """
+
+    def __init__(self, settings: Optional[Settings] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Initialize the pool without opening any connection.
+
+        Args:
+            settings: Settings holding pool sizes and timeouts
+            transport: Optional transport overriding the network layer
+        """
+        self.settings = settings or get_settings()
+        self.__transport = transport
+        self.active = 0
+        self.__client: Optional[httpx.AsyncClient] = None
+        self.__host_slots: Dict[str, asyncio.Semaphore] = {}
+        # Requests holding or waiting for each host's slots, hosts are dropped once it falls to 0
+        self.__host_users: Dict[str, int] = {}
+
+    @property
+    def http2_enabled(self) -> bool:
+        """HTTP/2 is negotiated only when requested and the h2 package is installed."""
+        return self.settings.http_http2 and importlib.util.find_spec("h2") is not None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the shared client, creating it on first use."""
+        if self.__client is None or self.__client.is_closed:
+            self.__client = httpx.AsyncClient(
+                http2=self.http2_enabled,
+                follow_redirects=True,
+                timeout=httpx.Timeout(
+                    self.settings.fetch_read_timeout, connect=self.settings.fetch_connect_timeout
+                ),
+                limits=httpx.Limits(
+                    max_connections=self.settings.http_max_connections,
+                    max_keepalive_connections=self.settings.http_max_keepalive_connections,
+                    keepalive_expiry=self.settings.http_keepalive_expiry,
+                ),
+                transport=self.__transport,
+            )
+        return self.__client
+
+    @asynccontextmanager
+    async def host_slot(self, url: str) -> AsyncIterator[None]:
+        """Hold one of the per-host connection slots for the URL's origin."""
+        origin = urlsplit(url).netloc.lower()
+        slot = self.__host_slots.get(origin)
+        if slot is None:
+            slot = asyncio.Semaphore(self.settings.http_max_connections_per_host)
+            self.__host_slots[origin] = slot
+        self.__host_users[origin] = self.__host_users.get(origin, 0) + 1
+        try:
+            async with slot:
+                self.active += 1
+                try:
+                    yield
+                finally:
+                    self.active -= 1
+        finally:
+            self.__host_users[origin] -= 1
+            if not self.__host_users[origin]:
+                del self.__host_users[origin]
+                del self.__host_slots[origin]
+
+    @property
+    def hosts(self) -> int:
+        """Number of hosts with a request holding or waiting for one of their slots."""
+        return len(self.__host_slots)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the requests holding a host slot against the pool limits, and the hosts out of slots."""
+        return {
+            "max_connections": self.settings.http_max_connections,
+            "max_connections_per_host": self.settings.http_max_connections_per_host,
+            "active": self.active,
+            "saturated_hosts": sum(1 for slot in self.__host_slots.values() if slot.locked()),
+        }
+
+    async def start(self) -> None:
+        """Create the shared client ahead of the first request."""
+        _ = self.client
+
+    async def aclose(self) -> None:
+        """Close the shared client and every pooled connection."""
+        if self.__client is not None:
+            await self.__client.aclose()
+            self.__client = None
+
+@lru_cache()
+def get_http_client_pool() -> HTTPClientPool:
+    """Get the application-wide HTTP client pool."""
+    return HTTPClientPool()
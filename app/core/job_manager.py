@@ -0,0 +1,454 @@
+import asyncio
+import contextvars
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional
+
+import httpx
+from pydantic import HttpUrl
+
+from app.config import Settings
+from app.core.http_client import HTTPClientPool, get_http_client_pool
+from app.exceptions import ExtractionQueueFullError, JobInterruptedError, JobNotFoundError, PDFInvalidURLError
+
+class Job:
+    """State of one asynchronous extraction."""
+
+    __slots__ = (
+        "id", "url", "options", "status", "lines", "error", "webhooks", "webhook_error",
+        "created_at", "finished_at"
+    )
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    def __init__(self, url: str, options: Dict[str, Any], job_id: Optional[str] = None):
+        self.id = job_id or uuid.uuid4().hex
+        self.url = url
+        self.options = options
+        self.status = self.QUEUED
+        self.lines: Optional[list] = None
+        self.error: Optional[Dict[str, Any]] = None
+        self.webhooks: List[str] = []
+        self.webhook_error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        job = cls(data["url"], data["options"], data["id"])
+        for name in cls.__slots__:
+            setattr(job, name, data[name])
+        return job
+
+class JobStore(ABC):
+    """
+    Storage of job state, dropping finished jobs once they expire.
+
+    Unfinished jobs hold a lease their manager keeps renewing; a job whose
+    lease expired was abandoned by a manager that stopped, possibly another
+    process sharing the store.
+    """
+
+    # Whether calls block on I/O, the manager then makes them from a thread
+    blocking = False
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job, or None when unknown or purged."""
+
+    @abstractmethod
+    def put(self, job: Job, leased_until: Optional[float] = None) -> None:
+        """Insert or update the job, leasing it until the given time, or dropping its lease once finished."""
+
+    @abstractmethod
+    def renew(self, job_ids: List[str], leased_until: float) -> None:
+        """Extend the leases of the unfinished jobs."""
+
+    @abstractmethod
+    def abandoned(self, now: float) -> List[Job]:
+        """Return the queued and running jobs whose lease expired."""
+
+    @abstractmethod
+    def purge(self, finished_before: float) -> int:
+        """Delete jobs finished before the given time and return how many were deleted."""
+
+    def close(self) -> None:
+        """Release resources held by the store."""
+
+class MemoryJobStore(JobStore):
+    """In-process job store, lost on restart."""
+
+    def __init__(self):
+        self.__jobs: Dict[str, Job] = {}
+        self.__leases: Dict[str, float] = {}
+        self.__lock = threading.Lock()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.__lock:
+            return self.__jobs.get(job_id)
+
+    def put(self, job: Job, leased_until: Optional[float] = None) -> None:
+        with self.__lock:
+            self.__jobs[job.id] = job
+            if leased_until is not None:
+                self.__leases[job.id] = leased_until
+            elif job.finished:
+                self.__leases.pop(job.id, None)
+
+    def renew(self, job_ids: List[str], leased_until: float) -> None:
+        with self.__lock:
+            for job_id in job_ids:
+                if job_id in self.__leases:
+                    self.__leases[job_id] = leased_until
+
+    def abandoned(self, now: float) -> List[Job]:
+        with self.__lock:
+            return [
+                job for job_id, job in self.__jobs.items()
+                if not job.finished and self.__leases.get(job_id, 0.0) < now
+            ]
+
+    def purge(self, finished_before: float) -> int:
+        with self.__lock:
+            expired = [
+                job_id for job_id, job in self.__jobs.items()
+                if job.finished_at is not None and job.finished_at < finished_before
+            ]
+            for job_id in expired:
+                del self.__jobs[job_id]
+            return len(expired)
+
+class SQLiteJobStore(JobStore):
+    """On-disk job store, letting finished jobs be polled across restarts and processes."""
+
+    blocking = True
+
+    def __init__(self, path: str):
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS extraction_jobs ("
+            " id TEXT PRIMARY KEY, job TEXT NOT NULL, finished_at REAL)"
+        )
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS extraction_job_leases ("
+            " id TEXT PRIMARY KEY, leased_until REAL NOT NULL)"
+        )
+        self.__connection.commit()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT job FROM extraction_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return Job.from_dict(json.loads(row[0])) if row is not None else None
+
+    def put(self, job: Job, leased_until: Optional[float] = None) -> None:
+        with self.__lock:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO extraction_jobs VALUES (?, ?, ?)",
+                (job.id, json.dumps(job.to_dict()), job.finished_at)
+            )
+            if leased_until is not None:
+                self.__connection.execute(
+                    "INSERT OR REPLACE INTO extraction_job_leases VALUES (?, ?)", (job.id, leased_until)
+                )
+            elif job.finished:
+                self.__connection.execute("DELETE FROM extraction_job_leases WHERE id = ?", (job.id,))
+            self.__connection.commit()
+
+    def renew(self, job_ids: List[str], leased_until: float) -> None:
+        with self.__lock:
+            self.__connection.executemany(
+                "UPDATE extraction_job_leases SET leased_until = ? WHERE id = ?",
+                [(leased_until, job_id) for job_id in job_ids]
+            )
+            self.__connection.commit()
+
+    def abandoned(self, now: float) -> List[Job]:
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT job FROM extraction_jobs LEFT JOIN extraction_job_leases USING (id)"
+                " WHERE finished_at IS NULL AND (leased_until IS NULL OR leased_until < ?)",
+                (now,)
+            ).fetchall()
+        return [Job.from_dict(json.loads(row[0])) for row in rows]
+
+    def purge(self, finished_before: float) -> int:
+        with self.__lock:
+            deleted = self.__connection.execute(
+                "DELETE FROM extraction_jobs WHERE finished_at < ?", (finished_before,)
+            ).rowcount
+            self.__connection.commit()
+            return deleted
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
+
+class JobManager:
+    """
+    Run extractions in the background and keep their results for polling.
+
+    Submitted jobs are queued for a fixed pool of worker tasks. A submission
+    for a URL and options already queued or running returns the existing
+    job instead of extracting twice. Finished jobs are kept for `ttl`
+    seconds and optionally reported to webhooks.
+
+    The manager renews the leases of its unfinished jobs every third of
+    `lease` seconds. Jobs of the store whose lease expired, left behind by
+    a manager that stopped in this process or another, are failed with
+    JobInterruptedError and reported to their webhooks.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        process: Callable[..., Awaitable[list]],
+        describe_error: Callable[[Exception], Dict[str, Any]],
+        workers: int,
+        max_pending: int,
+        ttl: float,
+        retry_after: int = 1,
+        webhook_timeout: float = 10.0,
+        http_pool: Optional[HTTPClientPool] = None,
+        lease: float = 30.0
+    ):
+        """
+        Initialize the manager without starting any worker.
+
+        Args:
+            store: Where job state is kept
+            process: Coroutine function extracting the lines of a URL, called
+                with the URL and the first_page, last_page, per_page and engine options
+            describe_error: Turns a failed extraction into a JSON serializable error
+            workers: Number of jobs running concurrently
+            max_pending: Number of jobs allowed to wait for a worker
+            ttl: Seconds finished jobs are kept
+            retry_after: Seconds clients are asked to wait when the queue is full
+            webhook_timeout: Timeout of completion webhook calls
+            http_pool: Pooled HTTP client for webhooks, defaults to the shared pool
+            lease: Seconds an unfinished job is considered abandoned after its manager last renewed it
+        """
+        self.store = store
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.webhook_timeout = webhook_timeout
+        self.lease = lease
+        self.__process = process
+        self.__describe_error = describe_error
+        self.__http_pool = http_pool
+        self.__active: Dict[str, Job] = {}
+        self.__queue: Optional[asyncio.Queue] = None
+        self.__tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """
+        Start the workers, the lease keeping and the cleanup of expired jobs, once.
+
+        Jobs of the store already abandoned, such as those interrupted by a
+        restart, are failed before it returns.
+        """
+        if self.__tasks:
+            return
+        self.__queue = asyncio.Queue()
+        self.__tasks = [self.__create_task(self.__work()) for _ in range(self.workers)]
+        self.__tasks.append(self.__create_task(self.__clean_up()))
+        await self.__fail_abandoned()
+        self.__tasks.append(self.__create_task(self.__keep_leases()))
+
+    async def submit(
+        self,
+        url: str,
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        per_page: bool = False,
+        webhook_url: Optional[str] = None,
+        engine: Optional[str] = None
+    ) -> Job:
+        """
+        Queue an extraction, or join the identical one already queued or running.
+
+        Args:
+            url: URL of the PDF file to process
+            first_page: First page to extract, 1-based, defaults to the first page
+            last_page: Last page to extract, defaults to the last page
+            per_page: Return a list of pages, each a list of lines, instead of a flat list
+            webhook_url: URL receiving the finished job as a JSON POST
+            engine: Extraction engine, defaults to the ocr_engine setting
+
+        Returns:
+            The queued or running job
+
+        Raises:
+            PDFInvalidURLError: If the webhook URL is invalid
+            ExtractionQueueFullError: If max_pending jobs are already waiting
+        """
+        if webhook_url is not None:
+            self.__validate_webhook_url(webhook_url)
+        await self.start()
+
+        options = {"first_page": first_page, "last_page": last_page, "per_page": per_page, "engine": engine}
+        key = json.dumps([url, options], sort_keys=True)
+        job = self.__active.get(key)
+        if job is None:
+            if self.__queue.qsize() >= self.max_pending:
+                raise ExtractionQueueFullError(
+                    message="Extraction job queue is full",
+                    details={"max_pending": self.max_pending, "retry_after": self.retry_after}
+                )
+            job = Job(url, options)
+            self.__active[key] = job
+            self.__queue.put_nowait(key)
+        if webhook_url is not None and webhook_url not in job.webhooks:
+            job.webhooks.append(webhook_url)
+        await self.__call_store(self.store.put, job, time.time() + self.lease)
+        return job
+
+    def get(self, job_id: str) -> Job:
+        """
+        Return the current state of a job.
+
+        Raises:
+            JobNotFoundError: If the job is unknown or has expired
+        """
+        return self.__live(job_id, self.store.get(job_id))
+
+    async def get_async(self, job_id: str) -> Job:
+        """Like get, reading a blocking store from a thread, off the event loop."""
+        return self.__live(job_id, await self.__call_store(self.store.get, job_id))
+
+    async def aclose(self) -> None:
+        """Stop the workers and close the store, unfinished jobs being failed once their lease expires."""
+        for task in self.__tasks:
+            task.cancel()
+        await asyncio.gather(*self.__tasks, return_exceptions=True)
+        self.__tasks = []
+        self.__active.clear()
+        await self.__call_store(self.store.close)
+
+    def __create_task(self, coroutine: Coroutine) -> asyncio.Task:
+        # Started by a request, the tasks would otherwise copy that request's context
+        # and keep adding every job's stage durations to its Server-Timing list
+        return asyncio.create_task(coroutine, context=contextvars.Context())
+
+    def __live(self, job_id: str, job: Optional[Job]) -> Job:
+        if job is None or (job.finished and job.finished_at < time.time() - self.ttl):
+            raise JobNotFoundError(
+                message="Extraction job not found",
+                details={"job_id": job_id}
+            )
+        return job
+
+    async def __call_store(self, method: Callable[..., Any], *args: Any) -> Any:
+        if self.store.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def __work(self) -> None:
+        while True:
+            key = await self.__queue.get()
+            job = self.__active[key]
+            job.status = Job.RUNNING
+            await self.__call_store(self.store.put, job, time.time() + self.lease)
+            try:
+                job.lines = await self.__process(job.url, **job.options)
+                job.status = Job.SUCCEEDED
+            except Exception as e:
+                job.error = self.__describe_error(e)
+                job.status = Job.FAILED
+            job.finished_at = time.time()
+            del self.__active[key]
+            await self.__call_store(self.store.put, job)
+            await self.__notify(job)
+
+    async def __notify(self, job: Job) -> None:
+        """POST the finished job to its webhooks, recording the last delivery failure."""
+        if not job.webhooks:
+            return
+        http_pool = self.__http_pool or get_http_client_pool()
+        for webhook_url in job.webhooks:
+            try:
+                response = await http_pool.client.post(
+                    webhook_url, json=job.to_dict(), timeout=self.webhook_timeout
+                )
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                job.webhook_error = f"{webhook_url}: {e}"
+                await self.__call_store(self.store.put, job)
+
+    async def __fail_abandoned(self) -> None:
+        """Fail the jobs of the store whose lease expired, notifying their webhooks in the background."""
+        abandoned = await self.__call_store(self.store.abandoned, time.time())
+        for job in abandoned:
+            job.status = Job.FAILED
+            job.error = self.__describe_error(JobInterruptedError(
+                message="Extraction job was interrupted before finishing",
+                details={"job_id": job.id}
+            ))
+            job.finished_at = time.time()
+            await self.__call_store(self.store.put, job)
+        if any(job.webhooks for job in abandoned):
+            self.__tasks = [task for task in self.__tasks if not task.done()]
+            self.__tasks.append(self.__create_task(self.__notify_all(abandoned)))
+
+    async def __notify_all(self, jobs: List[Job]) -> None:
+        for job in jobs:
+            await self.__notify(job)
+
+    async def __keep_leases(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            job_ids = [job.id for job in self.__active.values()]
+            if job_ids:
+                await self.__call_store(self.store.renew, job_ids, time.time() + self.lease)
+            await self.__fail_abandoned()
+
+    async def __clean_up(self) -> None:
+        while True:
+            await asyncio.sleep(min(self.ttl, 60.0))
+            await self.__call_store(self.store.purge, time.time() - self.ttl)
+
+    def __validate_webhook_url(self, webhook_url: str) -> None:
+        try:
+            HttpUrl(webhook_url)
+        except ValueError as e:
+            raise PDFInvalidURLError(
+                message="Invalid webhook URL",
+                details={"url": webhook_url, "error": str(e)}
+            )
+
+def build_job_manager(
+    settings: Settings,
+    process: Callable[..., Awaitable[list]],
+    describe_error: Callable[[Exception], Dict[str, Any]]
+) -> JobManager:
+    """Build the job manager described by the settings."""
+    store = SQLiteJobStore(settings.job_store_path) if settings.job_store_path else MemoryJobStore()
+    return JobManager(
+        store,
+        process,
+        describe_error,
+        settings.job_workers,
+        settings.job_max_pending,
+        settings.job_ttl,
+        settings.extraction_retry_after,
+        settings.job_webhook_timeout,
+        lease=settings.job_lease
+    )
@@ -0,0 +1,92 @@
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from app.config import Settings, get_settings
+from app.core.extraction_scheduler import ExtractionScheduler
+from app.core.http_client import HTTPClientPool
+from app.core.metrics import get_metrics
+from app.exceptions import ServiceOverloadedError
+
+class LoadShedder:
+    """
+    Tell from the live load of the pipeline whether the service is saturated.
+
+    The extractions are saturated once every worker is busy and the wait
+    queue holds `queue_ratio` of its capacity, the HTTP pool once
+    `http_ratio` of its connections are in use. While either is saturated
+    the service reports not ready, so the load balancer sends work to other
+    instances, and new extractions are rejected at once rather than queued
+    behind work this instance cannot get to in time.
+    """
+
+    def __init__(self, queue_ratio: float, http_ratio: float, retry_after: int = 1, enabled: bool = True):
+        """
+        Initialize the shedder.
+
+        Args:
+            queue_ratio: Share of the extraction wait queue, 0 to 1, in use when saturated
+            http_ratio: Share of the HTTP connections, 0 to 1, in use when saturated
+            retry_after: Seconds rejected clients are asked to wait
+            enabled: Never report saturation when False
+        """
+        self.queue_ratio = queue_ratio
+        self.http_ratio = http_ratio
+        self.retry_after = retry_after
+        self.enabled = enabled
+
+    def load(self, scheduler: ExtractionScheduler, http_pool: HTTPClientPool) -> Dict[str, Dict[str, int]]:
+        """Return the current extraction and HTTP pool load against their capacity."""
+        extraction = scheduler.stats()
+        return {
+            "extraction": {
+                key: extraction[key] for key in ("in_flight", "max_workers", "queue_depth", "max_queue")
+            },
+            "http": http_pool.stats(),
+        }
+
+    def saturation(self, load: Dict[str, Dict[str, int]]) -> List[str]:
+        """Return what the load saturates, "extraction" and/or "http", empty when nothing is."""
+        if not self.enabled:
+            return []
+        reasons = []
+        extraction = load["extraction"]
+        if (
+            extraction["in_flight"] >= extraction["max_workers"]
+            and extraction["queue_depth"] >= self.queue_ratio * extraction["max_queue"]
+        ):
+            reasons.append("extraction")
+        http = load["http"]
+        if http["active"] >= self.http_ratio * http["max_connections"]:
+            reasons.append("http")
+        return reasons
+
+    def check(self, scheduler: ExtractionScheduler, http_pool: HTTPClientPool) -> None:
+        """
+        Admit a new extraction unless the pipeline is saturated.
+
+        Raises:
+            ServiceOverloadedError: If the extractions or the HTTP pool are saturated
+        """
+        load = self.load(scheduler, http_pool)
+        reasons = self.saturation(load)
+        if reasons:
+            metrics = get_metrics()
+            for reason in reasons:
+                metrics.requests_shed.inc(reason=reason)
+            details: Dict[str, Any] = {"saturated": reasons, "retry_after": self.retry_after}
+            details.update(load)
+            raise ServiceOverloadedError(message="Service overloaded", details=details)
+
+def build_load_shedder(settings: Settings) -> LoadShedder:
+    """Build the load shedder described by the settings."""
+    return LoadShedder(
+        settings.load_shed_queue_ratio,
+        settings.load_shed_http_ratio,
+        settings.extraction_retry_after,
+        settings.load_shed_enabled
+    )
+
+@lru_cache()
+def get_load_shedder() -> LoadShedder:
+    """Get the application-wide load shedder."""
+    return build_load_shedder(get_settings())
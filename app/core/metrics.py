@@ -0,0 +1,192 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Stage durations of the current request, reported in its Server-Timing header
+_server_timing: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("server_timing", default=None)
+
+class Metric:
+    """Base of the metric types, a set of values keyed by label values."""
+
+    TYPE = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, key: Tuple[str, ...], extra: Sequence[Tuple[str, str]] = ()) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (f'{name}="{_escape(value)}"' for name, value in pairs)
+        return "{" + ",".join(escaped) + "}"
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        """Yield (name suffix, formatted labels, value) for every sample."""
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield "", self._format_labels(key), value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+class Counter(Metric):
+    """Monotonically increasing value."""
+
+    TYPE = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+class Gauge(Metric):
+    """Value going up and down, such as work in flight."""
+
+    TYPE = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+class Histogram(Metric):
+    """Distribution of observed values over cumulative buckets."""
+
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            counts = [count + (value <= bound) for count, bound in zip(counts, self.buckets)]
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels) -> int:
+        counts, _ = self._values.get(self._key(labels), ([0] * len(self.buckets), 0.0))
+        return counts[-1]
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        with self._lock:
+            values = dict(self._values)
+        for key, (counts, total) in sorted(values.items()):
+            for bound, count in zip(self.buckets, counts):
+                yield "_bucket", self._format_labels(key, [("le", _format_value(bound))]), count
+            yield "_sum", self._format_labels(key), total
+            yield "_count", self._format_labels(key), counts[-1]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Metrics:
+    """
+    Metrics of the extraction pipeline in the Prometheus text format.
+
+    Stages are "fetch", "ocr", "format" and "encode"; each one is timed into a
+    latency histogram, counted in an in-flight gauge and, within a request,
+    reported in the Server-Timing header.
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self.stage_duration = Histogram(
+            "pdf_stage_duration_seconds", "Duration of each pipeline stage.", ("stage",),
+            buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+        )
+        self.stage_in_flight = Gauge("pdf_stage_in_flight", "Pipeline stages currently running.", ("stage",))
+        self.requests_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+        self.requests_shed = Counter(
+            "http_requests_shed_total", "Extraction requests rejected while the pipeline was saturated.", ("reason",)
+        )
+        self.fetched_bytes = Counter("pdf_fetched_bytes_total", "Bytes of PDF content downloaded.")
+        self.pages = Histogram(
+            "pdf_pages", "Pages per extraction.",
+            buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+        )
+        self.tool_exits = Counter(
+            "ocr_tool_exits_total", "Exit codes of poppler tool runs.", ("tool", "code")
+        )
+        self.errors = Counter("pdf_errors_total", "Errors returned, by error code.", ("code",))
+        self.worker_recycles = Counter(
+            "ocr_worker_recycles_total", "Extraction worker processes replaced, by reason.", ("reason",)
+        )
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a pipeline stage into the histogram, in-flight gauge and Server-Timing."""
+        self.stage_in_flight.inc(stage=name)
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started_at
+            self.stage_in_flight.dec(stage=name)
+            self.stage_duration.observe(duration, stage=name)
+            timings = _server_timing.get()
+            if timings is not None:
+                timings.append((name, duration))
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in vars(self).values():
+            if isinstance(metric, Metric):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+def start_server_timing() -> List[Tuple[str, float]]:
+    """Start collecting stage durations for the current request and return the collected list."""
+    timings: List[Tuple[str, float]] = []
+    _server_timing.set(timings)
+    return timings
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    """Format stage durations as a Server-Timing header value, durations in milliseconds."""
+    merged: Dict[str, float] = {}
+    for name, duration in timings:
+        merged[name] = merged.get(name, 0.0) + duration
+    entries = [f"{name};dur={duration * 1000:.1f}" for name, duration in merged.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+@lru_cache()
+def get_metrics() -> Metrics:
+    """Get the application-wide metrics."""
+    return Metrics()
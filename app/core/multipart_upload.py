@@ -0,0 +1,92 @@
+from typing import AsyncIterable, AsyncIterator, Dict, List
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from app.exceptions import PDFInvalidContentTypeError
+
+async def iter_multipart_file(body: AsyncIterable[bytes], content_type: str, field: str = "file") -> AsyncIterator[bytes]:
+    """
+    Yield the content of one field of a multipart/form-data body as the body arrives.
+
+    Nothing is spooled: each chunk of the field is yielded as soon as it is
+    parsed, other fields are skipped and the rest of the body is left
+    unread once the field ends.
+
+    Args:
+        body: Chunks of the request body
+        content_type: Content-Type header of the request, with its boundary
+        field: Name of the form field holding the file
+
+    Yields:
+        Chunks of the field's content
+
+    Raises:
+        PDFInvalidContentTypeError: If the body is malformed, truncated or has no such field
+    """
+    _, params = parse_options_header(content_type)
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise PDFInvalidContentTypeError(
+            message="Missing multipart boundary",
+            details={"content_type": content_type}
+        )
+
+    state = {"selected": False, "found": False, "finished": False}
+    headers: Dict[bytes, bytes] = {}
+    header: List[bytes] = [b"", b""]
+    pending: List[bytes] = []
+
+    def on_part_begin() -> None:
+        headers.clear()
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        header[0] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        header[1] += data[start:end]
+
+    def on_header_end() -> None:
+        headers[header[0].lower()] = header[1]
+        header[:] = [b"", b""]
+
+    def on_headers_finished() -> None:
+        _, disposition = parse_options_header(headers.get(b"content-disposition", b""))
+        state["selected"] = not state["found"] and disposition.get(b"name") == field.encode()
+        state["found"] = state["found"] or state["selected"]
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        if state["selected"]:
+            pending.append(data[start:end])
+
+    def on_part_end() -> None:
+        if state["selected"]:
+            state["selected"] = False
+            state["finished"] = True
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    try:
+        async for chunk in body:
+            parser.write(chunk)
+            for data in pending:
+                yield data
+            pending.clear()
+            if state["finished"]:
+                return
+        parser.finalize()
+    except MultipartParseError as e:
+        raise PDFInvalidContentTypeError(
+            message="Invalid multipart body",
+            details={"error": str(e)}
+        )
+
+    raise PDFInvalidContentTypeError(
+        message="Incomplete multipart body" if state["found"] else "No file in multipart body",
+        details={"field": field}
+    )
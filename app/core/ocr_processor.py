@@ -1,63 +1,597 @@
+import asyncio
+import os
+import re
 import subprocess
 import tempfile
-from app.exceptions import OCRToolNotFoundError, OCRExtractionError, OCRTimeoutError
+from contextlib import contextmanager
+from typing import AsyncIterator, Iterator, List, Optional, Tuple, Union
+from app.config import get_settings
+from app.core.deadline import deadline_budget
+from app.core.extraction_engine import ExtractionEngine, get_pdfium_engine
+from app.core.metrics import get_metrics
+from app.core.pdf_payload import PDFPayload, shared_path
+from app.core.worker_pool import get_worker_pool
+from app.exceptions import (
+    OCRToolNotFoundError, OCRExtractionError, OCRInvalidPageRangeError, OCRTimeoutError
+)
+
+class PDFSource:
+    """How the PDF is handed to pdftotext: a path argument, optional stdin data and inherited fds."""
+
+    __slots__ = ("path", "stdin", "pass_fds")
+
+    def __init__(self, path: str, stdin: Optional[memoryview] = None, pass_fds: Tuple[int, ...] = ()):
+        self.path = path
+        self.stdin = stdin
+        self.pass_fds = pass_fds
 
 class OCRProcessor:
     """Extract text from PDF files using OCR."""
-    
-    def extract_text(self, pdf_data: bytes) -> str:
+
+    # Ways of handing the PDF to pdftotext, see _pdf_source
+    INPUT_MODES = ("auto", "memfd", "stdin", "tempfile")
+
+    # pdftotext runs as a subprocess, the others in-process, see _engine
+    ENGINES = ("pdftotext", "pdfium")
+
+    # Longest output line accepted when streaming pdftotext's stdout
+    STREAM_LINE_LIMIT = 1024 * 1024
+
+    # Seconds a pool worker is given on top of pdftotext's own timeout to report it
+    WORKER_GRACE = 5
+
+    # Page objects, counted to estimate the length of a document when no last page is given
+    PAGE_PATTERN = re.compile(rb"/Type\s*/Page(?![A-Za-z])")
+
+    def __init__(
+        self,
+        input_mode: Optional[str] = None,
+        engine: Optional[str] = None,
+        use_worker_pool: Optional[bool] = None
+    ):
         """
-        Extract text from PDF data using pdftotext.
-        
+        Initialize the OCR processor.
+
+        Args:
+            input_mode: One of INPUT_MODES, defaults to the ocr_input_mode setting
+            engine: One of ENGINES, defaults to the ocr_engine setting
+            use_worker_pool: Run pdftotext from the worker pool, defaults to the ocr_worker_pool setting
+        """
+        settings = get_settings()
+        self.input_mode = input_mode or settings.ocr_input_mode
+        if self.input_mode not in self.INPUT_MODES:
+            raise ValueError(f"Unknown OCR input mode: {self.input_mode}")
+        self.engine = engine or settings.ocr_engine
+        if self.engine not in self.ENGINES:
+            raise ValueError(f"Unknown OCR engine: {self.engine}")
+        self.use_worker_pool = settings.ocr_worker_pool if use_worker_pool is None else use_worker_pool
+
+    def extract_text(
+        self,
+        pdf_data: Union[bytes, PDFPayload],
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        engine: Optional[str] = None
+    ) -> str:
+        """
+        Extract text from PDF data using pdftotext or an in-process engine.
+
+        Pages are separated by form feeds, as written by pdftotext.
+
         Args:
-            pdf_data: Raw PDF content as bytes
-            
+            pdf_data: Raw PDF content as bytes or a fetched PDFPayload
+            first_page: First page to convert, 1-based, defaults to the first page
+            last_page: Last page to convert, defaults to the last page
+            engine: One of ENGINES, defaults to the processor's engine
+
         Returns:
             Extracted text as string
-            
+
         Raises:
             OCRToolNotFoundError: If the OCR tool is not found
             OCRExtractionError: If text extraction fails
+            OCRInvalidPageRangeError: If the page range is invalid
             OCRTimeoutError: If the OCR operation times out
         """
+        self._validate_pdf_data(pdf_data)
+        self._validate_page_range(first_page, last_page)
+
+        timeout = deadline_budget(self.timeout(pdf_data, first_page, last_page))
+        in_process_engine = self._engine(engine)
+        if in_process_engine is not None:
+            return self._clean(in_process_engine.extract_text(pdf_data, first_page, last_page, timeout))
+
+        if self.use_worker_pool:
+            with shared_path(pdf_data) as pdf_path:
+                return get_worker_pool().run(
+                    _pdftotext_in_worker, pdf_path, first_page, last_page, timeout,
+                    timeout=timeout + self.WORKER_GRACE
+                )
+        return self._pdftotext(pdf_data, first_page, last_page, timeout)
+
+    async def extract_text_async(
+        self,
+        pdf_data: Union[bytes, PDFPayload],
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        engine: Optional[str] = None,
+        clean: bool = True
+    ) -> str:
+        """
+        Extract text from PDF data using an asyncio pdftotext subprocess or an in-process engine.
+
+        Args:
+            pdf_data: Raw PDF content as bytes or a fetched PDFPayload
+            first_page: First page to convert, 1-based, defaults to the first page
+            last_page: Last page to convert, defaults to the last page
+            engine: One of ENGINES, defaults to the processor's engine
+            clean: Trim surrounding blank lines, False for a chunk of a larger page range
+
+        Returns:
+            Extracted text as string
+
+        Raises:
+            Same exceptions as extract_text
+        """
+        self._validate_pdf_data(pdf_data)
+        self._validate_page_range(first_page, last_page)
+
+        timeout = deadline_budget(self.timeout(pdf_data, first_page, last_page))
+        in_process_engine = self._engine(engine)
+        if in_process_engine is not None:
+            text = await in_process_engine.extract_text_async(pdf_data, first_page, last_page, timeout)
+            return self._clean(text) if clean else text
+
+        if self.use_worker_pool:
+            with shared_path(pdf_data) as pdf_path:
+                return await get_worker_pool().run_async(
+                    _pdftotext_in_worker, pdf_path, first_page, last_page, timeout, clean,
+                    timeout=timeout + self.WORKER_GRACE
+                )
+
+        with self._pdf_source(pdf_data) as source:
+            stdout = await self._run_async(
+                self._build_command(source.path, first_page, last_page), source, timeout
+            )
+            text = self._decode(stdout)
+            return self._clean(text) if clean else text
+
+    async def warm_up_workers_async(self, pdf_data: bytes) -> List[str]:
+        """
+        Extract a document once in every worker of the pool, so that each has loaded the engine.
+
+        Args:
+            pdf_data: Raw PDF content, a small document
+
+        Returns:
+            Text extracted by each worker
+
+        Raises:
+            Same exceptions as extract_text
+        """
+        timeout = self.timeout(pdf_data)
+        in_process_engine = self._engine(None)
+        if in_process_engine is not None:
+            return await in_process_engine.warm_up_async(pdf_data, timeout)
+        with shared_path(pdf_data) as pdf_path:
+            return await get_worker_pool().run_on_each_async(
+                _pdftotext_in_worker, pdf_path, None, None, timeout,
+                timeout=timeout + self.WORKER_GRACE
+            )
+
+    async def extract_bbox_async(
+        self,
+        pdf_data: Union[bytes, PDFPayload],
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None
+    ) -> str:
+        """
+        Extract the position of every word with pdftotext -bbox-layout.
+
+        Always runs pdftotext as an asyncio subprocess, whatever the engine.
+
+        Args:
+            pdf_data: Raw PDF content as bytes or a fetched PDFPayload
+            first_page: First page to convert, 1-based, defaults to the first page
+            last_page: Last page to convert, defaults to the last page
+
+        Returns:
+            XHTML document of pages, blocks, lines and words with their bounding boxes
+
+        Raises:
+            Same exceptions as extract_text
+        """
+        self._validate_pdf_data(pdf_data)
+        self._validate_page_range(first_page, last_page)
+
+        timeout = deadline_budget(self.timeout(pdf_data, first_page, last_page))
+        with self._pdf_source(pdf_data) as source:
+            command = self._build_command(source.path, first_page, last_page, bbox=True)
+            return self._decode(await self._run_async(command, source, timeout))
+
+    async def iter_lines_async(
+        self,
+        pdf_data: Union[bytes, PDFPayload],
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        engine: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield the lines of pdftotext's output as it writes them.
+
+        pdftotext is killed if the consumer stops iterating early. In-process
+        engines extract the whole range first and then yield its lines.
+
+        Args:
+            pdf_data: Raw PDF content as bytes or a fetched PDFPayload
+            first_page: First page to convert, 1-based, defaults to the first page
+            last_page: Last page to convert, defaults to the last page
+            engine: One of ENGINES, defaults to the processor's engine
+
+        Yields:
+            Raw text lines without their line terminator
+
+        Raises:
+            Same exceptions as extract_text
+        """
+        self._validate_pdf_data(pdf_data)
+        self._validate_page_range(first_page, last_page)
+
+        timeout = deadline_budget(self.timeout(pdf_data, first_page, last_page))
+        in_process_engine = self._engine(engine)
+        if in_process_engine is not None:
+            text = await in_process_engine.extract_text_async(pdf_data, first_page, last_page, timeout)
+            for line in text.split("\n"):
+                yield line
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        with self._pdf_source(pdf_data) as source:
+            command = self._build_command(source.path, first_page, last_page)
+            process = await self._spawn_async(command, source, limit=self.STREAM_LINE_LIMIT)
+            stdin_task = self._feed_stdin(process, source)
+            stderr_task = asyncio.ensure_future(process.stderr.read())
+            try:
+                while True:
+                    line = await asyncio.wait_for(process.stdout.readline(), deadline - loop.time())
+                    if not line:
+                        break
+                    yield self._decode(line).rstrip("\r\n")
+                await asyncio.wait_for(process.wait(), deadline - loop.time())
+                self._record_exit(command, process.returncode)
+                if process.returncode != 0:
+                    raise self._extraction_error(command, process.returncode, await stderr_task)
+            except asyncio.TimeoutError as e:
+                raise self._timeout_error(e, timeout)
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                for task in (stdin_task, stderr_task):
+                    if task is not None and not task.done():
+                        task.cancel()
+
+    async def count_pages_async(self, pdf_data: Union[bytes, PDFPayload]) -> int:
+        """
+        Count the pages of a PDF with pdfinfo.
+
+        Args:
+            pdf_data: Raw PDF content as bytes or a fetched PDFPayload
+
+        Returns:
+            Number of pages in the document
+
+        Raises:
+            OCRToolNotFoundError: If pdfinfo is not found
+            OCRExtractionError: If the page count cannot be read
+            OCRTimeoutError: If pdfinfo times out
+        """
+        self._validate_pdf_data(pdf_data)
+
+        with self._pdf_source(pdf_data, allow_stdin=False) as source:
+            command = ["pdfinfo", source.path]
+            stdout = await self._run_async(command, source, deadline_budget(get_settings().ocr_timeout_base))
+
+        for line in self._decode(stdout).splitlines():
+            if line.startswith("Pages:"):
+                return int(line.split(":", 1)[1])
+        raise self._extraction_error(command, 0, b"No page count in pdfinfo output")
+
+    async def tool_version_async(self, tool: str = "pdftotext") -> str:
+        """
+        Check that a poppler tool runs and return its version line.
+
+        Args:
+            tool: Name of the poppler tool on the PATH
+
+        Returns:
+            First line of the tool's -v output, e.g. "pdftotext version 24.02.0"
+
+        Raises:
+            OCRToolNotFoundError: If the tool is not found
+            OCRExtractionError: If the tool fails to report its version
+            OCRTimeoutError: If the tool does not answer in time
+        """
+        command = [tool, "-v"]
+        timeout = get_settings().ocr_timeout_base
+        process = await self._spawn_async(command, PDFSource(tool))
+        try:
+            # poppler tools print their version on stderr
+            _, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except asyncio.TimeoutError as e:
+            process.kill()
+            await process.wait()
+            raise self._timeout_error(e, timeout)
+        if process.returncode != 0:
+            raise self._extraction_error(command, process.returncode, stderr)
+        return self._decode(stderr).strip().split("\n", 1)[0]
+
+    def timeout(
+        self,
+        pdf_data: Union[bytes, PDFPayload],
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None
+    ) -> float:
+        """
+        Return the seconds allowed to extract a page range.
+
+        ocr_timeout_base plus ocr_timeout_per_page for every page, capped at
+        ocr_timeout_max. Without a last page, the pages of an in-memory
+        document are estimated by counting its page objects; documents
+        spooled to disk or whose page objects are compressed get the cap.
+
+        Args:
+            pdf_data: Raw PDF content as bytes or a fetched PDFPayload
+            first_page: First page to convert, 1-based, defaults to the first page
+            last_page: Last page to convert, defaults to the last page
+
+        Returns:
+            Timeout in seconds
+        """
+        settings = get_settings()
+        if last_page is not None:
+            pages = last_page - (first_page or 1) + 1
+        else:
+            pages = self._estimate_pages(pdf_data) - (first_page or 1) + 1
+            if pages < 1:
+                return settings.ocr_timeout_max
+        return min(settings.ocr_timeout_base + settings.ocr_timeout_per_page * pages, settings.ocr_timeout_max)
+
+    def _estimate_pages(self, pdf_data: Union[bytes, PDFPayload]) -> int:
+        """Count the page objects of an in-memory document, 0 when unknown."""
+        if isinstance(pdf_data, PDFPayload):
+            if pdf_data.path is not None:
+                return 0
+            pdf_data = pdf_data.getbuffer()
+        return sum(1 for _ in self.PAGE_PATTERN.finditer(pdf_data))
+
+    def _pdftotext(
+        self,
+        pdf_data: Union[bytes, PDFPayload],
+        first_page: Optional[int],
+        last_page: Optional[int],
+        timeout: float,
+        clean: bool = True
+    ) -> str:
+        """Run pdftotext as a subprocess of the current process."""
+        with self._pdf_source(pdf_data) as source:
+            return self._pdftotext_from(source, first_page, last_page, timeout, clean)
+
+    def _pdftotext_from(
+        self,
+        source: PDFSource,
+        first_page: Optional[int],
+        last_page: Optional[int],
+        timeout: float,
+        clean: bool = True
+    ) -> str:
+        """Run pdftotext on a PDFSource as a subprocess of the current process."""
+        stdout = self._run(self._build_command(source.path, first_page, last_page), source, timeout)
+        text = self._decode(stdout)
+        return self._clean(text) if clean else text
+
+    def _run(self, command: List[str], source: PDFSource, timeout: float) -> bytes:
+        """Run a poppler tool to completion and return its stdout."""
+        try:
+            # Run OCR with timeout
+            result = subprocess.run(
+                command,
+                input=source.stdin,
+                pass_fds=source.pass_fds,
+                capture_output=True,
+                check=True,
+                timeout=timeout
+            )
+        except FileNotFoundError:
+            raise self._tool_not_found_error(command[0])
+        except subprocess.TimeoutExpired as e:
+            raise self._timeout_error(e, timeout)
+        except subprocess.CalledProcessError as e:
+            self._record_exit(command, e.returncode)
+            raise self._extraction_error(e.cmd, e.returncode, e.stderr)
+        self._record_exit(command, result.returncode)
+        return result.stdout
+
+    async def _run_async(self, command: List[str], source: PDFSource, timeout: float) -> bytes:
+        """Run a poppler tool as an asyncio subprocess and return its stdout."""
+        process = await self._spawn_async(command, source)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(source.stdin), timeout=timeout)
+        except asyncio.TimeoutError as e:
+            process.kill()
+            await process.wait()
+            raise self._timeout_error(e, timeout)
+        except asyncio.CancelledError:
+            # Nobody waits for the output any more
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+
+        self._record_exit(command, process.returncode)
+        if process.returncode != 0:
+            raise self._extraction_error(command, process.returncode, stderr)
+        return stdout
+
+    async def _spawn_async(self, command: List[str], source: PDFSource, **kwargs) -> asyncio.subprocess.Process:
+        """Start a poppler tool with piped output, reading the PDF from the given source."""
+        try:
+            return await asyncio.create_subprocess_exec(
+                *command,
+                stdin=asyncio.subprocess.PIPE if source.stdin is not None else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                pass_fds=source.pass_fds,
+                **kwargs
+            )
+        except FileNotFoundError:
+            raise self._tool_not_found_error(command[0])
+
+    def _feed_stdin(self, process: asyncio.subprocess.Process, source: PDFSource) -> Optional[asyncio.Future]:
+        """Write the PDF to the process's stdin in the background when reading from stdin."""
+        if source.stdin is None:
+            return None
+
+        async def feed():
+            try:
+                process.stdin.write(source.stdin)
+                await process.stdin.drain()
+                process.stdin.close()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        return asyncio.ensure_future(feed())
+
+    @contextmanager
+    def _pdf_source(self, pdf_data: Union[bytes, PDFPayload], allow_stdin: bool = True) -> Iterator[PDFSource]:
+        """
+        Yield the PDFSource pdftotext reads the document from.
+
+        A payload already spooled to disk is read in place. Otherwise the
+        input mode decides: "memfd" writes the bytes to an anonymous
+        in-memory file passed as /dev/fd/N, "stdin" pipes them to
+        pdftotext (poppler reads "-" as stdin), "tempfile" writes a named
+        temporary file. "auto" uses memfd where the platform has it and
+        falls back to a temporary file. Tools that cannot read stdin pass
+        allow_stdin=False and get the "auto" behaviour instead.
+        """
+        if isinstance(pdf_data, PDFPayload) and pdf_data.path is not None:
+            yield PDFSource(pdf_data.path)
+            return
+
+        data = memoryview(pdf_data.getbuffer() if isinstance(pdf_data, PDFPayload) else pdf_data)
+        mode = self.input_mode
+        if mode == "auto" or (mode == "stdin" and not allow_stdin):
+            mode = "memfd" if hasattr(os, "memfd_create") else "tempfile"
+        elif mode == "memfd" and not hasattr(os, "memfd_create"):
+            mode = "tempfile"
+
+        if mode == "stdin":
+            yield PDFSource("-", stdin=data)
+        elif mode == "memfd":
+            fd = os.memfd_create("pdf")
+            try:
+                with open(fd, "wb", closefd=False) as memory_file:
+                    memory_file.write(data)
+                yield PDFSource(f"/dev/fd/{fd}", pass_fds=(fd,))
+            finally:
+                os.close(fd)
+        else:
+            with tempfile.NamedTemporaryFile(suffix=".pdf") as temp_pdf:
+                # Save PDF to temp file
+                temp_pdf.write(data)
+                temp_pdf.flush()
+                yield PDFSource(temp_pdf.name)
+
+    def _engine(self, engine: Optional[str]) -> Optional[ExtractionEngine]:
+        """Return the in-process engine to use, or None to run pdftotext."""
+        engine = engine or self.engine
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown OCR engine: {engine}")
+        if engine == "pdfium":
+            return get_pdfium_engine()
+        return None
+
+    def _validate_pdf_data(self, pdf_data: Union[bytes, PDFPayload]) -> None:
+        """Raise OCRExtractionError if there is no PDF data to process."""
         if not pdf_data:
             raise OCRExtractionError(
                 message="Empty PDF data",
                 details={"pdf_data_length": 0}
             )
-            
-        with tempfile.NamedTemporaryFile(suffix=".pdf") as temp_pdf:
-            # Save PDF to temp file
-            temp_pdf.write(pdf_data)
-            temp_pdf.flush()
-            
-            try:
-                # Run OCR with timeout
-                result = subprocess.run(
-                    ["pdftotext", "-layout", temp_pdf.name, "-"],
-                    capture_output=True,
-                    text=True,
-                    check=True,
-                    timeout=30  # 30 seconds timeout
-                )
-            except FileNotFoundError:
-                raise OCRToolNotFoundError(
-                    message="OCR tool not found",
-                    details={"tool": "pdftotext"}
-                )
-            except subprocess.TimeoutExpired as e:
-                raise OCRTimeoutError(
-                    message="OCR operation timed out",
-                    details={"timeout": 30, "error": str(e)}
-                )
-            except subprocess.CalledProcessError as e:
-                raise OCRExtractionError(
-                    message="Text extraction failed",
-                    details={
-                        "command": e.cmd,
-                        "return_code": e.returncode,
-                        "stderr": e.stderr
-                    }
-                )
-            
-            return result.stdout.strip() 
\ No newline at end of file
+
+    def _validate_page_range(self, first_page: Optional[int], last_page: Optional[int]) -> None:
+        """Raise OCRInvalidPageRangeError if the page range is not 1-based and ordered."""
+        if (
+            (first_page is not None and first_page < 1)
+            or (last_page is not None and last_page < 1)
+            or (first_page is not None and last_page is not None and last_page < first_page)
+        ):
+            raise OCRInvalidPageRangeError(
+                message="Invalid page range",
+                details={"first_page": first_page, "last_page": last_page}
+            )
+
+    def _build_command(
+        self,
+        pdf_path: str,
+        first_page: Optional[int] = None,
+        last_page: Optional[int] = None,
+        bbox: bool = False
+    ) -> List[str]:
+        """Build the pdftotext command line writing text, or word boxes when bbox is set, to stdout."""
+        command = ["pdftotext", "-bbox-layout" if bbox else "-layout"]
+        if first_page is not None:
+            command += ["-f", str(first_page)]
+        if last_page is not None:
+            command += ["-l", str(last_page)]
+        return command + [pdf_path, "-"]
+
+    def _record_exit(self, command: List[str], return_code: int) -> None:
+        """Count the exit code of a finished poppler tool run."""
+        get_metrics().tool_exits.inc(tool=os.path.basename(command[0]), code=return_code)
+
+    def _decode(self, output: bytes) -> str:
+        return output.decode("utf-8", errors="replace")
+
+    def _clean(self, text: str) -> str:
+        return clean_text(text)
+
+    def _tool_not_found_error(self, tool: str = "pdftotext") -> OCRToolNotFoundError:
+        return OCRToolNotFoundError(
+            message="OCR tool not found",
+            details={"tool": tool}
+        )
+
+    def _timeout_error(self, error: Exception, timeout: float) -> OCRTimeoutError:
+        return OCRTimeoutError(
+            message="OCR operation timed out",
+            details={"timeout": timeout, "error": str(error)}
+        )
+
+    def _extraction_error(self, command, return_code: int, stderr: Optional[bytes]) -> OCRExtractionError:
+        return OCRExtractionError(
+            message="Text extraction failed",
+            details={
+                "command": command,
+                "return_code": return_code,
+                "stderr": self._decode(stderr) if isinstance(stderr, bytes) else stderr
+            }
+        )
+
+def _pdftotext_in_worker(
+    pdf_path: str,
+    first_page: Optional[int],
+    last_page: Optional[int],
+    timeout: float,
+    clean: bool = True
+) -> str:
+    """Worker side of the ocr_worker_pool mode, spawning pdftotext on a shared path from a pool worker."""
+    return OCRProcessor(engine="pdftotext", use_worker_pool=False)._pdftotext_from(
+        PDFSource(pdf_path), first_page, last_page, timeout, clean
+    )
+
+def clean_text(text: str) -> str:
+    """Trim surrounding blank lines but keep the form feeds separating pages."""
+    return text.strip(" \t\r\n")
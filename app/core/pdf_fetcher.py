@@ -1,65 +1,280 @@
-import requests
+import asyncio
+import time
+from typing import AsyncIterable, Dict, Optional
+import httpx
 from pydantic import HttpUrl
 from app.config import get_settings
-from app.exceptions import PDFInvalidURLError, PDFNetworkError, PDFInvalidContentTypeError, PDFTimeoutError
+from app.core.deadline import deadline_budget
+from app.core.fetch_cache import CachedDocument, FetchCache, get_fetch_cache
+from app.core.http_client import HTTPClientPool, get_http_client_pool
+from app.core.metrics import get_metrics
+from app.core.multipart_upload import iter_multipart_file
+from app.core.pdf_payload import PDFPayload
+from app.exceptions import (
+    PDFInvalidURLError, PDFNetworkError, PDFInvalidContentTypeError, PDFTimeoutError, PDFTooLargeError
+)
 
 class PDFFetcher:
-    """Fetch PDF files from URLs."""
-    
-    def __init__(self):
-        """Initialize the PDF fetcher."""
+    """Fetch PDF files from URLs, or receive them uploaded in a request body."""
+
+    # Name of the source of uploaded documents in error details
+    UPLOAD = "upload"
+
+    def __init__(self, http_pool: Optional[HTTPClientPool] = None, fetch_cache: Optional[FetchCache] = None):
+        """
+        Initialize the PDF fetcher.
+
+        Args:
+            http_pool: Pooled HTTP client used by the async path, defaults to the shared pool
+            fetch_cache: Store of validators for conditional requests, defaults to the shared store
+        """
         self.settings = get_settings()
+        self.http_pool = http_pool or get_http_client_pool()
+        self.fetch_cache = fetch_cache or get_fetch_cache()
 
-    def fetch_pdf(self, url: str) -> bytes:
+    def fetch_pdf(self, url: str, headers: Optional[Dict[str, str]] = None) -> PDFPayload:
         """
         Fetch and validate a PDF file from a URL.
-        
+
+        The body is streamed in chunks into a PDFPayload, aborting as soon as
+        it exceeds the size limit or its first bytes are not a PDF. Connecting
+        and each read are bounded by fetch_connect_timeout and
+        fetch_read_timeout, the whole download by fetch_timeout, all of them
+        shortened to the time left before the request deadline.
+
         Args:
             url: URL of the PDF file to fetch
-            
+            headers: Extra request headers, such as authorization
+
         Returns:
-            Raw PDF content as bytes
-            
+            PDFPayload holding the PDF content
+
         Raises:
             PDFInvalidURLError: If the URL is invalid
             PDFNetworkError: If there's a network error while fetching the PDF
             PDFInvalidContentTypeError: If the content type is not PDF
+            PDFTooLargeError: If the PDF exceeds the maximum size
             PDFTimeoutError: If the fetch operation times out
         """
-        # Validate URL
-        try:
-            HttpUrl(url)
-        except ValueError as e:
-            raise PDFInvalidURLError(
-                message="Invalid PDF URL",
-                details={"url": url, "error": str(e)}
-            )
-        
+        # Only this blocking path uses requests, the service fetches with httpx
+        import requests
+
+        self._validate_url(url)
+
+        cached = self._cached_document(url)
+        if cached is not None and self.fetch_cache.is_fresh(cached):
+            return cached.content
+
         # Fetch content with timeout
+        timeout = deadline_budget(self.settings.fetch_timeout)
+        deadline = time.monotonic() + timeout
         try:
-            response = requests.get(url, timeout=10)  # 10 seconds timeout
-            response.raise_for_status()
-        except requests.Timeout as e:
-            raise PDFTimeoutError(
-                message="PDF fetch operation timed out",
-                details={"url": url, "timeout": 10, "error": str(e)}
+            response = requests.get(
+                url,
+                headers=self._request_headers(headers, cached),
+                timeout=(
+                    min(self.settings.fetch_connect_timeout, timeout),
+                    min(self.settings.fetch_read_timeout, timeout)
+                ),
+                stream=True
             )
+            try:
+                if cached is not None and response.status_code == 304:
+                    return self.fetch_cache.revalidated(cached)
+                response.raise_for_status()
+                self._validate_headers(url, response.headers)
+                payload = self._new_payload()
+                for chunk in response.iter_content(chunk_size=self.settings.fetch_chunk_size):
+                    self._receive_chunk(url, payload, chunk)
+                    if time.monotonic() > deadline:
+                        raise requests.Timeout("Download exceeded the total fetch timeout")
+            finally:
+                response.close()
+        except requests.Timeout as e:
+            raise self._timeout_error(url, e, timeout)
         except requests.RequestException as e:
             raise PDFNetworkError(
                 message="Failed to fetch PDF",
                 details={"url": url, "error": str(e)}
             )
-        
-        # Validate content type
-        content_type = response.headers.get("Content-Type", "")
-        if not content_type.startswith("binary/octet-stream"):
+
+        return self._complete(url, payload, response.headers)
+
+    async def fetch_pdf_async(self, url: str, headers: Optional[Dict[str, str]] = None) -> PDFPayload:
+        """
+        Fetch and validate a PDF file from a URL without blocking the event loop.
+
+        Args:
+            url: URL of the PDF file to fetch
+            headers: Extra request headers, such as authorization
+
+        Returns:
+            PDFPayload holding the PDF content
+
+        Raises:
+            Same exceptions as fetch_pdf
+        """
+        self._validate_url(url)
+
+        cached = self._cached_document(url)
+        if cached is not None and self.fetch_cache.is_fresh(cached):
+            return cached.content
+
+        timeout = deadline_budget(self.settings.fetch_timeout)
+        try:
+            # Waiting for a slot of a saturated host counts against the fetch timeout
+            async with asyncio.timeout(timeout), self.http_pool.host_slot(url):
+                async with self.http_pool.client.stream(
+                    "GET", url, headers=self._request_headers(headers, cached)
+                ) as response:
+                    if cached is not None and response.status_code == 304:
+                        return self.fetch_cache.revalidated(cached)
+                    response.raise_for_status()
+                    self._validate_headers(url, response.headers)
+                    payload = self._new_payload()
+                    async for chunk in response.aiter_bytes(self.settings.fetch_chunk_size):
+                        self._receive_chunk(url, payload, chunk)
+        except (httpx.TimeoutException, TimeoutError) as e:
+            raise self._timeout_error(url, e, timeout)
+        except httpx.HTTPError as e:
+            raise PDFNetworkError(
+                message="Failed to fetch PDF",
+                details={"url": url, "error": str(e)}
+            )
+
+        return self._complete(url, payload, response.headers)
+
+    async def receive_pdf_async(
+        self,
+        body: AsyncIterable[bytes],
+        content_type: str,
+        content_length: Optional[str] = None
+    ) -> PDFPayload:
+        """
+        Receive a PDF uploaded as a raw body or as the "file" field of a multipart form.
+
+        The body is streamed into a PDFPayload as it arrives, under the same
+        size limit, spooling and magic byte check as fetched documents, and
+        within fetch_timeout shortened to the time left before the request
+        deadline.
+
+        Args:
+            body: Chunks of the request body
+            content_type: Content-Type of the request, one of fetch_allowed_content_types
+                or multipart/form-data
+            content_length: Content-Length of the request, if known
+
+        Returns:
+            PDFPayload holding the PDF content
+
+        Raises:
+            PDFInvalidContentTypeError: If the body is neither a PDF nor a multipart form with one
+            PDFTooLargeError: If the PDF exceeds the maximum size
+            PDFTimeoutError: If receiving the body times out
+        """
+        media_type = content_type.split(";")[0].strip().lower()
+        if media_type == "multipart/form-data":
+            body = iter_multipart_file(body, content_type)
+        else:
+            self._validate_headers(self.UPLOAD, {"Content-Type": media_type, "Content-Length": content_length})
+
+        timeout = deadline_budget(self.settings.fetch_timeout)
+        payload = self._new_payload()
+        try:
+            async with asyncio.timeout(timeout):
+                async for chunk in body:
+                    self._receive_chunk(self.UPLOAD, payload, chunk)
+        except TimeoutError as e:
+            raise self._timeout_error(self.UPLOAD, e, timeout)
+
+        self._validate_magic(self.UPLOAD, payload)
+        return payload.seal()
+
+    def _cached_document(self, url: str) -> Optional[CachedDocument]:
+        """Return the previously fetched document for the URL, if any."""
+        return self.fetch_cache.get(url) if self.fetch_cache is not None else None
+
+    def _request_headers(
+        self,
+        headers: Optional[Dict[str, str]],
+        cached: Optional[CachedDocument]
+    ) -> Optional[Dict[str, str]]:
+        """Merge the extra headers with the validators of the cached document."""
+        if cached is None:
+            return headers
+        return {**(headers or {}), **cached.conditional_headers()}
+
+    def _new_payload(self) -> PDFPayload:
+        return PDFPayload(self.settings.fetch_max_size, self.settings.fetch_spool_size)
+
+    def _receive_chunk(self, url: str, payload: PDFPayload, chunk: bytes) -> None:
+        """Append a chunk and sniff the magic bytes as soon as they are available."""
+        magic_length = len(PDFPayload.MAGIC)
+        already_sniffed = payload.size >= magic_length
+        payload.write(chunk)
+        if not already_sniffed and payload.size >= magic_length:
+            self._validate_magic(url, payload)
+
+    def _complete(self, url: str, payload: PDFPayload, headers) -> PDFPayload:
+        """Validate the finished payload and keep it for later conditional requests."""
+        self._validate_magic(url, payload)
+        payload.seal()
+        get_metrics().fetched_bytes.inc(payload.size)
+        if self.fetch_cache is not None:
+            self.fetch_cache.store(url, payload, headers)
+        return payload
+
+    def _timeout_error(self, url: str, error: Exception, timeout: float) -> PDFTimeoutError:
+        return PDFTimeoutError(
+            message="PDF fetch operation timed out",
+            details={
+                "url": url,
+                "timeout": timeout,
+                "connect_timeout": self.settings.fetch_connect_timeout,
+                "read_timeout": self.settings.fetch_read_timeout,
+                "error": str(error) or type(error).__name__
+            }
+        )
+
+    def _validate_url(self, url: str) -> None:
+        """Raise PDFInvalidURLError if the URL is not a valid HTTP(S) URL."""
+        try:
+            HttpUrl(url)
+        except ValueError as e:
+            raise PDFInvalidURLError(
+                message="Invalid PDF URL",
+                details={"url": url, "error": str(e)}
+            )
+
+    def _validate_headers(self, url: str, headers) -> None:
+        """Reject a response by its headers before any of the body is read."""
+        content_type = headers.get("Content-Type") or ""
+        media_type = content_type.split(";")[0].strip().lower()
+        if media_type and media_type not in self.settings.fetch_allowed_content_types:
             raise PDFInvalidContentTypeError(
                 message="Invalid content type",
                 details={
                     "url": url,
                     "content_type": content_type,
-                    "expected": "binary/octet-stream"
+                    "expected": self.settings.fetch_allowed_content_types
                 }
             )
-            
-        return response.content 
\ No newline at end of file
+
+        content_length = headers.get("Content-Length")
+        if content_length and content_length.isdigit() and int(content_length) > self.settings.fetch_max_size:
+            raise PDFTooLargeError(
+                message="PDF exceeds the maximum allowed size",
+                details={
+                    "url": url,
+                    "max_size": self.settings.fetch_max_size,
+                    "content_length": int(content_length)
+                }
+            )
+
+    def _validate_magic(self, url: str, payload: PDFPayload) -> None:
+        """Raise PDFInvalidContentTypeError if the content does not start like a PDF."""
+        if not payload.looks_like_pdf():
+            raise PDFInvalidContentTypeError(
+                message="Content is not a PDF",
+                details={"url": url, "head": payload.head.hex(), "expected": PDFPayload.MAGIC.decode()}
+            )
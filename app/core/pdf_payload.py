@@ -0,0 +1,181 @@
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional, Union
+
+from app.exceptions import PDFTooLargeError
+
+class PDFPayload:
+    """
+    PDF content received in chunks.
+
+    Chunks are kept in memory up to `spool_size` bytes and then moved to a
+    named temporary file, so large documents never sit in memory and can be
+    handed to pdftotext by path. The SHA-256 of the content is computed as
+    the chunks arrive. A local file is memory-mapped instead of copied.
+    """
+
+    MAGIC = b"%PDF-"
+
+    def __init__(self, max_size: int, spool_size: int):
+        """
+        Initialize an empty payload.
+
+        Args:
+            max_size: Maximum number of bytes accepted
+            spool_size: Number of bytes kept in memory before spilling to disk
+        """
+        self.max_size = max_size
+        self.spool_size = spool_size
+        self.size = 0
+        self.head = b""
+        self.__sha256 = hashlib.sha256()
+        self.__buffer = io.BytesIO()
+        self.__file: Optional[tempfile._TemporaryFileWrapper] = None
+        self.__source_path: Optional[str] = None
+        self.__mapped: Optional[mmap.mmap] = None
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "PDFPayload":
+        """Wrap content that is already fully in memory."""
+        payload = cls(max_size=len(data), spool_size=len(data))
+        payload.write(data)
+        return payload
+
+    @classmethod
+    def from_path(cls, path: str, max_size: int) -> "PDFPayload":
+        """
+        Map a local file into memory and hash it without copying it.
+
+        The file is read in place: path returns it, so pdftotext opens it
+        directly, and getbuffer returns a view of the mapping.
+
+        Raises:
+            PDFTooLargeError: If the file is larger than max_size
+            OSError: If the file cannot be opened or mapped
+        """
+        payload = cls(max_size=max_size, spool_size=0)
+        with open(path, "rb") as pdf_file:
+            size = os.fstat(pdf_file.fileno()).st_size
+            if size > max_size:
+                raise PDFTooLargeError(
+                    message="PDF exceeds the maximum allowed size",
+                    details={"max_size": max_size, "received": size}
+                )
+            if size:
+                payload.__mapped = mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ)
+                payload.__sha256.update(payload.__mapped)
+                payload.head = payload.__mapped[:len(cls.MAGIC)]
+        payload.size = size
+        payload.__source_path = path
+        return payload
+
+    def write(self, chunk: bytes) -> None:
+        """
+        Append a chunk of content.
+
+        Raises:
+            PDFTooLargeError: If the content grows beyond max_size
+        """
+        if self.size + len(chunk) > self.max_size:
+            raise PDFTooLargeError(
+                message="PDF exceeds the maximum allowed size",
+                details={"max_size": self.max_size, "received": self.size + len(chunk)}
+            )
+        if len(self.head) < len(self.MAGIC):
+            self.head = (self.head + chunk[:len(self.MAGIC)])[:len(self.MAGIC)]
+        self.__sha256.update(chunk)
+        self.size += len(chunk)
+
+        if self.__file is None and self.size > self.spool_size:
+            self.__file = tempfile.NamedTemporaryFile(suffix=".pdf")
+            self.__file.write(self.__buffer.getbuffer())
+            self.__buffer = io.BytesIO()
+        if self.__file is not None:
+            self.__file.write(chunk)
+        else:
+            self.__buffer.write(chunk)
+
+    def seal(self) -> "PDFPayload":
+        """Flush the content once every chunk has been written."""
+        if self.__file is not None:
+            self.__file.flush()
+        return self
+
+    def looks_like_pdf(self) -> bool:
+        """Tell whether the content starts with the PDF magic bytes."""
+        return self.head == self.MAGIC
+
+    @property
+    def path(self) -> Optional[str]:
+        """Path of the mapped or spooled file, or None while the content is in memory."""
+        if self.__source_path is not None:
+            return self.__source_path
+        return self.__file.name if self.__file is not None else None
+
+    def digest(self) -> "hashlib._Hash":
+        """Return a copy of the running SHA-256 of the content."""
+        return self.__sha256.copy()
+
+    def getbuffer(self) -> Union[memoryview, bytes]:
+        """Return the content without copying it when it is held in memory or mapped."""
+        if self.__mapped is not None:
+            return memoryview(self.__mapped)
+        if self.__source_path is not None:
+            # An empty file is not mapped
+            return b""
+        if self.__file is None:
+            return self.__buffer.getbuffer()
+        with open(self.__file.name, "rb") as spooled:
+            return spooled.read()
+
+    def close(self) -> None:
+        """Discard the content and delete the spooled file, leaving a mapped file in place."""
+        if self.__mapped is not None:
+            try:
+                self.__mapped.close()
+            except BufferError:
+                # A view is still exported, the mapping goes with it
+                pass
+        if self.__file is not None:
+            self.__file.close()
+        self.__buffer = io.BytesIO()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __bytes__(self) -> bytes:
+        return bytes(self.getbuffer())
+
+@contextmanager
+def shared_path(pdf_data: Union[bytes, PDFPayload]) -> Iterator[str]:
+    """
+    Yield a path other local processes, such as pool workers, can open the content at.
+
+    Handing workers a path instead of the bytes avoids pickling the content
+    through their pipe. A mapped or spooled payload is read in place. Other
+    content is written once to an anonymous in-memory file, opened through
+    this process's /proc entry, or to a temporary file where memfd is not
+    available. The path is valid until the context exits.
+    """
+    if isinstance(pdf_data, PDFPayload) and pdf_data.path is not None:
+        yield pdf_data.path
+        return
+
+    data = pdf_data.getbuffer() if isinstance(pdf_data, PDFPayload) else pdf_data
+    if hasattr(os, "memfd_create"):
+        fd = os.memfd_create("pdf")
+        try:
+            with open(fd, "wb", closefd=False) as memory_file:
+                memory_file.write(data)
+            yield f"/proc/{os.getpid()}/fd/{fd}"
+        finally:
+            os.close(fd)
+    else:
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as temp_pdf:
+            temp_pdf.write(data)
+            temp_pdf.flush()
+            yield temp_pdf.name
@@ -0,0 +1,309 @@
+import asyncio
+import importlib.util
+import json
+import zlib
+from abc import ABC, abstractmethod
+from contextlib import suppress
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.config import Settings, get_settings
+
+JSON = "application/json"
+MSGPACK = "application/x-msgpack"
+
+# Media types clients send for msgpack besides MSGPACK
+MSGPACK_ALIASES = ("application/msgpack", "application/vnd.msgpack")
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+def parse_qualities(header: Optional[str]) -> Dict[str, float]:
+    """
+    Parse an Accept or Accept-Encoding header.
+
+    Args:
+        header: Header value, such as "gzip, br;q=0.8"
+
+    Returns:
+        Each lowercase media type or coding mapped to its q-value, 1 when
+        not given and 0 when malformed
+    """
+    qualities: Dict[str, float] = {}
+    for item in (header or "").split(","):
+        value, *params = [part.strip() for part in item.split(";")]
+        if not value:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, number = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        qualities[value.lower()] = quality
+    return qualities
+
+class StreamCompressor(ABC):
+    """Incremental compressor of one response body."""
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk, returning whatever output is ready, possibly nothing."""
+
+    @abstractmethod
+    def flush(self) -> bytes:
+        """Return the output pending so far, so the client can decode everything sent."""
+
+    @abstractmethod
+    def finish(self) -> bytes:
+        """Return the remaining output and end the stream."""
+
+class GzipCompressor(StreamCompressor):
+    def __init__(self, level: int):
+        # wbits 31 writes the gzip header and trailer around the deflate stream
+        self.__compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.__compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.__compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.__compressor.flush()
+
+class ZstdCompressor(StreamCompressor):
+    def __init__(self, level: int):
+        import zstandard
+        self.__flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self.__compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.__compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.__compressor.flush(self.__flush_block)
+
+    def finish(self) -> bytes:
+        return self.__compressor.flush()
+
+class BrotliCompressor(StreamCompressor):
+    def __init__(self, quality: int):
+        import brotli
+        self.__compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.__compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self.__compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.__compressor.finish()
+
+class ResponseEncoder:
+    """
+    Serialize extraction results in the representation the client asks for.
+
+    Results go out as compact JSON, written by orjson when installed, or as
+    msgpack when the Accept header prefers it and msgpack is installed;
+    either way they are serialized as they are, without validating every
+    line against the response models. Bodies of at least `min_size` bytes
+    are compressed with the coding of Accept-Encoding the client prefers,
+    zstd, br then gzip on ties. gzip is always available, zstd and br need
+    the optional zstandard and brotli packages.
+    """
+
+    # Server preference between the codings, best first, with the package each needs
+    CODINGS = (("zstd", "zstandard"), ("br", "brotli"), ("gzip", None))
+
+    # Most chunks of a stream waiting to be compressed together
+    STREAM_QUEUE_SIZE = 1024
+
+    # Bodies at least this large are compressed in a thread, off the event loop
+    THREAD_MIN_SIZE = 256 * 1024
+
+    def __init__(
+        self,
+        min_size: int = 1024,
+        gzip_level: int = 6,
+        zstd_level: int = 3,
+        brotli_quality: int = 4,
+        compression_enabled: bool = True
+    ):
+        """
+        Initialize the encoder.
+
+        Args:
+            min_size: Smallest body, in bytes, worth compressing
+            gzip_level: zlib compression level, 1 to 9
+            zstd_level: zstd compression level, 1 to 22
+            brotli_quality: brotli quality, 0 to 11
+            compression_enabled: Never compress when False
+        """
+        self.min_size = min_size
+        self.compression_enabled = compression_enabled
+        self.__levels = {"gzip": gzip_level, "zstd": zstd_level, "br": brotli_quality}
+        self.__orjson = importlib.import_module("orjson") if _installed("orjson") else None
+        self.__msgpack = importlib.import_module("msgpack") if _installed("msgpack") else None
+
+    @property
+    def codings(self) -> List[str]:
+        """Content codings that can be produced, best first."""
+        return [coding for coding, module in self.CODINGS if module is None or _installed(module)]
+
+    @property
+    def media_types(self) -> List[str]:
+        """Media types that can be produced, JSON first."""
+        return [JSON, MSGPACK] if self.__msgpack is not None else [JSON]
+
+    def negotiate_media_type(self, accept: Optional[str]) -> str:
+        """
+        Choose the media type of a response.
+
+        msgpack is chosen only when the client explicitly gives it a higher
+        q-value than JSON, wildcards included; otherwise, or when msgpack
+        is not installed, the response is JSON.
+
+        Args:
+            accept: Accept header of the request
+
+        Returns:
+            JSON or MSGPACK
+        """
+        if accept is None or self.__msgpack is None:
+            return JSON
+        qualities = parse_qualities(accept)
+        msgpack_quality = max(qualities.get(name, 0.0) for name in (MSGPACK,) + MSGPACK_ALIASES)
+        json_quality = qualities.get(JSON, qualities.get("application/*", qualities.get("*/*", 0.0)))
+        return MSGPACK if msgpack_quality > json_quality else JSON
+
+    def negotiate_coding(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """
+        Choose the content coding of a response.
+
+        Args:
+            accept_encoding: Accept-Encoding header of the request
+
+        Returns:
+            The available coding with the highest q-value, server preference
+            breaking ties, or None for an uncompressed response
+        """
+        if not self.compression_enabled or not accept_encoding:
+            return None
+        qualities = parse_qualities(accept_encoding)
+        if "x-gzip" in qualities:
+            qualities.setdefault("gzip", qualities["x-gzip"])
+        best, best_quality = None, 0.0
+        for coding in self.codings:
+            quality = qualities.get(coding, qualities.get("*", 0.0))
+            if quality > best_quality:
+                best, best_quality = coding, quality
+        if best is not None and qualities.get("identity", 0.0) > best_quality:
+            return None
+        return best
+
+    def dumps_json(self, content: Any) -> bytes:
+        """Serialize to compact UTF-8 JSON, with orjson when installed."""
+        if self.__orjson is not None:
+            return self.__orjson.dumps(content)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def serialize(self, content: Any, media_type: str = JSON) -> bytes:
+        """Serialize content as JSON or msgpack."""
+        if media_type == MSGPACK:
+            return self.__msgpack.packb(content, use_bin_type=True)
+        return self.dumps_json(content)
+
+    def compressor(self, coding: str) -> StreamCompressor:
+        """Create an incremental compressor for gzip, zstd or br."""
+        if coding == "gzip":
+            return GzipCompressor(self.__levels["gzip"])
+        if coding == "zstd":
+            return ZstdCompressor(self.__levels["zstd"])
+        if coding == "br":
+            return BrotliCompressor(self.__levels["br"])
+        raise ValueError(f"Unsupported content coding: {coding}")
+
+    def compress(self, body: bytes, coding: str) -> bytes:
+        """Compress a whole body."""
+        compressor = self.compressor(coding)
+        return compressor.compress(body) + compressor.finish()
+
+    async def compress_async(self, body: bytes, coding: str) -> bytes:
+        """Compress a whole body, in a thread when it is large."""
+        if len(body) >= self.THREAD_MIN_SIZE:
+            return await asyncio.to_thread(self.compress, body, coding)
+        return self.compress(body, coding)
+
+    async def compress_stream(self, chunks: AsyncIterator[bytes], coding: str) -> AsyncIterator[bytes]:
+        """
+        Compress a stream, flushing whenever the source has nothing more ready.
+
+        Flushing after every small chunk, such as an NDJSON line, would
+        cost most of the compression ratio, while holding the output back
+        would stall streaming. The chunks are read ahead into a queue
+        instead, and everything queued is compressed together then flushed
+        once the queue runs dry, so the client decodes each chunk as soon
+        as the source pauses.
+
+        Args:
+            chunks: Asynchronous iterator of the body chunks
+            coding: gzip, zstd or br
+
+        Yields:
+            Compressed chunks of the body
+        """
+        compressor = self.compressor(coding)
+        queue: asyncio.Queue = asyncio.Queue(self.STREAM_QUEUE_SIZE)
+        end = object()
+
+        async def read_ahead() -> None:
+            try:
+                async for chunk in chunks:
+                    await queue.put(chunk)
+                await queue.put(end)
+            except Exception as e:
+                await queue.put(e)
+            finally:
+                if hasattr(chunks, "aclose"):
+                    await chunks.aclose()
+
+        reader = asyncio.ensure_future(read_ahead())
+        try:
+            finished = False
+            while not finished:
+                pending = [await queue.get()]
+                while not queue.empty():
+                    pending.append(queue.get_nowait())
+                output = []
+                for chunk in pending:
+                    if chunk is end:
+                        finished = True
+                        break
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    output.append(compressor.compress(chunk))
+                output.append(compressor.finish() if finished else compressor.flush())
+                yield b"".join(output)
+        finally:
+            reader.cancel()
+            with suppress(asyncio.CancelledError):
+                await reader
+
+def build_response_encoder(settings: Settings) -> ResponseEncoder:
+    """Build the response encoder described by the settings."""
+    return ResponseEncoder(
+        settings.response_compression_min_size,
+        settings.response_gzip_level,
+        settings.response_zstd_level,
+        settings.response_brotli_quality,
+        settings.response_compression_enabled
+    )
+
+@lru_cache()
+def get_response_encoder() -> ResponseEncoder:
+    """Get the application-wide response encoder."""
+    return build_response_encoder(get_settings())
@@ -0,0 +1,254 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from app.config import Settings, get_settings
+from app.core.pdf_payload import PDFPayload
+
+class CacheBackend(ABC):
+    """Storage tier of the extraction result cache."""
+
+    def __init__(self):
+        self.evictions = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[List[str]]:
+        """Return the cached lines for the key, or None when absent or expired."""
+
+    @abstractmethod
+    def set(self, key: str, lines: List[str]) -> None:
+        """Store the lines for the key, evicting older entries when full."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of live entries."""
+
+    def close(self) -> None:
+        """Release resources held by the backend."""
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU tier with an entry limit and a time-to-live."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.__entries: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            expires_at, lines = entry
+            if expires_at <= time.monotonic():
+                del self.__entries[key]
+                self.evictions += 1
+                return None
+            self.__entries.move_to_end(key)
+            return lines
+
+    def set(self, key: str, lines: List[str]) -> None:
+        with self.__lock:
+            self.__entries[key] = (time.monotonic() + self.ttl, lines)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    On-disk tier surviving restarts, evicting least recently used entries.
+
+    Reads only record their access time in memory; the times are written
+    with the next write, or once ACCESS_BATCH_SIZE reads are pending, so
+    a hit costs no commit.
+    """
+
+    # Most access times kept pending before reads write them
+    ACCESS_BATCH_SIZE = 256
+
+    def __init__(self, path: str, max_entries: int, ttl: float):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.__accessed: Dict[str, float] = {}
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS extraction_results ("
+            " key TEXT PRIMARY KEY, lines TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.__connection.commit()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        now = time.time()
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT lines, expires_at FROM extraction_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self.__connection.execute("DELETE FROM extraction_results WHERE key = ?", (key,))
+                self.__connection.commit()
+                self.evictions += 1
+                return None
+            self.__accessed[key] = now
+            if len(self.__accessed) >= self.ACCESS_BATCH_SIZE:
+                self.__write_access_times()
+                self.__connection.commit()
+            return json.loads(row[0])
+
+    def set(self, key: str, lines: List[str]) -> None:
+        now = time.time()
+        with self.__lock:
+            self.__write_access_times()
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO extraction_results VALUES (?, ?, ?, ?)",
+                (key, json.dumps(lines), now + self.ttl, now)
+            )
+            overflow = self.__connection.execute(
+                "SELECT COUNT(*) FROM extraction_results"
+            ).fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self.__connection.execute(
+                    "DELETE FROM extraction_results WHERE key IN ("
+                    " SELECT key FROM extraction_results ORDER BY accessed_at LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+            self.__connection.commit()
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return self.__connection.execute(
+                "SELECT COUNT(*) FROM extraction_results"
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__write_access_times()
+            self.__connection.commit()
+            self.__connection.close()
+
+    def __write_access_times(self) -> None:
+        """Write the pending access times, the caller holding the lock and committing."""
+        if self.__accessed:
+            self.__connection.executemany(
+                "UPDATE extraction_results SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self.__accessed.items()]
+            )
+            self.__accessed.clear()
+
+class ResultCache:
+    """
+    Content-addressed cache of extraction results.
+
+    Entries are keyed by the SHA-256 of the PDF bytes and the extractor
+    options, looked up in the memory tier first and then in the optional
+    disk tier, which promotes hits back into memory.
+    """
+
+    def __init__(self, memory: CacheBackend, disk: Optional[CacheBackend] = None):
+        self.memory = memory
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(pdf_data: Union[bytes, PDFPayload], options: Dict[str, Any]) -> str:
+        """Build the cache key from the PDF content and the extractor options."""
+        if isinstance(pdf_data, PDFPayload):
+            digest = pdf_data.digest()
+        else:
+            digest = hashlib.sha256(pdf_data)
+        digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """Return a copy of the cached lines, or None on a miss."""
+        lines = self.memory.get(key)
+        if lines is None and self.disk is not None:
+            lines = self.disk.get(key)
+            if lines is not None:
+                self.memory.set(key, lines)
+        if lines is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return list(lines)
+
+    def set(self, key: str, lines: List[str]) -> None:
+        """Store the lines in every tier."""
+        self.memory.set(key, list(lines))
+        if self.disk is not None:
+            self.disk.set(key, lines)
+
+    async def get_async(self, key: str) -> Optional[List[str]]:
+        """Like get, reading the disk tier in a thread, off the event loop."""
+        lines = self.memory.get(key)
+        if lines is None and self.disk is not None:
+            lines = await asyncio.to_thread(self.disk.get, key)
+            if lines is not None:
+                self.memory.set(key, lines)
+        if lines is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return list(lines)
+
+    async def set_async(self, key: str, lines: List[str]) -> None:
+        """Like set, writing the disk tier in a thread, off the event loop."""
+        self.memory.set(key, list(lines))
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, lines)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss and eviction counters and the tier sizes."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.memory.evictions + (self.disk.evictions if self.disk else 0),
+            "memory_entries": len(self.memory),
+            "disk_entries": len(self.disk) if self.disk is not None else 0,
+        }
+
+    def close(self) -> None:
+        """Release the storage tiers."""
+        self.memory.close()
+        if self.disk is not None:
+            self.disk.close()
+
+def build_result_cache(settings: Settings) -> Optional[ResultCache]:
+    """Build the result cache described by the settings, or None when disabled."""
+    if not settings.result_cache_enabled:
+        return None
+    disk = None
+    if settings.result_cache_path:
+        disk = SQLiteCacheBackend(
+            settings.result_cache_path,
+            settings.result_cache_disk_max_entries,
+            settings.result_cache_ttl
+        )
+    return ResultCache(
+        MemoryCacheBackend(settings.result_cache_max_entries, settings.result_cache_ttl),
+        disk
+    )
+
+@lru_cache()
+def get_result_cache() -> Optional[ResultCache]:
+    """Get the application-wide result cache."""
+    return build_result_cache(get_settings())
@@ -0,0 +1,70 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """
+    Share one in-flight call between concurrent callers asking for the same key.
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it runs await the same task and get its result or exception. The
+    task is shielded, so a caller being cancelled does not cancel the call
+    for the others, but it is cancelled once every caller has gone.
+    """
+
+    def __init__(self):
+        self.executions = 0
+        self.coalesced = 0
+        self.__calls: Dict[Hashable, asyncio.Future] = {}
+        self.__waiters: Dict[asyncio.Future, int] = {}
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await the in-flight call for the key, starting it when there is none.
+
+        Args:
+            key: Identifies calls producing the same result
+            call: Coroutine function started when no call for the key is in flight
+
+        Returns:
+            The result of the shared call
+
+        Raises:
+            Whatever the shared call raises
+        """
+        future = self.__calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self.__calls[key] = future
+            future.add_done_callback(lambda done: self.__finish(key, done))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        self.__waiters[future] = self.__waiters.get(future, 0) + 1
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self.__waiters[future] -= 1
+            if not self.__waiters[future]:
+                del self.__waiters[future]
+                if not future.done():
+                    # No caller is left to use the result; callers arriving while it
+                    # is being cancelled start a new call rather than join this one
+                    if self.__calls.get(key) is future:
+                        del self.__calls[key]
+                    future.cancel()
+
+    def __finish(self, key: Hashable, future: asyncio.Future) -> None:
+        if self.__calls.get(key) is future:
+            del self.__calls[key]
+        if not future.cancelled():
+            # Mark the exception retrieved when every caller was cancelled
+            future.exception()
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of calls executed, callers coalesced and calls in flight."""
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.__calls),
+        }
@@ -0,0 +1,306 @@
+import asyncio
+import datetime
+import fnmatch
+import hashlib
+import hmac
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import quote, unquote, urlsplit
+from urllib.request import pathname2url, url2pathname
+from app.config import Settings
+from app.core.pdf_fetcher import PDFFetcher
+from app.core.pdf_payload import PDFPayload
+from app.exceptions import PDFInvalidContentTypeError, PDFInvalidURLError, PDFNetworkError
+
+class SourceAdapter(ABC):
+    """Reads the PDFs behind the URLs of one or more schemes."""
+
+    schemes: Tuple[str, ...] = ()
+
+    @abstractmethod
+    def fetch(self, url: str) -> Union[bytes, PDFPayload]:
+        """Return the PDF content behind the URL."""
+
+    @abstractmethod
+    async def fetch_async(self, url: str) -> Union[bytes, PDFPayload]:
+        """Return the PDF content behind the URL without blocking the event loop."""
+
+class HTTPSourceAdapter(SourceAdapter):
+    """Download http:// and https:// URLs with the PDFFetcher."""
+
+    schemes = ("http", "https")
+
+    def __init__(self, pdf_fetcher: PDFFetcher):
+        self.pdf_fetcher = pdf_fetcher
+
+    def fetch(self, url: str) -> Union[bytes, PDFPayload]:
+        return self.pdf_fetcher.fetch_pdf(url)
+
+    async def fetch_async(self, url: str) -> Union[bytes, PDFPayload]:
+        return await self.pdf_fetcher.fetch_pdf_async(url)
+
+class FileSourceAdapter(SourceAdapter):
+    """
+    Read file:// URLs from the local filesystem.
+
+    Files are memory-mapped rather than copied and handed to pdftotext by
+    path. Only files below one of `allowed_roots`, symbolic links resolved,
+    can be read.
+    """
+
+    schemes = ("file",)
+
+    def __init__(self, allowed_roots: List[str], max_size: int):
+        """
+        Initialize the adapter.
+
+        Args:
+            allowed_roots: Directories files may be read from, none when empty
+            max_size: Largest file accepted, in bytes
+        """
+        self.allowed_roots = [os.path.realpath(root) for root in allowed_roots]
+        self.max_size = max_size
+
+    def fetch(self, url: str) -> PDFPayload:
+        """
+        Map the file behind a file:// URL.
+
+        Raises:
+            PDFInvalidURLError: If the URL is malformed or outside the allowed roots
+            PDFNetworkError: If the file cannot be read
+            PDFInvalidContentTypeError: If the file is not a PDF
+            PDFTooLargeError: If the file exceeds the maximum size
+        """
+        path = self.resolve(url)
+        try:
+            payload = PDFPayload.from_path(path, self.max_size)
+        except OSError as e:
+            raise PDFNetworkError(
+                message="Failed to read PDF",
+                details={"url": url, "error": str(e)}
+            )
+        if not payload.looks_like_pdf():
+            payload.close()
+            raise PDFInvalidContentTypeError(
+                message="Content is not a PDF",
+                details={"url": url, "head": payload.head.hex(), "expected": PDFPayload.MAGIC.decode()}
+            )
+        return payload
+
+    async def fetch_async(self, url: str) -> PDFPayload:
+        # Hashing a large file takes a while, keep it off the event loop
+        return await asyncio.to_thread(self.fetch, url)
+
+    def list_documents(self, directory: str, pattern: str = "*.pdf") -> List[str]:
+        """
+        Return the file:// URLs of the files matching the pattern below a directory.
+
+        Args:
+            directory: Directory path or file:// URL, below an allowed root
+            pattern: Shell-style pattern the file names must match, case-insensitive
+
+        Returns:
+            URLs sorted by path
+
+        Raises:
+            PDFInvalidURLError: If the directory is outside the allowed roots
+        """
+        root = self.resolve(directory if "://" in directory else self.to_url(directory))
+        pattern = pattern.lower()
+        paths = []
+        for parent, directories, files in os.walk(root):
+            directories.sort()
+            paths.extend(
+                os.path.join(parent, name) for name in sorted(files) if fnmatch.fnmatch(name.lower(), pattern)
+            )
+        return [self.to_url(path) for path in paths]
+
+    def resolve(self, url: str) -> str:
+        """
+        Return the real path behind a file:// URL.
+
+        Raises:
+            PDFInvalidURLError: If the URL is malformed or outside the allowed roots
+        """
+        parts = urlsplit(url)
+        if parts.scheme != "file" or parts.netloc not in ("", "localhost") or not parts.path:
+            raise PDFInvalidURLError(
+                message="Invalid file URL",
+                details={"url": url, "error": "Expected file:///absolute/path"}
+            )
+        path = os.path.realpath(url2pathname(unquote(parts.path)))
+        if not any(os.path.commonpath([root, path]) == root for root in self.allowed_roots):
+            raise PDFInvalidURLError(
+                message="File URL outside the allowed roots",
+                details={"url": url, "allowed_roots": self.allowed_roots}
+            )
+        return path
+
+    @staticmethod
+    def to_url(path: str) -> str:
+        """Return the file:// URL of a local path."""
+        return "file://" + pathname2url(os.path.abspath(path))
+
+class S3SourceAdapter(SourceAdapter):
+    """
+    Download s3://bucket/key URLs from an S3-compatible object store.
+
+    Objects are fetched over HTTP with the PDFFetcher, path-style from
+    `endpoint_url`, so they get its streaming, limits and revalidation.
+    Requests are signed with AWS Signature Version 4 when credentials are
+    given and anonymous otherwise.
+    """
+
+    schemes = ("s3",)
+
+    # Hash of the empty body of a GET request
+    EMPTY_PAYLOAD_SHA256 = hashlib.sha256(b"").hexdigest()
+
+    def __init__(
+        self,
+        pdf_fetcher: PDFFetcher,
+        endpoint_url: str,
+        region: str = "us-east-1",
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None
+    ):
+        """
+        Initialize the adapter.
+
+        Args:
+            pdf_fetcher: Fetcher downloading the objects
+            endpoint_url: Base URL of the object store, e.g. https://s3.eu-west-1.amazonaws.com
+            region: Region the requests are signed for
+            access_key_id: Access key, anonymous requests when None
+            secret_access_key: Secret of the access key
+        """
+        self.pdf_fetcher = pdf_fetcher
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.region = region
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+
+    def fetch(self, url: str) -> Union[bytes, PDFPayload]:
+        object_url = self.object_url(url)
+        return self.pdf_fetcher.fetch_pdf(object_url, headers=self.sign("GET", object_url))
+
+    async def fetch_async(self, url: str) -> Union[bytes, PDFPayload]:
+        object_url = self.object_url(url)
+        return await self.pdf_fetcher.fetch_pdf_async(object_url, headers=self.sign("GET", object_url))
+
+    def object_url(self, url: str) -> str:
+        """
+        Return the HTTP URL of the object behind an s3:// URL.
+
+        Raises:
+            PDFInvalidURLError: If the URL has no bucket or key
+        """
+        parts = urlsplit(url)
+        key = parts.path.lstrip("/")
+        if parts.scheme != "s3" or not parts.netloc or not key:
+            raise PDFInvalidURLError(
+                message="Invalid S3 URL",
+                details={"url": url, "error": "Expected s3://bucket/key"}
+            )
+        return f"{self.endpoint_url}/{parts.netloc}/{quote(unquote(key), safe='/~')}"
+
+    def sign(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        now: Optional[datetime.datetime] = None
+    ) -> Dict[str, str]:
+        """
+        Return the headers authenticating a bodiless request with Signature Version 4.
+
+        Args:
+            method: HTTP method
+            url: Full URL of the request, its path already percent-encoded
+            headers: Other headers to sign, sent along with the returned ones
+            now: Time of the request, defaults to the current time
+
+        Returns:
+            The headers to send, empty for anonymous requests
+        """
+        if not self.access_key_id:
+            return dict(headers or {})
+
+        parts = urlsplit(url)
+        amz_date = (now or datetime.datetime.now(datetime.timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+        signed = {name.lower(): value.strip() for name, value in (headers or {}).items()}
+        signed.update({
+            "host": parts.netloc,
+            "x-amz-content-sha256": self.EMPTY_PAYLOAD_SHA256,
+            "x-amz-date": amz_date
+        })
+        names = sorted(signed)
+        query = "&".join(sorted(parts.query.split("&"))) if parts.query else ""
+        canonical_request = "\n".join([
+            method,
+            parts.path or "/",
+            query,
+            "".join(f"{name}:{signed[name]}\n" for name in names),
+            ";".join(names),
+            self.EMPTY_PAYLOAD_SHA256
+        ])
+        scope = f"{amz_date[:8]}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest()
+        ])
+
+        key = ("AWS4" + (self.secret_access_key or "")).encode()
+        for part in (amz_date[:8], self.region, "s3", "aws4_request"):
+            key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+        signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+        request_headers = {name: value for name, value in signed.items() if name != "host"}
+        request_headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{scope}, "
+            f"SignedHeaders={';'.join(names)}, Signature={signature}"
+        )
+        return request_headers
+
+class SourceAdapters:
+    """Route each document URL to the adapter of its scheme."""
+
+    def __init__(self, adapters: List[SourceAdapter], default: SourceAdapter):
+        """
+        Initialize the routing.
+
+        Args:
+            adapters: Enabled adapters
+            default: Adapter of URLs whose scheme no adapter handles, rejecting invalid URLs
+        """
+        self.default = default
+        self.__by_scheme = {scheme: adapter for adapter in adapters for scheme in adapter.schemes}
+
+    def adapter(self, url: str) -> SourceAdapter:
+        """Return the adapter reading the URL."""
+        scheme, separator, _ = url.partition("://")
+        return self.__by_scheme.get(scheme.lower(), self.default) if separator else self.default
+
+    def fetch(self, url: str) -> Union[bytes, PDFPayload]:
+        """Return the PDF content behind the URL, see the adapters for the exceptions raised."""
+        return self.adapter(url).fetch(url)
+
+    async def fetch_async(self, url: str) -> Union[bytes, PDFPayload]:
+        """Return the PDF content behind the URL without blocking the event loop."""
+        return await self.adapter(url).fetch_async(url)
+
+def build_source_adapters(settings: Settings, pdf_fetcher: PDFFetcher) -> SourceAdapters:
+    """Build the adapters enabled by the settings; HTTP is always enabled."""
+    http = HTTPSourceAdapter(pdf_fetcher)
+    adapters: List[SourceAdapter] = [http]
+    if settings.source_allowed_roots:
+        adapters.append(FileSourceAdapter(settings.source_allowed_roots, settings.fetch_max_size))
+    if settings.s3_endpoint_url:
+        adapters.append(S3SourceAdapter(
+            pdf_fetcher,
+            settings.s3_endpoint_url,
+            settings.s3_region,
+            settings.s3_access_key_id,
+            settings.s3_secret_access_key
+        ))
+    return SourceAdapters(adapters, default=http)
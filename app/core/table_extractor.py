@@ -0,0 +1,145 @@
+import io
+import xml.etree.ElementTree as ElementTree
+from bisect import bisect_right
+from typing import List, Tuple
+from app.exceptions import EmptyTextError, TextParsingError
+
+# A word of pdftotext -bbox-layout output: x_min, y_min, x_max, y_max and its text
+Word = Tuple[float, float, float, float, str]
+
+class TableExtractor:
+    """
+    Rebuild the rows and columns of tabular pages from pdftotext -bbox-layout output.
+
+    Words are grouped into rows by their vertical centre, and the words of a
+    row into cells wherever the gap between two words is wider than
+    `cell_gap` times the text height. The columns of a page are the
+    horizontal spans covered by the cells of its fullest rows, so titles and
+    sparse rows do not merge columns. Rows above the table with fewer than
+    half its columns, such as titles, are kept as its caption.
+    """
+
+    def __init__(self, cell_gap: float = 0.8):
+        """
+        Initialize the extractor.
+
+        Args:
+            cell_gap: Gap between two words, relative to the text height,
+                above which they belong to different cells
+        """
+        self.cell_gap = cell_gap
+
+    def extract_tables(self, bbox_html: str, first_page: int = 1) -> List[dict]:
+        """
+        Build one table per non-empty page.
+
+        Args:
+            bbox_html: XHTML written by pdftotext -bbox-layout
+            first_page: Number of the first page of the output, 1-based
+
+        Returns:
+            List of tables, dicts with the page number, caption lines, header
+            cells and rows of cells, every row having one cell per column
+
+        Raises:
+            EmptyTextError: If no page has any word
+            TextParsingError: If the output cannot be parsed
+        """
+        pages = self.parse_words(bbox_html)
+        tables = [self.build_table(page, words) for page, words in enumerate(pages, first_page) if words]
+        if not tables:
+            raise EmptyTextError(
+                message="No words found in document",
+                details={"page_count": len(pages)}
+            )
+        return tables
+
+    def parse_words(self, bbox_html: str) -> List[List[Word]]:
+        """
+        Return the words of each page of pdftotext -bbox-layout output.
+
+        Raises:
+            TextParsingError: If the output is not well-formed or a word has no valid box
+        """
+        pages: List[List[Word]] = []
+        words: List[Word] = []
+        try:
+            for _, element in ElementTree.iterparse(io.StringIO(bbox_html)):
+                tag = element.tag.rpartition("}")[2]
+                if tag == "word":
+                    words.append((
+                        float(element.get("xMin")), float(element.get("yMin")),
+                        float(element.get("xMax")), float(element.get("yMax")),
+                        element.text or ""
+                    ))
+                elif tag == "page":
+                    pages.append(words)
+                    words = []
+                    element.clear()
+        except (ElementTree.ParseError, TypeError, ValueError) as e:
+            raise TextParsingError(
+                message="Invalid bounding box output",
+                details={"error": str(e)}
+            )
+        return pages
+
+    def build_table(self, page: int, words: List[Word]) -> dict:
+        """Rebuild the caption, header and rows of one page from its words."""
+        rows = self.group_rows(words)
+        columns = self.find_columns(rows)
+        starts = [start for start, _ in columns]
+
+        caption: List[str] = []
+        grid: List[List[str]] = []
+        for row in rows:
+            if not grid and len(columns) > 1 and (len(row) == 1 or len(row) * 2 < len(columns)):
+                caption.append(" ".join(text for _, _, text in row))
+                continue
+            cells = [""] * len(columns)
+            for x_min, x_max, text in row:
+                index = max(bisect_right(starts, (x_min + x_max) / 2) - 1, 0)
+                cells[index] = f"{cells[index]} {text}" if cells[index] else text
+            grid.append(cells)
+
+        return {"page": page, "caption": caption, "header": grid[0] if grid else [], "rows": grid[1:]}
+
+    def group_rows(self, words: List[Word]) -> List[List[Tuple[float, float, str]]]:
+        """Group words into rows, top to bottom, of cells (x_min, x_max, text), left to right."""
+        rows: List[List[Word]] = []
+        row_centre = row_height = 0.0
+        for word in sorted(words, key=lambda word: (word[1] + word[3], word[0])):
+            centre = (word[1] + word[3]) / 2
+            if rows and abs(centre - row_centre) <= row_height / 2:
+                rows[-1].append(word)
+            else:
+                rows.append([word])
+                row_centre = centre
+                row_height = word[3] - word[1]
+
+        cell_rows = []
+        for row in rows:
+            row.sort()
+            height = max(word[3] - word[1] for word in row)
+            cells = [[row[0][0], row[0][2], row[0][4]]]
+            for x_min, _, x_max, _, text in row[1:]:
+                cell = cells[-1]
+                if x_min - cell[1] > self.cell_gap * height:
+                    cells.append([x_min, x_max, text])
+                else:
+                    cell[1] = max(cell[1], x_max)
+                    cell[2] = f"{cell[2]} {text}"
+            cell_rows.append([tuple(cell) for cell in cells])
+        return cell_rows
+
+    def find_columns(self, rows: List[List[Tuple[float, float, str]]]) -> List[List[float]]:
+        """Return the spans [x_min, x_max] of the columns, left to right."""
+        fullest = max(len(row) for row in rows)
+        cells = [cell for row in rows if len(row) == fullest for cell in row]
+
+        columns: List[List[float]] = []
+        for x_min, x_max, _ in sorted(cells):
+            if columns and x_min <= columns[-1][1]:
+                columns[-1][1] = max(columns[-1][1], x_max)
+            else:
+                columns.append([x_min, x_max])
+        return columns
@@ -1,37 +1,222 @@
-from typing import List
+import re
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List, Tuple, Union
 from app.exceptions import EmptyTextError, TextParsingError
 
+# A formatted line: its text, its column cells, or either with its position
+FormattedLine = Union[str, List[str], dict]
+
+class LineLocator:
+    """Track the page and line number of raw pdftotext output lines fed one at a time."""
+
+    __slots__ = ("page", "line")
+
+    def __init__(self):
+        self.page = 1
+        self.line = 0
+
+    def feed(self, raw_line: str) -> Iterator[Tuple[int, int, str]]:
+        """
+        Yield the 1-based page, line number and stripped text of the
+        non-empty parts of a raw line, moving to the next page at each form
+        feed pdftotext writes between pages.
+        """
+        if "\f" in raw_line:
+            *page_ends, raw_line = raw_line.split("\f")
+            for page_end in page_ends:
+                self.line += 1
+                page_end = page_end.strip()
+                if page_end:
+                    yield self.page, self.line, page_end
+                self.page += 1
+                self.line = 0
+        self.line += 1
+        text = raw_line.strip()
+        if text:
+            yield self.page, self.line, text
+
 class TextLineFormatter:
-    """Format extracted text into a list of non-empty lines."""
-    
-    def format_text(self, text: str) -> List[str]:
+    """
+    Format extracted text into a list of non-empty lines.
+
+    Lines are stripped and blank ones dropped in a single pass. Optionally
+    each line is split into the column cells laid out by pdftotext -layout,
+    separated by gutters of at least `column_gap` spaces, and/or returned
+    with its page and line number in pdftotext's output.
+    """
+
+    def __init__(self, column_gap: int = 2):
+        """
+        Initialize the formatter.
+
+        Args:
+            column_gap: Spaces separating two column cells, a tab always does
+        """
+        self.column_gap = column_gap
+        # A cell is a run of words separated by fewer spaces than a gutter
+        joiner = f"(?: {{1,{column_gap - 1}}}[^ \t]+)*" if column_gap > 1 else ""
+        self.__cell = re.compile(f"[^ \t]+{joiner}")
+
+    def format_text(self, text: str, columns: bool = False, offsets: bool = False) -> List[FormattedLine]:
         """
         Format extracted text into a list of non-empty lines.
-        
+
         Args:
             text: Raw text to format
-            
+            columns: Return each line as its list of column cells
+            offsets: Return each line as a dict with its page and line number
+                and its text, or its cells when columns is set
+
         Returns:
             List of non-empty text lines
-            
+
         Raises:
             EmptyTextError: If the input text is empty
             TextParsingError: If there's an error parsing the text
         """
-        if not text:
+        self.__check_not_empty(text)
+
+        if columns or offsets:
+            lines = list(self.iter_format(text.split("\n"), columns, offsets))
+        else:
+            # splitlines also breaks at the form feeds between pages
+            lines = list(filter(None, map(str.strip, text.splitlines())))
+
+        if not lines:
             raise EmptyTextError(
-                message="Empty text input",
-                details={"text": text}
+                message="No non-empty lines found in text",
+                details={"text": text, "line_count": len(text.splitlines())}
             )
-            
-        # Split text into lines and filter out empty ones
-        lines = [line.strip() for line in text.splitlines()]
-        non_empty_lines = [line for line in lines if line]
-        
-        if not non_empty_lines:
+
+        return lines
+
+    def format_pages(self, text: str, columns: bool = False, offsets: bool = False) -> List[List[FormattedLine]]:
+        """
+        Format extracted text into pages of non-empty lines.
+
+        Pages are delimited by the form feeds pdftotext writes after each page.
+
+        Args:
+            text: Raw text to format
+            columns: Return each line as its list of column cells
+            offsets: Return each line as a dict with its page and line number
+
+        Returns:
+            List of pages, each a list of non-empty text lines
+
+        Raises:
+            EmptyTextError: If the input text is empty or has no non-empty line
+        """
+        self.__check_not_empty(text)
+
+        raw_pages = text.split("\f")
+        if len(raw_pages) > 1 and not raw_pages[-1].strip():
+            raw_pages.pop()
+
+        if columns or offsets:
+            pages: List[List[FormattedLine]] = [[] for _ in raw_pages]
+            locator = LineLocator()
+            for raw_line in text.split("\n"):
+                for page, line, content in locator.feed(raw_line):
+                    pages[page - 1].append(self.__format_line(page, line, content, columns, offsets))
+        else:
+            pages = [list(filter(None, map(str.strip, page.splitlines()))) for page in raw_pages]
+
+        if not any(pages):
             raise EmptyTextError(
                 message="No non-empty lines found in text",
-                details={"text": text, "line_count": len(lines)}
+                details={"text": text, "page_count": len(pages)}
+            )
+
+        return pages
+
+    def iter_format(
+        self,
+        raw_lines: Iterable[str],
+        columns: bool = False,
+        offsets: bool = False
+    ) -> Iterator[FormattedLine]:
+        """
+        Format raw lines lazily, one at a time.
+
+        Args:
+            raw_lines: Lines of pdftotext's output without their line terminator
+            columns: Return each line as its list of column cells
+            offsets: Return each line as a dict with its page and line number
+
+        Returns:
+            Iterator of formatted non-empty lines
+        """
+        if not (columns or offsets):
+            return filter(None, map(str.strip, raw_lines))
+        return self.__iter_located(raw_lines, columns, offsets)
+
+    async def aiter_format(
+        self,
+        lines: AsyncIterable[str],
+        columns: bool = False,
+        offsets: bool = False
+    ) -> AsyncIterator[FormattedLine]:
+        """
+        Strip and filter lines as they are produced, without buffering them.
+
+        Args:
+            lines: Raw text lines, e.g. streamed from pdftotext's stdout
+            columns: Yield each line as its list of column cells
+            offsets: Yield each line as a dict with its page and line number
+
+        Yields:
+            Non-empty text lines
+
+        Raises:
+            EmptyTextError: If no non-empty line was produced
+        """
+        line_count = 0
+        non_empty_count = 0
+        locator = LineLocator()
+        async for line in lines:
+            line_count += 1
+            if columns or offsets:
+                for page, number, content in locator.feed(line):
+                    non_empty_count += 1
+                    yield self.__format_line(page, number, content, columns, offsets)
+            else:
+                line = line.strip()
+                if line:
+                    non_empty_count += 1
+                    yield line
+
+        if not non_empty_count:
+            raise EmptyTextError(
+                message="No non-empty lines found in text",
+                details={"line_count": line_count}
+            )
+
+    def split_columns(self, line: str) -> List[str]:
+        """Split a line at its column gutters into the text of its cells."""
+        return self.__cell.findall(line)
+
+    def __iter_located(self, raw_lines: Iterable[str], columns: bool, offsets: bool) -> Iterator[FormattedLine]:
+        locator = LineLocator()
+        for raw_line in raw_lines:
+            if "\f" in raw_line:
+                for page, line, content in locator.feed(raw_line):
+                    yield self.__format_line(page, line, content, columns, offsets)
+                continue
+            # Inlined LineLocator.feed for the lines without a form feed
+            locator.line += 1
+            content = raw_line.strip()
+            if content:
+                yield self.__format_line(locator.page, locator.line, content, columns, offsets)
+
+    def __format_line(self, page: int, line: int, text: str, columns: bool, offsets: bool) -> FormattedLine:
+        content = self.split_columns(text) if columns else text
+        if not offsets:
+            return content
+        return {"page": page, "line": line, "cells" if columns else "text": content}
+
+    def __check_not_empty(self, text: str) -> None:
+        if not text:
+            raise EmptyTextError(
+                message="Empty text input",
+                details={"text": text}
             )
-            
-        return non_empty_lines 
\ No newline at end of file
@@ -0,0 +1,164 @@
+import asyncio
+import inspect
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import Settings
+from app.core.http_client import HTTPClientPool
+from app.core.ocr_processor import OCRProcessor
+from app.core.worker_pool import WorkerPool
+from app.exceptions import PDFProcessingError
+
+class _StepFailed(Exception):
+    """A required warm-up step failed, the following ones are skipped."""
+
+class WarmUp:
+    """
+    One-time startup work that readiness waits for.
+
+    The pipeline is built lazily, so without warm-up the first request pays
+    for creating the HTTP client, building the controller, forking the
+    workers and loading pdftotext or pdfium. Warm-up does all of it once,
+    in the background so liveness is answered meanwhile, then extracts a
+    one-page document with the configured engine, once per worker when
+    extractions run in the worker pool. The service is ready once every
+    required step succeeded.
+    """
+
+    # One-page PDF reading "warm-up"
+    DOCUMENT = (
+        b"%PDF-1.4\n"
+        b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n"
+        b"2 0 obj\n<< /Type /Pages /Kids [3 0 R] /Count 1 >>\nendobj\n"
+        b"3 0 obj\n<< /Type /Page /Parent 2 0 R /MediaBox [0 0 200 50] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>\nendobj\n"
+        b"4 0 obj\n<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>\nendobj\n"
+        b"5 0 obj\n<< /Length 37 >>\nstream\nBT /F1 12 Tf 10 20 Td (warm-up) Tj ET\nendstream\nendobj\n"
+        b"xref\n0 6\n"
+        b"0000000000 65535 f \n"
+        b"0000000009 00000 n \n"
+        b"0000000058 00000 n \n"
+        b"0000000115 00000 n \n"
+        b"0000000240 00000 n \n"
+        b"0000000310 00000 n \n"
+        b"trailer\n<< /Size 6 /Root 1 0 R >>\nstartxref\n397\n%%EOF\n"
+    )
+
+    def __init__(self):
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        """Warm-up finished, successfully or not, or was skipped."""
+        return self.finished_at is not None
+
+    @property
+    def ready(self) -> bool:
+        """Warm-up finished and every required step succeeded."""
+        return self.done and not self.failures()
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Seconds the warm-up took, None until it is done."""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def failures(self) -> List[str]:
+        """Return the required steps that failed."""
+        return [name for name, step in self.steps.items() if step["required"] and not step["ok"]]
+
+    def skip(self) -> None:
+        """Report ready at once, leaving everything to start on first use."""
+        self.started_at = self.finished_at = time.perf_counter()
+
+    async def run(
+        self,
+        settings: Settings,
+        http_pool: HTTPClientPool,
+        build_controller: Callable[[], Any],
+        worker_pool: Optional[WorkerPool] = None
+    ) -> bool:
+        """
+        Warm the pipeline up, within settings.warmup_timeout.
+
+        Steps run in order and stop at the first required one that fails.
+        pdftotext is only required when it is the extraction engine.
+
+        Args:
+            settings: Settings selecting the engine and the timeout
+            http_pool: Shared HTTP client pool to open
+            build_controller: Returns the shared endpoint controller, building it
+            worker_pool: Pool extractions run in, None when pdftotext is spawned directly
+
+        Returns:
+            Whether the service is ready
+        """
+        self.steps.clear()
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        ocr_processor = OCRProcessor()
+        try:
+            async with asyncio.timeout(settings.warmup_timeout):
+                await self.__step("http_pool", True, http_pool.start)
+                await self.__step("controller", True, build_controller)
+                await self.__step(
+                    "pdftotext", settings.ocr_engine == "pdftotext", ocr_processor.tool_version_async
+                )
+                if worker_pool is not None:
+                    await self.__step("workers", True, asyncio.to_thread, worker_pool.start)
+                await self.__step("extraction", True, self.__extract, ocr_processor, worker_pool is not None)
+        except _StepFailed:
+            pass
+        except TimeoutError:
+            for step in self.steps.values():
+                if not step["ok"] and "error" not in step:
+                    step["error"] = f"Warm-up timed out after {settings.warmup_timeout}s"
+        finally:
+            self.finished_at = time.perf_counter()
+        return self.ready
+
+    def status(self) -> Dict[str, Any]:
+        """Return the readiness, the warm-up duration and the outcome of each step."""
+        duration = self.duration
+        return {
+            "ready": self.ready,
+            "warm_up_ms": round(duration * 1000, 1) if duration is not None else None,
+            "steps": {name: dict(step) for name, step in self.steps.items()},
+        }
+
+    async def __extract(self, ocr_processor: OCRProcessor, in_workers: bool) -> str:
+        if not in_workers:
+            return (await ocr_processor.extract_text_async(self.DOCUMENT)).strip()
+        # The document is sent to each worker in turn, so every one has loaded the engine
+        texts = await ocr_processor.warm_up_workers_async(self.DOCUMENT)
+        return texts[0].strip()
+
+    async def __step(self, name: str, required: bool, function: Callable[..., Any], *args) -> Any:
+        step: Dict[str, Any] = {"ok": False, "required": required}
+        self.steps[name] = step
+        started = time.perf_counter()
+        try:
+            result = function(*args)
+            if inspect.isawaitable(result):
+                result = await result
+            step["ok"] = True
+            if isinstance(result, str):
+                step["detail"] = result
+            return result
+        except PDFProcessingError as e:
+            step["error"] = e.message
+        except Exception as e:
+            step["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            step["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        if required:
+            raise _StepFailed(name)
+
+@lru_cache()
+def get_warm_up() -> WarmUp:
+    """Get the application-wide warm-up state."""
+    return WarmUp()
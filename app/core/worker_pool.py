@@ -0,0 +1,324 @@
+import asyncio
+import concurrent.futures
+import functools
+import multiprocessing
+import os
+import queue
+import resource
+import signal
+import threading
+import time
+from contextlib import suppress
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from app import exceptions
+from app.config import Settings, get_settings
+from app.core.metrics import get_metrics
+from app.exceptions import OCRExtractionError, OCRTimeoutError, PDFProcessingError
+
+class _CallCancelled(Exception):
+    """The caller of WorkerPool.run stopped waiting for the result."""
+
+def _rss_mb() -> float:
+    """Resident set size of the current process in MiB, peak size where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _worker_main(connection) -> None:
+    """Worker loop: run each (function, args) received and send back the outcome."""
+    # Ctrl-C is handled by the parent, which stops the workers itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        try:
+            message = connection.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        function, args = message
+        try:
+            outcome = {"result": function(*args)}
+        except PDFProcessingError as e:
+            outcome = {"error": type(e).__name__, "message": e.message, "details": e.details}
+        except Exception as e:
+            outcome = {
+                "error": "OCRExtractionError",
+                "message": "Text extraction failed",
+                "details": {"error": str(e), "type": type(e).__name__}
+            }
+        outcome["rss_mb"] = _rss_mb()
+        connection.send(outcome)
+
+class Worker:
+    """A worker process and the parent's end of its pipe."""
+
+    __slots__ = ("process", "connection", "jobs")
+
+    def __init__(self, process, connection):
+        self.process = process
+        self.connection = connection
+        self.jobs = 0
+
+    def stop(self, kill: bool = False) -> None:
+        """Ask the worker to exit, or kill it when it cannot be trusted to."""
+        if not kill:
+            try:
+                self.connection.send(None)
+            except (BrokenPipeError, OSError):
+                kill = True
+        if kill:
+            self.process.kill()
+        self.process.join(timeout=1)
+        self.connection.close()
+
+class WorkerPool:
+    """
+    Long-lived worker processes running extraction functions.
+
+    Workers are forked once, receive a function and its arguments (PDF
+    bytes included) over a pipe and return its result. A worker is replaced
+    after `max_jobs` jobs or once its RSS passes `max_rss_mb`, containing
+    leaks from malformed PDFs. A worker that crashes or exceeds the call's
+    timeout is killed and replaced; only the call it was running fails.
+    So is the worker of an async caller that gets cancelled.
+    """
+
+    # Seconds between checks for cancellation while a job runs
+    CANCEL_POLL_INTERVAL = 0.05
+
+    def __init__(self, size: int, max_jobs: int, max_rss_mb: float):
+        """
+        Initialize the pool without starting any worker.
+
+        Args:
+            size: Number of worker processes
+            max_jobs: Jobs a worker runs before being replaced, 0 for no limit
+            max_rss_mb: RSS in MiB above which a worker is replaced, 0 for no limit
+        """
+        self.size = size
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.jobs = 0
+        self.recycled: Dict[str, int] = {"jobs": 0, "rss": 0, "crash": 0, "timeout": 0, "cancelled": 0}
+        methods = multiprocessing.get_all_start_methods()
+        self.__context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self.__idle: "queue.Queue[Worker]" = queue.Queue()
+        self.__executor = concurrent.futures.ThreadPoolExecutor(max_workers=size, thread_name_prefix="worker-pool")
+        self.__lock = threading.Lock()
+        self.__started = False
+        self.__closed = False
+
+    def start(self) -> None:
+        """Fork the workers ahead of the first job, once."""
+        with self.__lock:
+            if self.__started:
+                return
+            self.__started = True
+            self.__closed = False
+            for _ in range(self.size):
+                self.__idle.put(self.__spawn())
+
+    def run(
+        self,
+        function: Callable[..., Any],
+        *args,
+        timeout: float,
+        cancelled: Optional[threading.Event] = None
+    ) -> Any:
+        """
+        Run a module-level function in a worker and return its result.
+
+        Args:
+            function: Picklable function to run
+            *args: Picklable arguments
+            timeout: Seconds before the worker is considered hung and killed
+            cancelled: Set when the result is no longer wanted, killing the worker
+
+        Returns:
+            The function's return value
+
+        Raises:
+            The application exception raised by the function, OCRExtractionError
+            for other failures or a crashed worker, OCRTimeoutError for a hung worker
+        """
+        self.start()
+        return self.__run_on(self.__idle.get(), function, args, timeout, cancelled)
+
+    def run_on_each(self, function: Callable[..., Any], *args, timeout: float) -> List[Any]:
+        """
+        Run a module-level function once in every worker, such as to load an engine in each.
+
+        Waits until every worker is idle, then runs the function in all of
+        them concurrently. A worker replaced meanwhile, after a crash or its
+        last job, is a fresh process the function did not run in.
+
+        Args:
+            function: Picklable function to run
+            *args: Picklable arguments
+            timeout: Seconds before a worker is considered hung and killed
+
+        Returns:
+            The function's return value in each worker
+
+        Raises:
+            The first exception raised in a worker, see run
+        """
+        self.start()
+        workers = [self.__idle.get() for _ in range(self.size)]
+        for worker in workers:
+            with suppress(OSError):
+                # A worker that cannot receive is reported as crashed below
+                worker.connection.send((function, args))
+        results, error = [], None
+        for worker in workers:
+            try:
+                results.append(self.__run_on(worker, function, args, timeout, None, sent=True))
+            except PDFProcessingError as e:
+                error = error or e
+        if error is not None:
+            raise error
+        return results
+
+    async def run_on_each_async(self, function: Callable[..., Any], *args, timeout: float) -> List[Any]:
+        """Run a function once in every worker without blocking the event loop, see run_on_each."""
+        return await asyncio.to_thread(functools.partial(self.run_on_each, function, *args, timeout=timeout))
+
+    def __run_on(
+        self,
+        worker: Worker,
+        function: Callable[..., Any],
+        args: tuple,
+        timeout: float,
+        cancelled: Optional[threading.Event],
+        sent: bool = False
+    ) -> Any:
+        """Run the function in a worker taken from the idle queue, then release or replace it."""
+        try:
+            outcome = self.__call(worker, function, args, timeout, cancelled, sent)
+            worker.jobs += 1
+            self.jobs += 1
+            if self.max_jobs and worker.jobs >= self.max_jobs:
+                worker = self.__replace(worker, "jobs")
+            elif self.max_rss_mb and outcome["rss_mb"] > self.max_rss_mb:
+                worker = self.__replace(worker, "rss")
+        except OCRTimeoutError:
+            worker = self.__replace(worker, "timeout", kill=True)
+            raise
+        except _CallCancelled:
+            worker = self.__replace(worker, "cancelled", kill=True)
+            raise
+        except (EOFError, OSError) as e:
+            worker.process.join(timeout=1)
+            exit_code = worker.process.exitcode
+            worker = self.__replace(worker, "crash", kill=True)
+            raise OCRExtractionError(
+                message="Extraction worker crashed",
+                details={"exit_code": exit_code, "error": str(e)}
+            )
+        finally:
+            self.__release(worker)
+
+        if "error" in outcome:
+            error_type = getattr(exceptions, outcome["error"], OCRExtractionError)
+            if not (isinstance(error_type, type) and issubclass(error_type, PDFProcessingError)):
+                error_type = OCRExtractionError
+            raise error_type(message=outcome["message"], details=outcome["details"])
+        return outcome["result"]
+
+    async def run_async(self, function: Callable[..., Any], *args, timeout: float) -> Any:
+        """
+        Run a function in a worker without blocking the event loop, see run.
+
+        Cancelling the caller kills the worker instead of letting it finish
+        a job nobody waits for.
+        """
+        loop = asyncio.get_running_loop()
+        cancelled = threading.Event()
+        try:
+            return await loop.run_in_executor(
+                self.__executor,
+                functools.partial(self.run, function, *args, timeout=timeout, cancelled=cancelled)
+            )
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the pool size, idle workers, jobs run and workers replaced by reason."""
+        return {
+            "size": self.size,
+            "idle": self.__idle.qsize(),
+            "jobs": self.jobs,
+            "recycled": dict(self.recycled),
+        }
+
+    def close(self) -> None:
+        """Stop idle workers now and busy ones as they finish."""
+        with self.__lock:
+            self.__closed = True
+            self.__started = False
+        while True:
+            try:
+                self.__idle.get_nowait().stop()
+            except queue.Empty:
+                break
+        self.__executor.shutdown(wait=False)
+
+    def __call(
+        self,
+        worker: Worker,
+        function: Callable[..., Any],
+        args: tuple,
+        timeout: float,
+        cancelled: Optional[threading.Event],
+        sent: bool = False
+    ) -> dict:
+        if not sent:
+            worker.connection.send((function, args))
+        deadline = time.monotonic() + timeout
+        interval = self.CANCEL_POLL_INTERVAL if cancelled is not None else timeout
+        while not worker.connection.poll(max(min(interval, deadline - time.monotonic()), 0)):
+            if cancelled is not None and cancelled.is_set():
+                raise _CallCancelled()
+            if time.monotonic() >= deadline:
+                raise OCRTimeoutError(
+                    message="OCR operation timed out",
+                    details={"timeout": timeout, "worker": worker.process.pid}
+                )
+        return worker.connection.recv()
+
+    def __spawn(self) -> Worker:
+        parent_connection, child_connection = self.__context.Pipe()
+        process = self.__context.Process(target=_worker_main, args=(child_connection,), daemon=True)
+        process.start()
+        child_connection.close()
+        return Worker(process, parent_connection)
+
+    def __replace(self, worker: Worker, reason: str, kill: bool = False) -> Worker:
+        worker.stop(kill=kill)
+        self.recycled[reason] += 1
+        get_metrics().worker_recycles.inc(reason=reason)
+        return self.__spawn()
+
+    def __release(self, worker: Worker) -> None:
+        if self.__closed:
+            worker.stop()
+        else:
+            self.__idle.put(worker)
+
+def build_worker_pool(settings: Settings) -> WorkerPool:
+    """Build the worker pool described by the settings, one worker per core by default."""
+    return WorkerPool(
+        settings.worker_pool_size or os.cpu_count() or 1,
+        settings.worker_max_jobs,
+        settings.worker_max_rss_mb
+    )
+
+@lru_cache()
+def get_worker_pool() -> WorkerPool:
+    """Get the application-wide worker pool."""
+    return build_worker_pool(get_settings())
@@ -0,0 +1,74 @@
+"""Mapping of application exceptions to HTTP status codes and error payloads."""
+from typing import Tuple
+
+from app.exceptions import (
+    PDFInvalidURLError, PDFNetworkError, PDFInvalidContentTypeError, PDFTimeoutError, PDFTooLargeError,
+    OCRToolNotFoundError, OCRExtractionError, OCRInvalidPageRangeError, OCRTimeoutError,
+    EmptyTextError, TextParsingError, ExtractionQueueFullError, BatchTooLargeError, JobNotFoundError,
+    DeadlineExceededError, ClientDisconnectedError, ServiceOverloadedError, JobInterruptedError
+)
+from app.schemas import ErrorDetail
+
+# Exception mapping configuration
+EXCEPTION_HANDLERS = {
+    # 400 Bad Request errors
+    PDFInvalidURLError: (400, "PDF_INVALID_URL_ERROR"),
+    PDFInvalidContentTypeError: (400, "PDF_INVALID_CONTENT_TYPE_ERROR"),
+    PDFNetworkError: (400, "PDF_NETWORK_ERROR"),
+    OCRInvalidPageRangeError: (400, "OCR_INVALID_PAGE_RANGE_ERROR"),
+
+    # 404 Not Found errors
+    JobNotFoundError: (404, "JOB_NOT_FOUND_ERROR"),
+
+    # 413 Payload Too Large errors
+    PDFTooLargeError: (413, "PDF_TOO_LARGE_ERROR"),
+    BatchTooLargeError: (413, "BATCH_TOO_LARGE_ERROR"),
+
+    # 499 Client Closed Request, never seen by the client but counted in the metrics
+    ClientDisconnectedError: (499, "CLIENT_DISCONNECTED_ERROR"),
+    
+    # 503 Service Unavailable errors
+    ExtractionQueueFullError: (503, "EXTRACTION_QUEUE_FULL_ERROR"),
+    ServiceOverloadedError: (503, "SERVICE_OVERLOADED_ERROR"),
+    JobInterruptedError: (503, "JOB_INTERRUPTED_ERROR"),
+
+    # 504 Gateway Timeout errors
+    PDFTimeoutError: (504, "PDF_TIMEOUT_ERROR"),
+    OCRTimeoutError: (504, "OCR_TIMEOUT_ERROR"),
+    DeadlineExceededError: (504, "DEADLINE_EXCEEDED_ERROR"),
+    
+    # 500 Internal Server Error - OCR errors
+    OCRToolNotFoundError: (500, "OCR_TOOL_NOT_FOUND_ERROR"),
+    OCRExtractionError: (500, "OCR_EXTRACTION_ERROR"),
+    
+    # 500 Internal Server Error - Text formatting errors
+    EmptyTextError: (500, "EMPTY_TEXT_ERROR"),
+    TextParsingError: (500, "TEXT_PARSING_ERROR"),
+}
+
+def describe_exception(exception: Exception) -> Tuple[int, ErrorDetail]:
+    """
+    Map an exception to its HTTP status code and error payload.
+
+    Args:
+        exception: The exception to map
+
+    Returns:
+        Tuple of status code and ErrorDetail, 500 and INTERNAL_SERVER_ERROR
+        for exceptions missing from EXCEPTION_HANDLERS
+    """
+    # Find the exception type in our mapping
+    for exc_type, (status_code, error_code) in EXCEPTION_HANDLERS.items():
+        if isinstance(exception, exc_type):
+            return status_code, ErrorDetail(
+                code=error_code,
+                message=str(exception.message),
+                details=exception.details
+            )
+
+    # Default case for unhandled exceptions
+    return 500, ErrorDetail(
+        code="INTERNAL_SERVER_ERROR",
+        message=f"An unexpected error occurred: {str(exception)}",
+        details={"error": str(exception)}
+    )
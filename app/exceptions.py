@@ -29,6 +29,10 @@ class PDFTimeoutError(PDFFetchError):
     """Raised when the PDF fetch operation times out."""
     pass
 
+class PDFTooLargeError(PDFFetchError):
+    """Raised when the PDF exceeds the maximum allowed size."""
+    pass
+
 # OCR Errors
 class OCRError(PDFProcessingError):
     """Base exception for OCR errors."""
@@ -42,10 +46,45 @@ class OCRExtractionError(OCRError):
     """Raised when text extraction fails."""
     pass
 
+class OCRInvalidPageRangeError(OCRError):
+    """Raised when the requested page range is invalid."""
+    pass
+
 class OCRTimeoutError(OCRError):
     """Raised when the OCR operation times out."""
     pass
 
+# Scheduling Errors
+class ExtractionQueueFullError(PDFProcessingError):
+    """Raised when no worker is free and the extraction wait queue is full."""
+    pass
+
+class ServiceOverloadedError(PDFProcessingError):
+    """Raised when new extractions are shed because the pipeline is saturated."""
+    pass
+
+class BatchTooLargeError(PDFProcessingError):
+    """Raised when a batch request lists more documents than allowed."""
+    pass
+
+# Request Errors
+class DeadlineExceededError(PDFProcessingError):
+    """Raised when a request runs past its deadline."""
+    pass
+
+class ClientDisconnectedError(PDFProcessingError):
+    """Raised when the client disconnects before its response is ready."""
+    pass
+
+# Job Errors
+class JobNotFoundError(PDFProcessingError):
+    """Raised when an extraction job is unknown or has expired."""
+    pass
+
+class JobInterruptedError(PDFProcessingError):
+    """Raised when an extraction job was queued or running when the service stopped."""
+    pass
+
 # Text Formatting Errors
 class TextFormattingError(PDFProcessingError):
     """Base exception for text formatting errors."""
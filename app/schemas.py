@@ -1,18 +1,153 @@
 """API schemas."""
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, RootModel
+from typing import List, Optional, Dict, Any, Union
+from pydantic import BaseModel, Field, RootModel
 
 
 class PDFResponse(RootModel):
     """Response model for PDF text extraction."""
     root: List[str]
 
+class PagedPDFResponse(RootModel):
+    """Response model for PDF text extraction split into pages."""
+    root: List[List[str]]
+
+class TextLine(BaseModel):
+    """A line with its page and line number in the extracted text, as text or column cells."""
+    page: int
+    line: int
+    text: Optional[str] = None
+    cells: Optional[List[str]] = None
+
+class LayoutPDFResponse(RootModel):
+    """Response model for PDF text extraction with column cells and/or line offsets."""
+    root: Union[List[TextLine], List[List[TextLine]], List[List[str]], List[List[List[str]]]]
+
+class Table(BaseModel):
+    """Table rebuilt from the word positions of one page, every row having one cell per column."""
+    page: int
+    caption: List[str] = []
+    header: List[str]
+    rows: List[List[str]]
+
+class TableResponse(RootModel):
+    """Response model for table extraction, one table per non-empty page."""
+    root: List[Table]
+
+class BatchExtractionRequest(BaseModel):
+    """Request model for extracting text from several PDFs at once."""
+    urls: List[str] = Field(..., min_length=1)
+    first_page: Optional[int] = Field(None, ge=1)
+    last_page: Optional[int] = Field(None, ge=1)
+    per_page: bool = False
+    concurrency: Optional[int] = Field(None, ge=1)
+    engine: Optional[str] = Field(None, pattern="^(pdftotext|pdfium)$")
+
+class ExtractionJobRequest(BaseModel):
+    """Request model for submitting an asynchronous extraction."""
+    url: str
+    first_page: Optional[int] = Field(None, ge=1)
+    last_page: Optional[int] = Field(None, ge=1)
+    per_page: bool = False
+    engine: Optional[str] = Field(None, pattern="^(pdftotext|pdfium)$")
+    webhook_url: Optional[str] = None
+
+class CacheStats(BaseModel):
+    """Counters of the extraction result cache."""
+    enabled: bool
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    memory_entries: int = 0
+    disk_entries: int = 0
+
+class SchedulerStats(BaseModel):
+    """Load and wait-time metrics of the extraction scheduler."""
+    max_workers: int
+    max_queue: int
+    in_flight: int
+    queue_depth: int
+    admitted: int
+    rejected: int
+    wait_time_avg: float
+    wait_time_max: float
+
+class CoalescingStats(BaseModel):
+    """Counters of requests sharing an in-flight fetch and extraction."""
+    enabled: bool
+    executions: int = 0
+    coalesced: int = 0
+    in_flight: int = 0
+
 class ErrorDetail(BaseModel):
     """Detailed error information."""
     code: str
     message: str
     details: Optional[Dict[str, Any]] = None
 
+class BatchItemResult(BaseModel):
+    """Outcome of one document of a batch, lines on success or the error otherwise."""
+    url: str
+    status_code: int
+    lines: Optional[Union[List[str], List[List[str]]]] = None
+    error: Optional[ErrorDetail] = None
+
 class ErrorResponse(BaseModel):
     """Standard error response."""
-    error: ErrorDetail
\ No newline at end of file
+    error: ErrorDetail
+
+class ExtractionJob(BaseModel):
+    """State of an asynchronous extraction, with its lines or error once finished."""
+    id: str
+    url: str
+    status: str
+    created_at: float
+    finished_at: Optional[float] = None
+    lines: Optional[Union[List[str], List[List[str]]]] = None
+    error: Optional[ErrorDetail] = None
+    webhook_error: Optional[str] = None
+
+class WarmUpStep(BaseModel):
+    """Outcome of one startup warm-up step."""
+    ok: bool
+    required: bool
+    duration_ms: float
+    detail: Optional[str] = None
+    error: Optional[str] = None
+
+class ExtractionLoad(BaseModel):
+    """Running and waiting extractions against the scheduler's capacity."""
+    in_flight: int
+    max_workers: int
+    queue_depth: int
+    max_queue: int
+
+class HTTPPoolLoad(BaseModel):
+    """Requests holding a connection slot against the HTTP pool limits."""
+    active: int
+    max_connections: int
+    max_connections_per_host: int
+    saturated_hosts: int
+
+class PipelineLoad(BaseModel):
+    """Live load of the extraction pipeline."""
+    extraction: ExtractionLoad
+    http: HTTPPoolLoad
+
+class ReadinessResponse(BaseModel):
+    """
+    Readiness of the service: ready once the startup warm-up succeeded and
+    while the pipeline is not saturated. Reasons name what keeps it from
+    being ready: "warm_up" while it runs, its failed steps, "extraction"
+    or "http" while saturated.
+    """
+    ready: bool
+    reasons: List[str] = []
+    pdftotext: Optional[bool] = None
+    warm_up_ms: Optional[float] = None
+    steps: Dict[str, WarmUpStep] = {}
+    load: Optional[PipelineLoad] = None
+
+class HealthResponse(BaseModel):
+    """Liveness of the service."""
+    status: str
+    uptime: float
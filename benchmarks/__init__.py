@@ -0,0 +1 @@
+"""Benchmarks for the PDF extraction service."""
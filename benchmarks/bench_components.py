@@ -0,0 +1,136 @@
+"""
+Micro-benchmarks of the pipeline components.
+
+Times each core component in isolation on the synthetic corpus: fetching
+from a local origin, spooling and hashing the payload, pdftotext
+extraction, line formatting and the result cache. pdftotext runs are
+skipped when it is not on PATH.
+
+Usage:
+    python -m benchmarks.bench_components --iterations 50
+"""
+import argparse
+import asyncio
+import shutil
+import time
+from typing import Awaitable, Callable, List
+
+from app.config import get_settings
+from app.core.fetch_cache import FetchCache
+from app.core.http_client import HTTPClientPool
+from app.core.ocr_processor import OCRProcessor
+from app.core.pdf_fetcher import PDFFetcher
+from app.core.pdf_payload import PDFPayload
+from app.core.result_cache import MemoryCacheBackend, ResultCache
+from app.core.text_line_formatter import TextLineFormatter
+from benchmarks.support import CORPUS_SPEC, OriginServer, build_corpus, latency_summary, write_results
+
+
+async def measure(call: Callable[[], Awaitable[object]], iterations: int) -> List[float]:
+    """Run the call once to warm up, then return the duration of each iteration."""
+    await call()
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await call()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def synthetic_text(pages: int, lines_per_page: int) -> str:
+    """Text shaped like pdftotext -layout output, pages ending with form feeds."""
+    line = "   12:{:02d}    IC {}    Lausanne             Renens VD, Morges            {}   "
+    return "".join(
+        "\n".join(line.format(index % 60, index % 9, index % 8) for index in range(lines_per_page)) + "\n\f"
+        for _ in range(pages)
+    )
+
+
+async def bench_document(name: str, pdf_data: bytes, url: str, args: argparse.Namespace) -> List[dict]:
+    settings = get_settings()
+    pages, lines_per_page = CORPUS_SPEC[name.rsplit(".", 1)[0]]
+    text = synthetic_text(pages * args.text_scale, lines_per_page)
+    formatter = TextLineFormatter()
+    http_pool = HTTPClientPool(settings)
+    fetcher = PDFFetcher(http_pool=http_pool, fetch_cache=FetchCache(max_entries=0))
+    ocr_processor = OCRProcessor()
+    result_cache = ResultCache(MemoryCacheBackend(max_entries=1024, ttl=3600))
+    lines = formatter.format_text(text)
+
+    async def spool():
+        payload = PDFPayload(settings.fetch_max_size, settings.fetch_spool_size)
+        for start in range(0, len(pdf_data), settings.fetch_chunk_size):
+            payload.write(pdf_data[start:start + settings.fetch_chunk_size])
+        payload.seal()
+        ResultCache.make_key(payload, {"layout": True})
+        payload.close()
+
+    async def cache_round_trip():
+        key = ResultCache.make_key(pdf_data, {"layout": True})
+        result_cache.set(key, lines)
+        result_cache.get(key)
+
+    async def format_text():
+        formatter.format_text(text)
+
+    async def format_pages():
+        formatter.format_pages(text)
+
+    async def format_columns():
+        formatter.format_text(text, columns=True)
+
+    async def format_offsets():
+        formatter.format_text(text, offsets=True)
+
+    components = {
+        "fetch_async": lambda: fetcher.fetch_pdf_async(url),
+        "payload_spool_and_hash": spool,
+        "ocr_extract_async": lambda: ocr_processor.extract_text_async(pdf_data),
+        "format_text": format_text,
+        "format_pages": format_pages,
+        "format_columns": format_columns,
+        "format_offsets": format_offsets,
+        "result_cache_round_trip": cache_round_trip,
+    }
+
+    results = []
+    for component, call in components.items():
+        if component not in args.components:
+            continue
+        result = {"component": component, "document": name, "pdf_bytes": len(pdf_data), "pages": pages}
+        if component.startswith("format_"):
+            result["text_bytes"] = len(text)
+        if component == "ocr_extract_async" and shutil.which("pdftotext") is None:
+            result["skipped"] = "pdftotext not on PATH"
+        else:
+            durations = await measure(call, args.iterations)
+            result["iterations"] = args.iterations
+            result.update(latency_summary(durations))
+        results.append(result)
+    await http_pool.aclose()
+    return results
+
+
+async def main(args: argparse.Namespace) -> None:
+    documents = build_corpus(args.documents)
+    results = []
+    with OriginServer(documents) as origin:
+        for name, pdf_data in documents.items():
+            results.extend(await bench_document(name, pdf_data, origin.url(name), args))
+    write_results("components", vars(args), results, args.output)
+
+
+COMPONENTS = [
+    "fetch_async", "payload_spool_and_hash", "ocr_extract_async",
+    "format_text", "format_pages", "format_columns", "format_offsets", "result_cache_round_trip",
+]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--documents", nargs="+", choices=list(CORPUS_SPEC), default=list(CORPUS_SPEC))
+    parser.add_argument("--components", nargs="+", choices=COMPONENTS, default=COMPONENTS)
+    parser.add_argument("--text-scale", type=int, default=1,
+                        help="multiply the pages of the formatted text, e.g. 100 for multi-MB text")
+    parser.add_argument("--output", help="result file, defaults to benchmarks/results/components-<commit>.json")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,158 @@
+"""
+Response encoding benchmark: serialization CPU and bytes on the wire.
+
+Serializes synthetic timetable lines, varied enough not to compress
+unrealistically well, for each size the way the extract
+endpoint used to, validating it against PDFResponse then through FastAPI's
+response model, and the way it does now, straight to JSON (orjson when
+installed) or msgpack. Each body is then compressed with every available
+coding. NDJSON streams are compressed with ResponseEncoder.compress_stream
+from a source pausing every --burst lines, as pdftotext output arrives in
+pipe-sized reads, against a flush after every line.
+
+Usage:
+    python -m benchmarks.bench_encoding --pages 10 100 --iterations 20
+"""
+import argparse
+import asyncio
+import random
+import time
+import zlib
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from app.api.router import router
+from app.core.response_encoding import JSON, MSGPACK, ResponseEncoder
+from app.schemas import PDFResponse
+from benchmarks.support import percentile, write_results
+
+STATIONS = [
+    "Lausanne", "Renens VD", "Morges", "Nyon", "Genève", "Genève-Aéroport", "Vevey", "Montreux",
+    "Fribourg/Freiburg", "Bern", "Yverdon-les-Bains", "Neuchâtel", "Biel/Bienne", "Sion", "Brig",
+]
+
+
+def timetable_lines(count: int, seed: int = 0) -> List[str]:
+    """Formatted lines shaped like a timetable: time, train, origin, destination, track and remarks."""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        origin, destination = rng.sample(STATIONS, 2)
+        lines.append(
+            f"{rng.randrange(5, 24):02d}:{rng.randrange(60):02d} {rng.choice(['IC', 'IR', 'RE', 'S'])}"
+            f"{rng.randrange(1, 99)} {rng.randrange(100, 30000)} {origin} {destination} {rng.randrange(1, 9)}"
+            + rng.choice(["", "", " +5'", " Ersatzbus", " remplacé par bus"])
+        )
+    return lines
+
+
+def median_ms(call: Callable[[], object], iterations: int) -> float:
+    """Run the call once to warm up, then return its median duration in milliseconds."""
+    call()
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        durations.append(time.perf_counter() - started)
+    return round(percentile(durations, 0.5) * 1000, 3)
+
+
+def validated_serializer() -> Callable[[list], bytes]:
+    """The previous path: PDFResponse validation, then the route's response model and JSONResponse."""
+    route = next(
+        route for route in router.routes
+        if route.path == "/api/v1/documents/extract-text" and "GET" in route.methods
+    )
+
+    def serialize(lines: list) -> bytes:
+        content = asyncio.run(serialize_response(
+            field=route.response_field, response_content=PDFResponse.model_validate(lines),
+            exclude_none=True, is_coroutine=True
+        ))
+        return JSONResponse(content).body
+
+    return serialize
+
+
+def bench_bodies(lines: list, encoder: ResponseEncoder, iterations: int) -> List[dict]:
+    serializers = {"validated": validated_serializer(), "json": lambda lines: encoder.serialize(lines, JSON)}
+    if MSGPACK in encoder.media_types:
+        serializers["msgpack"] = lambda lines: encoder.serialize(lines, MSGPACK)
+
+    results = []
+    for name, serialize in serializers.items():
+        body = serialize(lines)
+        serialize_ms = median_ms(lambda: serialize(lines), iterations)
+        results.append({
+            "lines": len(lines), "format": name, "coding": "identity",
+            "serialize_ms": serialize_ms, "compress_ms": 0.0, "bytes": len(body),
+        })
+        for coding in encoder.codings:
+            compressed = encoder.compress(body, coding)
+            results.append({
+                "lines": len(lines), "format": name, "coding": coding,
+                "serialize_ms": serialize_ms,
+                "compress_ms": median_ms(lambda: encoder.compress(body, coding), iterations),
+                "bytes": len(compressed),
+            })
+    return results
+
+
+async def stream_bytes(lines: list, encoder: ResponseEncoder, coding: str, burst: int) -> int:
+    """Bytes of the compressed NDJSON stream of the lines, the source pausing every `burst` lines."""
+    async def chunks():
+        for index, line in enumerate(lines):
+            yield encoder.dumps_json(line) + b"\n"
+            if index % burst == burst - 1:
+                await asyncio.sleep(0)
+
+    return sum([len(chunk) async for chunk in encoder.compress_stream(chunks(), coding)])
+
+
+def per_line_flush_bytes(lines: list, encoder: ResponseEncoder) -> int:
+    """Bytes of the gzip NDJSON stream flushed after every line."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    size = 0
+    for line in lines:
+        size += len(compressor.compress(encoder.dumps_json(line) + b"\n"))
+        size += len(compressor.flush(zlib.Z_SYNC_FLUSH))
+    return size + len(compressor.flush())
+
+
+def bench_streams(lines: list, encoder: ResponseEncoder, burst: int) -> List[dict]:
+    identity = sum(len(encoder.dumps_json(line)) + 1 for line in lines)
+    results = [{"lines": len(lines), "format": "ndjson", "coding": "identity", "bytes": identity}]
+    for coding in encoder.codings:
+        started = time.perf_counter()
+        size = asyncio.run(stream_bytes(lines, encoder, coding, burst))
+        results.append({
+            "lines": len(lines), "format": "ndjson", "coding": coding,
+            "stream_ms": round((time.perf_counter() - started) * 1000, 3), "bytes": size,
+        })
+    results.append({
+        "lines": len(lines), "format": "ndjson", "coding": "gzip, flushed per line",
+        "bytes": per_line_flush_bytes(lines, encoder),
+    })
+    return results
+
+
+def main(args: argparse.Namespace) -> None:
+    encoder = ResponseEncoder()
+    results = []
+    for pages in args.pages:
+        lines = timetable_lines(pages * args.lines_per_page)
+        results.extend(bench_bodies(lines, encoder, args.iterations))
+        results.extend(bench_streams(lines, encoder, args.burst))
+    write_results("encoding", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--lines-per-page", type=int, default=60)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--burst", type=int, default=64, help="NDJSON lines the source yields between pauses")
+    parser.add_argument("--output", help="result file, defaults to benchmarks/results/encoding-<commit>.json")
+    main(parser.parse_args())
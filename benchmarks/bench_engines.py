@@ -0,0 +1,87 @@
+"""
+Compare the extraction engines on the synthetic corpus.
+
+Runs every document through each engine (pdftotext subprocess of the
+application process, pdftotext spawned from the worker pool as with the
+ocr_worker_pool setting, pdfium in warm worker processes) and reports
+per-document latency. When both
+engines are available, also reports how closely their words agree, page
+by page. Engines whose tool is missing are reported as skipped.
+
+Usage:
+    python -m benchmarks.bench_engines --iterations 20
+"""
+import argparse
+import asyncio
+import difflib
+import shutil
+import time
+
+from app.core.extraction_engine import PdfiumEngine
+from app.core.ocr_processor import OCRProcessor
+from app.core.worker_pool import get_worker_pool
+from benchmarks.support import CORPUS_SPEC, build_corpus, latency_summary, write_results
+
+AVAILABLE = {
+    "pdftotext": lambda: shutil.which("pdftotext") is not None,
+    "pdftotext-pool": lambda: shutil.which("pdftotext") is not None,
+    "pdfium": PdfiumEngine.available,
+}
+
+PROCESSORS = {
+    "pdftotext": lambda: OCRProcessor(engine="pdftotext", use_worker_pool=False),
+    "pdftotext-pool": lambda: OCRProcessor(engine="pdftotext", use_worker_pool=True),
+    "pdfium": lambda: OCRProcessor(engine="pdfium"),
+}
+
+
+def agreement(first: str, second: str) -> float:
+    """Similarity of the words of two extractions, page by page, from 0 to 1."""
+    first_pages, second_pages = first.split("\f"), second.split("\f")
+    ratios = [
+        difflib.SequenceMatcher(None, left.split(), right.split()).ratio()
+        for left, right in zip(first_pages, second_pages)
+    ]
+    page_penalty = min(len(first_pages), len(second_pages)) / max(len(first_pages), len(second_pages))
+    return round(sum(ratios) / len(ratios) * page_penalty, 4) if ratios else 0.0
+
+
+async def main(args: argparse.Namespace) -> None:
+    processors = {engine: PROCESSORS[engine]() for engine in args.engines}
+    engines = [engine for engine in args.engines if AVAILABLE[engine]()]
+    results = []
+    for name, pdf_data in build_corpus(args.documents).items():
+        texts = {}
+        for engine in args.engines:
+            result = {"engine": engine, "document": name, "pdf_bytes": len(pdf_data)}
+            if engine not in engines:
+                result["skipped"] = "not installed"
+                results.append(result)
+                continue
+            # Warm up, in the worker pool this also starts the worker processes
+            texts[engine] = await processors[engine].extract_text_async(pdf_data)
+            durations = []
+            for _ in range(args.iterations):
+                started = time.perf_counter()
+                await processors[engine].extract_text_async(pdf_data)
+                durations.append(time.perf_counter() - started)
+            result["iterations"] = args.iterations
+            result.update(latency_summary(durations))
+            results.append(result)
+        if "pdftotext" in texts and "pdfium" in texts:
+            results.append({
+                "engine": "pdfium-vs-pdftotext",
+                "document": name,
+                "word_agreement": agreement(texts["pdftotext"], texts["pdfium"]),
+            })
+    get_worker_pool().close()
+    write_results("engines", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--documents", nargs="+", choices=list(CORPUS_SPEC), default=list(CORPUS_SPEC))
+    parser.add_argument("--engines", nargs="+", choices=list(AVAILABLE), default=list(AVAILABLE))
+    parser.add_argument("--output", help="result file, defaults to benchmarks/results/engines-<commit>.json")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,104 @@
+"""
+End-to-end load driver for /api/v1/documents/extract-text.
+
+Serves the synthetic corpus from a local origin and drives the FastAPI app
+in-process at increasing concurrency levels, cycling through the corpus
+documents. Each level reports throughput, p50/p95/p99 latency, errors,
+requests shed with 503 by the scheduler or load shedding, peak RSS and
+peak number of child processes (pdftotext workers). The result cache and
+request coalescing are disabled unless --cached is given, so every
+request pays for a full extraction. Requires pdftotext on PATH.
+
+Usage:
+    python -m benchmarks.bench_load --requests 64 --levels 1 4 16 32
+"""
+import argparse
+import asyncio
+import time
+from itertools import cycle
+
+import httpx
+
+from app.config import get_settings
+from benchmarks.support import (
+    CORPUS_SPEC, OriginServer, build_corpus, child_process_count, latency_summary, rss_mb, write_results
+)
+
+
+async def sample_resources(peaks: dict, interval: float = 0.01) -> None:
+    """Record peak RSS and child process count until cancelled."""
+    while True:
+        peaks["rss_mb"] = max(peaks["rss_mb"], rss_mb())
+        peaks["child_processes"] = max(peaks["child_processes"], child_process_count())
+        await asyncio.sleep(interval)
+
+
+async def run_level(client: httpx.AsyncClient, urls: list, total: int, concurrency: int) -> dict:
+    """Send `total` requests with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+    shed = 0
+    next_url = cycle(urls)
+
+    async def one_request(url: str):
+        nonlocal errors, shed
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.get("/api/v1/documents/extract-text", params={"file": url})
+            latencies.append(time.perf_counter() - started)
+            if response.status_code == 503:
+                shed += 1
+            elif response.status_code != 200:
+                errors += 1
+
+    peaks = {"rss_mb": rss_mb(), "child_processes": 0}
+    sampler = asyncio.create_task(sample_resources(peaks))
+    started = time.perf_counter()
+    await asyncio.gather(*(one_request(next(next_url)) for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+
+    result = {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "shed": shed,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2),
+    }
+    result.update(latency_summary(latencies))
+    result.update(peak_rss_mb=peaks["rss_mb"], peak_child_processes=peaks["child_processes"])
+    return result
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings = get_settings()
+    if not args.cached:
+        settings.result_cache_enabled = False
+        settings.fetch_cache_enabled = False
+        settings.coalescing_enabled = False
+
+    # Imported after the settings are adjusted, the app builds its singletons lazily
+    from main import app
+
+    documents = build_corpus(args.documents)
+    with OriginServer(documents, delay=args.delay) as origin:
+        urls = [origin.url(name) for name in documents]
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            results = []
+            for concurrency in args.levels:
+                results.append(await run_level(client, urls, args.requests, concurrency))
+    write_results("load", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--documents", nargs="+", choices=list(CORPUS_SPEC), default=["p1", "p10"])
+    parser.add_argument("--delay", type=float, default=0.0, help="origin response delay in seconds")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--cached", action="store_true", help="keep the result cache and coalescing on")
+    parser.add_argument("--output", help="result file, defaults to benchmarks/results/load-<commit>.json")
+    asyncio.run(main(parser.parse_args()))
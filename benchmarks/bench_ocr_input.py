@@ -0,0 +1,76 @@
+"""
+Micro-benchmark of the ways OCRProcessor hands a PDF to pdftotext.
+
+For a small and a large synthetic PDF, runs each input mode (memfd, stdin,
+tempfile) and reports mean per-document latency, the read/write syscalls
+and bytes issued by this process, and the block I/O of the pdftotext
+children. Requires pdftotext on PATH and Linux /proc for the I/O counters.
+
+Usage:
+    python -m benchmarks.bench_ocr_input --iterations 20
+"""
+import argparse
+import resource
+import time
+from typing import Dict
+
+from app.core.ocr_processor import OCRProcessor
+from benchmarks.support import make_pdf, write_results
+
+
+def read_process_io() -> Dict[str, int]:
+    """Return this process's I/O counters from /proc, or an empty dict elsewhere."""
+    try:
+        with open("/proc/self/io") as io_file:
+            return {key: int(value) for key, value in (line.split(": ") for line in io_file)}
+    except OSError:
+        return {}
+
+
+def bench_mode(mode: str, pdf_data: bytes, iterations: int) -> dict:
+    ocr_processor = OCRProcessor(input_mode=mode)
+    ocr_processor.extract_text(pdf_data)
+
+    io_before = read_process_io()
+    children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        ocr_processor.extract_text(pdf_data)
+    elapsed = time.perf_counter() - started
+    children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    io_after = read_process_io()
+
+    io_delta = {key: (io_after[key] - io_before[key]) // iterations for key in io_after}
+    return {
+        "mode": mode,
+        "mean_ms": round(elapsed / iterations * 1000, 2),
+        "read_syscalls": io_delta.get("syscr"),
+        "write_syscalls": io_delta.get("syscw"),
+        "bytes_written": io_delta.get("wchar"),
+        "disk_bytes_written": io_delta.get("write_bytes"),
+        "child_blocks_in": (children_after.ru_inblock - children_before.ru_inblock) // iterations,
+        "child_blocks_out": (children_after.ru_oublock - children_before.ru_oublock) // iterations,
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    documents = {
+        "small": make_pdf(pages=1),
+        "large": make_pdf(pages=args.large_pages),
+    }
+    results = []
+    for name, pdf_data in documents.items():
+        for mode in args.modes:
+            result = bench_mode(mode, pdf_data, args.iterations)
+            result.update(document=name, pdf_bytes=len(pdf_data))
+            results.append(result)
+    write_results("ocr_input", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--large-pages", type=int, default=200)
+    parser.add_argument("--modes", nargs="+", default=["memfd", "stdin", "tempfile"])
+    parser.add_argument("--output", help="result file, defaults to benchmarks/results/ocr_input-<commit>.json")
+    main(parser.parse_args())
@@ -0,0 +1,126 @@
+"""
+Cold start benchmark: import time and time to the first successful extraction.
+
+Measures the import time of the application in fresh interpreters, then
+starts the server (uvicorn) as a fresh process, with and without the
+startup warm-up, and reports the time until it listens, until /readyz
+reports ready and until a first extraction of a one-page document from a
+local origin succeeds, along with the latency of that first request.
+Requires pdftotext on PATH unless --engine pdfium is given.
+
+Usage:
+    python -m benchmarks.bench_startup --iterations 5 --engine pdfium
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Optional
+
+import httpx
+
+from benchmarks.support import OriginServer, latency_summary, make_pdf, write_results
+
+# Prints the seconds taken to import the application
+IMPORT_SCRIPT = "import time; started = time.perf_counter(); import main; print(time.perf_counter() - started)"
+
+
+def measure_import(iterations: int) -> dict:
+    """Import the application in `iterations` fresh interpreters."""
+    durations = []
+    for _ in range(iterations):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT], capture_output=True, text=True, check=True
+        ).stdout
+        durations.append(float(output))
+    result = {"phase": "import", "iterations": iterations}
+    result.update(latency_summary(durations))
+    return result
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def wait_for(
+    client: httpx.Client, path: str, started: float, timeout: float, status_code: Optional[int] = 200
+) -> Optional[float]:
+    """Poll a path until it answers, with the status code unless None, return the seconds since start or None."""
+    while time.perf_counter() - started < timeout:
+        try:
+            response = client.get(path)
+            if status_code is None or response.status_code == status_code:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    return None
+
+
+def measure_cold_start(url: str, engine: str, warmup: bool, timeout: float) -> dict:
+    """Start a fresh server and time it until its first successful extraction."""
+    port = free_port()
+    env = dict(os.environ, OCR_ENGINE=engine, WARMUP_ENABLED=str(warmup).lower(), RESULT_CACHE_ENABLED="false")
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            # Liveness: the server answers, ready or not
+            listening = wait_for(client, "/readyz", started, timeout, status_code=None)
+            ready = wait_for(client, "/readyz", started, timeout)
+            request_started = time.perf_counter()
+            response = client.get("/api/v1/documents/extract-text", params={"file": url})
+            finished = time.perf_counter()
+    finally:
+        server.terminate()
+        server.wait()
+
+    def ms(seconds: Optional[float]) -> Optional[float]:
+        return round(seconds * 1000, 1) if seconds is not None else None
+
+    return {
+        "warmup": warmup,
+        "status_code": response.status_code,
+        "listening_ms": ms(listening),
+        "ready_ms": ms(ready),
+        "first_extraction_ms": ms(finished - started),
+        "first_request_ms": ms(finished - request_started),
+    }
+
+
+def summarize(runs: list, warmup: bool) -> dict:
+    """Median of each timing over the runs of one mode."""
+    result = {"phase": "cold_start", "warmup": warmup, "iterations": len(runs),
+              "errors": sum(1 for run in runs if run["status_code"] != 200)}
+    for key in ("listening_ms", "ready_ms", "first_extraction_ms", "first_request_ms"):
+        values = sorted(run[key] for run in runs if run[key] is not None)
+        result[key] = values[len(values) // 2] if values else None
+    return result
+
+
+def main(args: argparse.Namespace) -> None:
+    results = [measure_import(args.iterations)]
+    with OriginServer({"p1.pdf": make_pdf(pages=1)}) as origin:
+        for warmup in (False, True):
+            runs = [
+                measure_cold_start(origin.url("p1.pdf"), args.engine, warmup, args.timeout)
+                for _ in range(args.iterations)
+            ]
+            results.append(summarize(runs, warmup))
+    write_results("startup", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--engine", choices=["pdftotext", "pdfium"], default="pdftotext")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds allowed per server start")
+    parser.add_argument("--output", help="result file, defaults to benchmarks/results/startup-<commit>.json")
+    main(parser.parse_args())
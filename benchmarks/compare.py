@@ -0,0 +1,51 @@
+"""
+Compare two benchmark result files.
+
+Matches measurements by their identifying fields (component and document,
+or concurrency level) and prints the relative change of every latency,
+throughput and resource figure, flagging changes beyond --threshold.
+
+Usage:
+    python -m benchmarks.compare benchmarks/results/load-abc1234.json benchmarks/results/load-def5678.json
+"""
+import argparse
+import json
+from typing import Dict, Tuple
+
+# Fields identifying a measurement rather than measuring it
+KEY_FIELDS = ("component", "document", "concurrency", "mode", "engine")
+
+# Metrics where a higher value is an improvement
+HIGHER_IS_BETTER = ("throughput_rps",)
+
+
+def index_results(path: str) -> Dict[Tuple, dict]:
+    with open(path) as result_file:
+        results = json.load(result_file)["results"]
+    return {tuple((field, result.get(field)) for field in KEY_FIELDS if field in result): result for result in results}
+
+
+def main(args: argparse.Namespace) -> None:
+    baseline = index_results(args.baseline)
+    candidate = index_results(args.candidate)
+    for key, before in baseline.items():
+        after = candidate.get(key)
+        if after is None:
+            continue
+        label = " ".join(f"{field}={value}" for field, value in key)
+        for metric, old in before.items():
+            new = after.get(metric)
+            if metric in KEY_FIELDS or not isinstance(old, (int, float)) or not isinstance(new, (int, float)):
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = "  REGRESSION" if worse > args.threshold else ""
+            print(f"{label:40} {metric:22} {old:>12} -> {new:>12} {change:+7.1f}%{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change flagged as a regression")
+    main(parser.parse_args())
@@ -0,0 +1,248 @@
+"""Shared helpers for benchmarks: synthetic PDFs, a local origin server and result files."""
+import datetime
+import json
+import math
+import os
+import platform
+import resource
+import socket
+import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Corpus documents as (pages, lines per page), from a one-page notice to a long timetable
+CORPUS_SPEC = {
+    "p1": (1, 40),
+    "p1-dense": (1, 70),
+    "p10": (10, 40),
+    "p50": (50, 60),
+    "p200": (200, 60),
+}
+
+
+def make_pdf(pages: int = 1, lines_per_page: int = 40) -> bytes:
+    """
+    Build a minimal, valid text PDF with the requested number of pages.
+
+    Args:
+        pages: Number of pages to generate
+        lines_per_page: Number of text lines written on each page
+
+    Returns:
+        PDF document as bytes
+    """
+    objects: List[bytes] = []
+    page_ids = [4 + 2 * index for index in range(pages)]
+
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    for page_index, page_id in enumerate(page_ids):
+        text_ops = ["BT", "/F1 9 Tf", "11 TL", "36 800 Td"]
+        for line_index in range(lines_per_page):
+            text_ops.append(
+                f"({page_index * lines_per_page + line_index:05d} 12:{line_index % 60:02d}"
+                f"    IC {line_index % 9}    Lausanne    Renens VD, Morges    {line_index % 8}) '"
+            )
+        text_ops.append("ET")
+        stream = "\n".join(text_ops).encode()
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, xref_offset
+    )
+    return bytes(output)
+
+
+def build_corpus(names: Optional[Sequence[str]] = None) -> Dict[str, bytes]:
+    """
+    Generate the benchmark corpus, deterministic across runs.
+
+    Args:
+        names: Subset of CORPUS_SPEC to generate, defaults to all of it
+
+    Returns:
+        Mapping of file name to PDF bytes
+    """
+    return {
+        f"{name}.pdf": make_pdf(*CORPUS_SPEC[name])
+        for name in (names or CORPUS_SPEC)
+    }
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of the values, fraction between 0 and 1."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def latency_summary(latencies: Sequence[float]) -> Dict[str, float]:
+    """Summarize latencies in seconds as mean and p50/p95/p99/max in milliseconds."""
+    return {
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+def rss_mb() -> float:
+    """Return the current resident set size of this process in MiB."""
+    try:
+        with open("/proc/self/status") as status_file:
+            for line in status_file:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    # Peak instead of current where /proc is missing; ru_maxrss is in KiB on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(maxrss / (1024 * 1024 if platform.system() == "Darwin" else 1024), 1)
+
+
+def child_process_count() -> int:
+    """Return the number of live child processes of this process, 0 without /proc."""
+    pid = str(os.getpid())
+    count = 0
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return 0
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat_file:
+                # The parent pid follows the parenthesized command name
+                if stat_file.read().rsplit(")", 1)[1].split()[1] == pid:
+                    count += 1
+        except (OSError, IndexError):
+            continue
+    return count
+
+
+def environment() -> Dict[str, Optional[str]]:
+    """Describe the commit and machine results were measured on."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": str(os.cpu_count()),
+    }
+
+
+def write_results(benchmark: str, parameters: dict, results: list, output: Optional[str] = None) -> Path:
+    """
+    Print the results as JSON and write them next to earlier runs for comparison.
+
+    Args:
+        benchmark: Benchmark name, used in the file name
+        parameters: Command line parameters of the run
+        results: Measurements
+        output: File to write, defaults to results/<benchmark>-<commit>.json
+
+    Returns:
+        Path of the written file
+    """
+    document = {
+        "benchmark": benchmark,
+        "environment": environment(),
+        "parameters": parameters,
+        "results": results,
+    }
+    if output is None:
+        path = RESULTS_DIR / f"{benchmark}-{document['environment']['commit'] or 'unknown'}.json"
+    else:
+        path = Path(output)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, indent=2) + "\n")
+    print(json.dumps(document, indent=2))
+    return path
+
+
+class OriginServer:
+    """Threaded local HTTP server serving in-memory PDFs with an optional delay."""
+
+    def __init__(self, documents: Dict[str, bytes], delay: float = 0.0):
+        self.documents = documents
+        self.delay = delay
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, name: str) -> str:
+        return f"{self.base_url}/{name}"
+
+    def __enter__(self) -> "OriginServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body are separate writes, avoid Nagle adding a delayed-ACK stall
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def do_GET(self):
+                body = server.documents.get(self.path.lstrip("/"))
+                if server.delay:
+                    time.sleep(server.delay)
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "binary/octet-stream")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,128 @@
+"""
+Extract every PDF of a local directory to NDJSON.
+
+Documents are read from the filesystem through the file:// source adapter
+and extracted concurrently, one extraction per core by default. Each
+document produces one BatchItemResult line, in completion order, and the
+throughput is reported on stderr.
+
+Usage:
+    python cli.py /data/pdfs --output results.ndjson --jobs 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Optional, TextIO
+
+from app.config import get_settings
+from app.core.endpoint_controller import EndpointController
+from app.core.extraction_scheduler import ExtractionScheduler
+from app.core.pdf_fetcher import PDFFetcher
+from app.core.result_cache import get_result_cache
+from app.core.source_adapters import FileSourceAdapter, build_source_adapters
+from app.core.worker_pool import get_worker_pool
+from app.errors import describe_exception
+from app.schemas import BatchItemResult
+
+class Progress:
+    """Documents extracted so far and their rate."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.succeeded = 0
+        self.failed = 0
+        self.started_at = time.perf_counter()
+
+    @property
+    def done(self) -> int:
+        return self.succeeded + self.failed
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self.started_at
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        return (
+            f"{self.done}/{self.total} documents, {self.failed} failed, "
+            f"{elapsed:.1f}s, {rate:.1f} docs/sec"
+        )
+
+async def extract_documents(
+    controller: EndpointController,
+    urls: list,
+    output: TextIO,
+    jobs: int,
+    args: argparse.Namespace,
+    progress: Progress
+) -> None:
+    """Extract the documents with `jobs` concurrent extractions, writing each result as it completes."""
+    queue: asyncio.Queue = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+
+    async def work() -> None:
+        while not queue.empty():
+            url = queue.get_nowait()
+            try:
+                lines = await controller.process_pdf_async(
+                    url, args.first_page, args.last_page, args.per_page, args.engine
+                )
+                item = BatchItemResult(url=url, status_code=200, lines=lines)
+                progress.succeeded += 1
+            except Exception as e:
+                status_code, detail = describe_exception(e)
+                item = BatchItemResult(url=url, status_code=status_code, error=detail)
+                progress.failed += 1
+            output.write(json.dumps(item.model_dump(exclude_none=True), ensure_ascii=False) + "\n")
+
+    await asyncio.gather(*(work() for _ in range(jobs)))
+
+async def report_progress(progress: Progress, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        print(progress.report(), file=sys.stderr, flush=True)
+
+async def main(args: argparse.Namespace) -> int:
+    settings = get_settings().model_copy(update={"source_allowed_roots": [args.directory]})
+    files = FileSourceAdapter(settings.source_allowed_roots, settings.fetch_max_size)
+    urls = files.list_documents(args.directory, args.pattern)
+    jobs = args.jobs or os.cpu_count() or 1
+
+    controller = EndpointController(
+        scheduler=ExtractionScheduler(max_workers=jobs, max_queue=jobs),
+        sources=build_source_adapters(settings, PDFFetcher())
+    )
+    progress = Progress(len(urls))
+    reporter = asyncio.ensure_future(report_progress(progress, args.report_every)) if args.report_every else None
+    output: Optional[TextIO] = None
+    try:
+        output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        await extract_documents(controller, urls, output, jobs, args, progress)
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        if output is not None and output is not sys.stdout:
+            output.close()
+        if get_worker_pool.cache_info().currsize:
+            get_worker_pool().close()
+        result_cache = get_result_cache()
+        if result_cache is not None:
+            result_cache.close()
+
+    print(progress.report(), file=sys.stderr, flush=True)
+    return 1 if progress.failed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("directory", help="directory searched recursively for PDFs")
+    parser.add_argument("--output", help="NDJSON result file, defaults to stdout")
+    parser.add_argument("--pattern", default="*.pdf", help="file name pattern, case-insensitive")
+    parser.add_argument("--jobs", type=int, help="concurrent extractions, defaults to the number of cores")
+    parser.add_argument("--first-page", type=int, help="first page to extract from every document")
+    parser.add_argument("--last-page", type=int, help="last page to extract from every document")
+    parser.add_argument("--per-page", action="store_true", help="group the lines of each document by page")
+    parser.add_argument("--engine", choices=["pdftotext", "pdfium"], help="defaults to the ocr_engine setting")
+    parser.add_argument("--report-every", type=float, default=10.0,
+                        help="seconds between progress lines on stderr, 0 for the final line only")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -1,12 +1,88 @@
+import asyncio
+import signal
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
-from app.api.router import router
+from app.api.monitoring import router as monitoring_router, server_timing_middleware
+from app.api.router import get_endpoint_controller, get_job_manager, router
+from app.config import get_settings, reload_settings
+from app.core.extraction_scheduler import get_extraction_scheduler
+from app.core.http_client import get_http_client_pool
+from app.core.load_shedder import get_load_shedder
+from app.core.response_encoding import get_response_encoder
+from app.core.result_cache import get_result_cache
+from app.core.warmup import get_warm_up
+from app.core.worker_pool import get_worker_pool
+
+def reload_configuration() -> None:
+    """
+    Re-read the settings and rebuild the extraction pipeline, on SIGHUP.
+
+    Timeouts, limits, the scheduler, load shedding and response compression take effect
+    for new requests while in-flight ones finish on the old values; extraction jobs started
+    after the reload run on the rebuilt controller. Pool and cache sizes, and the job
+    workers, queue and store, need a restart.
+    """
+    reload_settings()
+    get_extraction_scheduler.cache_clear()
+    get_load_shedder.cache_clear()
+    get_response_encoder.cache_clear()
+    get_endpoint_controller.cache_clear()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm the pipeline up in the background at startup and release shared resources at shutdown.
+
+    /readyz reports ready once the warm-up succeeded, see WarmUp.
+    """
+    http_pool = get_http_client_pool()
+    settings = get_settings()
+    warm_up = get_warm_up()
+    warm_up_task = None
+    if settings.warmup_enabled:
+        uses_worker_pool = settings.ocr_worker_pool or settings.ocr_engine != "pdftotext"
+        warm_up_task = asyncio.create_task(warm_up.run(
+            settings, http_pool, get_endpoint_controller, get_worker_pool() if uses_worker_pool else None
+        ))
+    else:
+        warm_up.skip()
+    if settings.job_store_path:
+        # Fail the jobs a previous run left unfinished now, rather than on the first submission
+        await get_job_manager().start()
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGHUP, reload_configuration)
+        reload_on_sighup = True
+    except (NotImplementedError, RuntimeError, ValueError, AttributeError):
+        # No signals outside the main thread, nor SIGHUP on Windows
+        reload_on_sighup = False
+    yield
+    if warm_up_task is not None and not warm_up_task.done():
+        warm_up_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await warm_up_task
+    if reload_on_sighup:
+        loop.remove_signal_handler(signal.SIGHUP)
+    # Close only what was created, rather than building it to close it
+    if get_job_manager.cache_info().currsize:
+        await get_job_manager().aclose()
+    await http_pool.aclose()
+    if get_worker_pool.cache_info().currsize:
+        get_worker_pool().close()
+    if get_result_cache.cache_info().currsize and get_result_cache() is not None:
+        get_result_cache().close()
 
 # Create FastAPI app
 app = FastAPI(
     title="PDF Text Extraction API",
     description="Extract text from PDF files using OCR",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add routes
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
+app.include_router(monitoring_router)
+
+# Report per-stage durations in the Server-Timing header
+app.middleware("http")(server_timing_middleware)
@@ -1,6 +1,18 @@
 import pytest
 import json
 from pathlib import Path
+from app.api.router import get_endpoint_controller, get_job_manager
+from app.config import get_settings
+from app.core.extraction_scheduler import get_extraction_scheduler
+from app.core.extraction_engine import get_pdfium_engine
+from app.core.fetch_cache import get_fetch_cache
+from app.core.http_client import get_http_client_pool
+from app.core.load_shedder import get_load_shedder
+from app.core.metrics import get_metrics
+from app.core.response_encoding import get_response_encoder
+from app.core.result_cache import get_result_cache
+from app.core.warmup import get_warm_up
+from app.core.worker_pool import get_worker_pool
 
 # Constants
 TEST_DATA_DIR = Path(__file__).parent / "test_data"
@@ -19,4 +31,20 @@ def sample_pdf_content():
 
 @pytest.fixture
 def invalid_pdf_content():
-    return b"This is not a PDF file content" 
\ No newline at end of file
+    return b"This is not a PDF file content" 
+
+@pytest.fixture(autouse=True)
+def reset_shared_state():
+    """Drop application-wide singletons so every test builds its own."""
+    shared_getters = [
+        get_settings, get_http_client_pool, get_fetch_cache, get_result_cache,
+        get_extraction_scheduler, get_endpoint_controller, get_job_manager, get_metrics,
+        get_pdfium_engine, get_worker_pool, get_warm_up, get_load_shedder, get_response_encoder
+    ]
+    for getter in shared_getters:
+        getter.cache_clear()
+    yield
+    if get_worker_pool.cache_info().currsize:
+        get_worker_pool().close()
+    for getter in shared_getters:
+        getter.cache_clear()
@@ -0,0 +1,51 @@
+import pytest
+from pydantic import ValidationError
+from app.config import Settings, get_settings, reload_settings
+
+class TestSettings:
+    @pytest.fixture(autouse=True)
+    def workdir(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        return tmp_path
+
+    def test_defaults(self):
+        settings = Settings()
+        assert settings.fetch_connect_timeout == 5.0
+        assert settings.fetch_read_timeout == 10.0
+        assert settings.fetch_timeout == 30.0
+
+    def test_environment_is_loaded(self, monkeypatch):
+        monkeypatch.setenv("FETCH_TIMEOUT", "12.5")
+        monkeypatch.setenv("fetch_allowed_content_types", '["application/pdf"]')
+        settings = Settings()
+        assert settings.fetch_timeout == 12.5
+        assert settings.fetch_allowed_content_types == ["application/pdf"]
+
+    def test_env_file_is_loaded(self, workdir, monkeypatch):
+        (workdir / ".env").write_text("EXTRACTION_MAX_QUEUE=7\nOCR_TIMEOUT_MAX=90\n")
+        monkeypatch.setenv("OCR_TIMEOUT_MAX", "120")
+        settings = Settings()
+        assert settings.extraction_max_queue == 7
+        assert settings.ocr_timeout_max == 120.0
+
+    def test_reload_reads_changes(self, monkeypatch):
+        assert get_settings().batch_max_items == 100
+        monkeypatch.setenv("BATCH_MAX_ITEMS", "5")
+        assert get_settings().batch_max_items == 100
+
+        settings = reload_settings()
+        assert settings.batch_max_items == 5
+        assert get_settings() is settings
+
+    def test_invalid_reload_keeps_settings(self, monkeypatch):
+        settings = get_settings()
+        monkeypatch.setenv("BATCH_MAX_ITEMS", "many")
+        with pytest.raises(ValidationError):
+            reload_settings()
+        assert get_settings() is settings
+
+    @pytest.mark.parametrize("name,value", [("OCR_INPUT_MODE", "pipe"), ("OCR_ENGINE", "tesseract")])
+    def test_unknown_ocr_choice_is_rejected(self, monkeypatch, name, value):
+        monkeypatch.setenv(name, value)
+        with pytest.raises(ValidationError):
+            Settings()
@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from app.core.deadline import clear_deadline, deadline_budget, enforce_deadline, start_deadline, time_remaining
+from app.exceptions import DeadlineExceededError
+
+@pytest.fixture(autouse=True)
+def no_deadline_left():
+    yield
+    clear_deadline()
+
+class TestDeadline:
+    def test_no_deadline(self):
+        clear_deadline()
+        assert time_remaining() is None
+        assert deadline_budget(30.0) == 30.0
+
+    def test_budget_is_capped_by_time_left(self):
+        start_deadline(5.0)
+        assert 4.9 < deadline_budget(30.0) <= 5.0
+        assert deadline_budget(1.0) == 1.0
+
+    def test_passed_deadline_raises(self):
+        start_deadline(0.0)
+        with pytest.raises(DeadlineExceededError) as exc_info:
+            deadline_budget(30.0)
+        assert exc_info.value.details == {"timeout": 0.0}
+
+    @pytest.mark.asyncio
+    async def test_enforce_cancels_work(self):
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        start_deadline(0.02)
+        with pytest.raises(DeadlineExceededError):
+            async with enforce_deadline():
+                await work()
+        assert cancelled.is_set()
+
+    @pytest.mark.asyncio
+    async def test_enforce_without_deadline(self):
+        clear_deadline()
+        async with enforce_deadline():
+            await asyncio.sleep(0)
+
+    @pytest.mark.asyncio
+    async def test_tasks_inherit_deadline(self):
+        async def left():
+            return time_remaining()
+
+        start_deadline(10.0)
+        assert await asyncio.ensure_future(left()) > 9
@@ -1,13 +1,21 @@
+import asyncio
+import json
 from typing import Dict, Any
 import pytest
 from fastapi.testclient import TestClient
 from fastapi import status
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
+from app.config import get_settings
 from app.core.endpoint_controller import EndpointController
-from app.api.router import router as api_router
+from app.core.extraction_scheduler import ExtractionScheduler, get_extraction_scheduler
+from app.core.pdf_fetcher import PDFFetcher
+from app.core.text_line_formatter import TextLineFormatter
+from app.api.router import cancel_on_disconnect, router as api_router
+from main import app
 from app.exceptions import (
-    PDFFetchError, OCRError, TextFormattingError
+    PDFFetchError, PDFTimeoutError, OCRError, OCRExtractionError, TextFormattingError,
+    ExtractionQueueFullError, ClientDisconnectedError
 )
 
 class TestExtractEndpoint:
@@ -18,6 +26,11 @@ class TestExtractEndpoint:
         """Create a test client for the FastAPI application."""
         return TestClient(api_router, raise_server_exceptions=False)
 
+    @pytest.fixture
+    def app_client(self) -> TestClient:
+        """Create a test client for the full application, with HTTP exception handling."""
+        return TestClient(app, raise_server_exceptions=False)
+
     @pytest.fixture
     def mocked_components(self) -> Dict[str, Mock]:
         """Set up mock objects for all dependencies with default successful behavior."""
@@ -38,6 +51,8 @@ class TestExtractEndpoint:
             # Configure default successful behavior
             mock_pdf_fetcher.fetch_pdf.return_value = b"Sample PDF content"
             mock_ocr_processor.extract_text.return_value = "Sample extracted text"
+            mock_pdf_fetcher.fetch_pdf_async = AsyncMock(return_value=b"Sample PDF content")
+            mock_ocr_processor.extract_text_async = AsyncMock(return_value="Sample extracted text")
             mock_text_formatter.format_text.return_value = ["Line1", "Line2"]
             
             yield {
@@ -101,9 +116,9 @@ class TestExtractEndpoint:
         """Test error handling for various component failures."""
         # Setup mock to simulate failure
         if error_scenario["component"] == "pdf_fetcher":
-            mocked_components[error_scenario["component"]].fetch_pdf.side_effect = error_scenario["exception"]
+            mocked_components[error_scenario["component"]].fetch_pdf_async.side_effect = error_scenario["exception"]
         elif error_scenario["component"] == "ocr_processor":
-            mocked_components[error_scenario["component"]].extract_text.side_effect = error_scenario["exception"]
+            mocked_components[error_scenario["component"]].extract_text_async.side_effect = error_scenario["exception"]
         elif error_scenario["component"] == "text_formatter":
             mocked_components[error_scenario["component"]].format_text.side_effect = error_scenario["exception"]
         
@@ -123,6 +138,628 @@ class TestExtractEndpoint:
         test_client.get("/api/v1/documents/extract-text", params={"file": sample_url})
         
         # Verify that all components were called
-        mocked_components["pdf_fetcher"].fetch_pdf.assert_called_once_with(sample_url)
-        mocked_components["ocr_processor"].extract_text.assert_called_once()
-        mocked_components["text_formatter"].format_text.assert_called_once() 
\ No newline at end of file
+        mocked_components["pdf_fetcher"].fetch_pdf_async.assert_awaited_once_with(sample_url)
+        mocked_components["ocr_processor"].extract_text_async.assert_awaited_once()
+        mocked_components["text_formatter"].format_text.assert_called_once() 
+    def test_repeated_extraction_hits_cache(
+        self,
+        test_client: TestClient,
+        mocked_components: Dict[str, Mock],
+        sample_url: str
+    ):
+        """Test that identical PDF content skips OCR and formatting on the second request."""
+        first = test_client.get("/api/v1/documents/extract-text", params={"file": sample_url})
+        second = test_client.get("/api/v1/documents/extract-text", params={"file": sample_url})
+
+        assert first.json() == second.json() == ["Line1", "Line2"]
+        assert mocked_components["pdf_fetcher"].fetch_pdf_async.await_count == 2
+        mocked_components["ocr_processor"].extract_text_async.assert_awaited_once()
+        mocked_components["text_formatter"].format_text.assert_called_once()
+
+        stats = test_client.get("/api/v1/cache/stats").json()
+        assert stats["enabled"] is True
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_queue_full_returns_retry_after(
+        self,
+        app_client: TestClient,
+        mocked_components: Dict[str, Mock],
+        sample_url: str
+    ):
+        """Test that a rejected extraction is answered quickly with 503 and Retry-After."""
+        mocked_components["ocr_processor"].extract_text_async.side_effect = ExtractionQueueFullError(
+            "Extraction queue is full", details={"retry_after": 2}
+        )
+
+        response = app_client.get("/api/v1/documents/extract-text", params={"file": sample_url})
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers["Retry-After"] == "2"
+        assert response.json()["detail"]["code"] == "EXTRACTION_QUEUE_FULL_ERROR"
+
+    def test_saturated_pipeline_sheds_requests(
+        self,
+        app_client: TestClient,
+        mocked_components: Dict[str, Mock],
+        sample_url: str
+    ):
+        """Test that extractions are rejected before any work while the pipeline is saturated."""
+        scheduler = get_extraction_scheduler()
+        scheduler.in_flight = scheduler.max_workers
+        scheduler.queue_depth = scheduler.max_queue
+
+        response = app_client.get("/api/v1/documents/extract-text", params={"file": sample_url})
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers["Retry-After"] == "1"
+        assert response.json()["detail"]["code"] == "SERVICE_OVERLOADED_ERROR"
+        mocked_components["pdf_fetcher"].fetch_pdf_async.assert_not_called()
+
+    def test_scheduler_stats(
+        self,
+        test_client: TestClient,
+        mocked_components: Dict[str, Mock],
+        sample_url: str
+    ):
+        """Test that extractions are counted by the scheduler."""
+        test_client.get("/api/v1/documents/extract-text", params={"file": sample_url})
+
+        stats = test_client.get("/api/v1/scheduler/stats").json()
+        assert stats["admitted"] == 1
+        assert stats["in_flight"] == 0
+        assert stats["queue_depth"] == 0
+
+    def test_extract_page_range_per_page(
+        self,
+        test_client: TestClient,
+        mocked_components: Dict[str, Mock],
+        sample_url: str
+    ):
+        """Test that the page range reaches OCR and per-page results are returned as pages."""
+        mocked_components["text_formatter"].format_pages.return_value = [["Line1"], ["Line2"]]
+
+        response = test_client.get("/api/v1/documents/extract-text", params={
+            "file": sample_url, "first_page": 2, "last_page": 3, "per_page": True
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [["Line1"], ["Line2"]]
+        assert mocked_components["ocr_processor"].extract_text_async.await_args.args[1:] == (2, 3)
+        mocked_components["text_formatter"].format_text.assert_not_called()
+
+    def test_extract_columns_with_offsets(
+        self,
+        test_client: TestClient,
+        mocked_components: Dict[str, Mock],
+        sample_url: str
+    ):
+        """Test that layout options reach the formatter and TextLine records are returned."""
+        mocked_components["text_formatter"].format_text.return_value = [
+            {"page": 1, "line": 2, "cells": ["Tea", "2.50"]}
+        ]
+
+        response = test_client.get("/api/v1/documents/extract-text", params={
+            "file": sample_url, "columns": True, "offsets": True
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [{"page": 1, "line": 2, "cells": ["Tea", "2.50"]}]
+        assert mocked_components["text_formatter"].format_text.call_args.args[1:] == (True, True)
+
+    def test_extract_tables(
+        self,
+        test_client: TestClient,
+        mocked_components: Dict[str, Mock],
+        sample_url: str
+    ):
+        """Test that the table format rebuilds tables from pdftotext's word boxes."""
+        words = "".join(
+            f'<word xMin="{x}" yMin="{y}" xMax="{x + 20}" yMax="{y + 10}">{text}</word>'
+            for x, y, text in [(10, 10, "Time"), (100, 10, "Train"), (10, 30, "12:00"), (100, 30, "IC")]
+        )
+        ocr_processor = mocked_components["ocr_processor"]
+        ocr_processor.extract_bbox_async = AsyncMock(return_value=f"<doc><page>{words}</page></doc>")
+
+        response = test_client.get("/api/v1/documents/extract-text", params={
+            "file": sample_url, "format": "table", "first_page": 2, "last_page": 2
+        })
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [{"page": 2, "caption": [], "header": ["Time", "Train"], "rows": [["12:00", "IC"]]}]
+        assert ocr_processor.extract_bbox_async.await_args.args[1:] == (2, 2)
+        ocr_processor.extract_text_async.assert_not_called()
+
+    @pytest.fixture
+    def uploads(self, mocked_components: Dict[str, Mock]) -> Mock:
+        """Receive uploads with the real fetcher and fetch URLs serving the same PDF."""
+        pdf_fetcher = mocked_components["pdf_fetcher"]
+        pdf_fetcher.receive_pdf_async = PDFFetcher().receive_pdf_async
+        pdf_fetcher.fetch_pdf_async.return_value = b"%PDF-1.4 upload"
+        return mocked_components["ocr_processor"]
+
+    def test_upload_raw_body(self, test_client: TestClient, uploads: Mock):
+        """Test that a raw application/pdf body is extracted with the query options."""
+        response = test_client.post(
+            "/api/v1/documents/extract-text", params={"first_page": 2},
+            content=b"%PDF-1.4 upload", headers={"Content-Type": "application/pdf"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == ["Line1", "Line2"]
+        pdf_content, first_page, last_page = uploads.extract_text_async.await_args.args
+        assert (bytes(pdf_content), first_page, last_page) == (b"%PDF-1.4 upload", 2, None)
+
+    def test_upload_multipart_shares_cache_with_url(self, test_client: TestClient, uploads: Mock, sample_url: str):
+        """Test that an uploaded document and a URL serving the same bytes share the cached result."""
+        response = test_client.post(
+            "/api/v1/documents/extract-text", files={"file": ("doc.pdf", b"%PDF-1.4 upload", "application/pdf")}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        response = test_client.get("/api/v1/documents/extract-text", params={"file": sample_url})
+
+        assert response.json() == ["Line1", "Line2"]
+        assert uploads.extract_text_async.await_count == 1
+
+    @pytest.mark.parametrize("content, content_type, expected_status", [
+        (b"<html></html>", "application/pdf", status.HTTP_400_BAD_REQUEST),
+        (b"%PDF-1.4 upload", "text/plain", status.HTTP_400_BAD_REQUEST),
+        (b"%PDF-1.4 " + b"x" * 100, "application/pdf", status.HTTP_413_REQUEST_ENTITY_TOO_LARGE),
+    ])
+    def test_upload_rejected(
+        self,
+        app_client: TestClient,
+        uploads: Mock,
+        monkeypatch,
+        content: bytes,
+        content_type: str,
+        expected_status: int
+    ):
+        """Test that uploads get the content checks and size limit of fetched documents."""
+        monkeypatch.setattr(get_settings(), "fetch_max_size", 64)
+
+        response = app_client.post(
+            "/api/v1/documents/extract-text", content=content, headers={"Content-Type": content_type}
+        )
+
+        assert response.status_code == expected_status
+        uploads.extract_text_async.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_large_document_is_extracted_in_page_chunks(
+        self,
+        mocked_components: Dict[str, Mock],
+        sample_url: str,
+        monkeypatch
+    ):
+        """Test that page chunks are extracted separately and merged in page order."""
+        monkeypatch.setattr(get_settings(), "page_chunk_size", 2)
+        ocr_processor = mocked_components["ocr_processor"]
+        ocr_processor.count_pages_async = AsyncMock(return_value=5)
+
+        async def extract_range(pdf_content, first_page, last_page, engine=None, clean=True):
+            return "".join(f"Page{page}\f" for page in range(first_page, last_page + 1))
+
+        ocr_processor.extract_text_async.side_effect = extract_range
+        formatter = mocked_components["text_formatter"]
+        formatter.format_pages.side_effect = TextLineFormatter().format_pages
+
+        result = await EndpointController().process_pdf_async(sample_url, per_page=True)
+
+        assert result == [["Page1"], ["Page2"], ["Page3"], ["Page4"], ["Page5"]]
+        calls = ocr_processor.extract_text_async.await_args_list
+        assert sorted(call.args[1:] for call in calls) == [(1, 2), (3, 4), (5, 5)]
+        # Chunks are cleaned once joined, not one by one
+        assert all(call.kwargs["clean"] is False for call in calls)
+
+    @pytest.mark.asyncio
+    async def test_page_chunks_share_the_request_slot(
+        self,
+        mocked_components: Dict[str, Mock],
+        sample_url: str,
+        monkeypatch
+    ):
+        """Test that page chunks never queue, so a request cannot reject itself."""
+        monkeypatch.setattr(get_settings(), "page_chunk_size", 1)
+        scheduler = ExtractionScheduler(max_workers=2, max_queue=0)
+        ocr_processor = mocked_components["ocr_processor"]
+        ocr_processor.count_pages_async = AsyncMock(return_value=10)
+        peak = 0
+
+        async def extract_range(pdf_content, first_page, last_page, engine=None, clean=True):
+            nonlocal peak
+            peak = max(peak, scheduler.in_flight)
+            await asyncio.sleep(0.001)
+            return f"Page{first_page}\f"
+
+        ocr_processor.extract_text_async.side_effect = extract_range
+        mocked_components["text_formatter"].format_pages.side_effect = TextLineFormatter().format_pages
+
+        result = await EndpointController(scheduler=scheduler).process_pdf_async(sample_url, per_page=True)
+
+        assert result == [[f"Page{page}"] for page in range(1, 11)]
+        assert peak == 2
+        assert scheduler.stats()["rejected"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_page_chunk_cancels_the_others(
+        self,
+        mocked_components: Dict[str, Mock],
+        sample_url: str,
+        monkeypatch
+    ):
+        """Test that the first failing chunk fails the request and no further chunk runs."""
+        monkeypatch.setattr(get_settings(), "page_chunk_size", 1)
+        ocr_processor = mocked_components["ocr_processor"]
+        ocr_processor.count_pages_async = AsyncMock(return_value=10)
+        started, finished = [], []
+
+        async def extract_range(pdf_content, first_page, last_page, engine=None, clean=True):
+            started.append(first_page)
+            if first_page == 1:
+                raise OCRExtractionError("Text extraction failed")
+            await asyncio.sleep(0.01)
+            finished.append(first_page)
+            return f"Page{first_page}\f"
+
+        ocr_processor.extract_text_async.side_effect = extract_range
+        controller = EndpointController(scheduler=ExtractionScheduler(max_workers=2, max_queue=4))
+
+        with pytest.raises(OCRExtractionError):
+            await controller.process_pdf_async(sample_url)
+        await asyncio.sleep(0.05)
+
+        assert len(started) < 10
+        assert finished == []
+
+    @pytest.fixture
+    def streamed_lines(self, mocked_components: Dict[str, Mock]) -> Dict[str, Any]:
+        """Stream raw lines from the OCR mock through the real formatter."""
+        state = {"lines": ["Line1", "", "Line2"], "error": None}
+
+        async def iter_lines(pdf_content, first_page=None, last_page=None, engine=None):
+            for line in state["lines"]:
+                yield line
+            if state["error"] is not None:
+                raise state["error"]
+
+        mocked_components["ocr_processor"].iter_lines_async = iter_lines
+        mocked_components["text_formatter"].aiter_format = TextLineFormatter().aiter_format
+        return state
+
+    def test_extract_ndjson_stream(
+        self,
+        app_client: TestClient,
+        streamed_lines: Dict[str, Any],
+        sample_url: str
+    ):
+        """Test that lines are streamed as one JSON string per line."""
+        response = app_client.get(
+            "/api/v1/documents/extract-text", params={"file": sample_url, "format": "ndjson"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.text == '"Line1"\n"Line2"\n'
+
+    def test_extract_ndjson_error_before_first_line(
+        self,
+        app_client: TestClient,
+        mocked_components: Dict[str, Mock],
+        streamed_lines: Dict[str, Any],
+        sample_url: str
+    ):
+        """Test that a failure before streaming starts keeps its HTTP status."""
+        mocked_components["pdf_fetcher"].fetch_pdf_async.side_effect = PDFTimeoutError("timed out")
+
+        response = app_client.get(
+            "/api/v1/documents/extract-text", params={"file": sample_url, "format": "ndjson"}
+        )
+
+        assert response.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+
+    def test_extract_ndjson_error_mid_stream(
+        self,
+        app_client: TestClient,
+        streamed_lines: Dict[str, Any],
+        sample_url: str
+    ):
+        """Test that a failure after the first line ends the stream with an error record."""
+        streamed_lines["error"] = OCRExtractionError("Text extraction failed")
+
+        response = app_client.get(
+            "/api/v1/documents/extract-text", params={"file": sample_url, "format": "ndjson"}
+        )
+
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert records[:2] == ["Line1", "Line2"]
+        assert records[2]["error"]["code"] == "OCR_EXTRACTION_ERROR"
+
+    def test_extract_compressed_when_large(
+        self,
+        app_client: TestClient,
+        mocked_components: Dict[str, Mock],
+        sample_url: str
+    ):
+        """Test that large results are compressed with the accepted coding and small ones are not."""
+        lines = [f"Line {number}" for number in range(500)]
+        mocked_components["text_formatter"].format_text.return_value = lines
+
+        response = app_client.get(
+            "/api/v1/documents/extract-text", params={"file": sample_url},
+            headers={"Accept-Encoding": "gzip"}
+        )
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept, Accept-Encoding"
+        assert response.json() == lines
+        assert response.num_bytes_downloaded < len(json.dumps(lines)) / 4
+
+        mocked_components["pdf_fetcher"].fetch_pdf_async.return_value = b"Smaller PDF content"
+        mocked_components["text_formatter"].format_text.return_value = ["Line1", "Line2"]
+        response = app_client.get(
+            "/api/v1/documents/extract-text", params={"file": "http://example.com/small.pdf"},
+            headers={"Accept-Encoding": "gzip"}
+        )
+
+        assert "content-encoding" not in response.headers
+        assert response.content == b'["Line1","Line2"]'
+
+    def test_extract_msgpack(
+        self,
+        app_client: TestClient,
+        mocked_components: Dict[str, Mock],
+        sample_url: str
+    ):
+        """Test that msgpack is sent when the Accept header prefers it."""
+        msgpack = pytest.importorskip("msgpack")
+
+        response = app_client.get(
+            "/api/v1/documents/extract-text", params={"file": sample_url},
+            headers={"Accept": "application/x-msgpack"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/x-msgpack"
+        assert msgpack.unpackb(response.content) == ["Line1", "Line2"]
+
+    def test_extract_ndjson_stream_compressed(
+        self,
+        app_client: TestClient,
+        streamed_lines: Dict[str, Any],
+        sample_url: str
+    ):
+        """Test that the NDJSON stream is compressed with the accepted coding."""
+        response = app_client.get(
+            "/api/v1/documents/extract-text", params={"file": sample_url, "format": "ndjson"},
+            headers={"Accept-Encoding": "gzip"}
+        )
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text == '"Line1"\n"Line2"\n'
+
+    def test_extract_batch(
+        self,
+        app_client: TestClient,
+        mocked_components: Dict[str, Mock]
+    ):
+        """Test that a batch streams one record per distinct URL and isolates failures."""
+        good_url = "http://example.com/good.pdf"
+        bad_url = "http://example.com/bad.pdf"
+
+        async def fetch(url):
+            if url == bad_url:
+                raise PDFTimeoutError("PDF fetch operation timed out", {"url": url})
+            return b"Sample PDF content " + url.encode()
+
+        mocked_components["pdf_fetcher"].fetch_pdf_async = AsyncMock(side_effect=fetch)
+
+        response = app_client.post(
+            "/api/v1/documents/extract-text/batch",
+            json={"urls": [good_url, bad_url, good_url]}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/x-ndjson"
+        records = {record["url"]: record for record in map(json.loads, response.text.splitlines())}
+        assert records[good_url] == {"url": good_url, "status_code": 200, "lines": ["Line1", "Line2"]}
+        assert records[bad_url]["status_code"] == 504
+        assert records[bad_url]["error"]["code"] == "PDF_TIMEOUT_ERROR"
+        assert mocked_components["pdf_fetcher"].fetch_pdf_async.await_count == 2
+
+    def test_extract_batch_too_large(
+        self,
+        app_client: TestClient,
+        mocked_components: Dict[str, Mock]
+    ):
+        """Test that a batch above batch_max_items is rejected before processing."""
+        get_settings().batch_max_items = 2
+
+        response = app_client.post(
+            "/api/v1/documents/extract-text/batch",
+            json={"urls": [f"http://example.com/{i}.pdf" for i in range(3)]}
+        )
+
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert response.json()["detail"]["code"] == "BATCH_TOO_LARGE_ERROR"
+        mocked_components["pdf_fetcher"].fetch_pdf_async.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_batch_concurrency_limit(self, mocked_components: Dict[str, Mock]):
+        """Test that no more documents than the concurrency limit are processed at once."""
+        running = []
+        peak = []
+
+        async def fetch(url):
+            running.append(url)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(url)
+            return b"Sample PDF content " + url.encode()
+
+        mocked_components["pdf_fetcher"].fetch_pdf_async = AsyncMock(side_effect=fetch)
+        controller = EndpointController()
+
+        urls = [f"http://example.com/{i}.pdf" for i in range(6)]
+        results = [result async for result in controller.process_batch_async(urls, concurrency=2)]
+
+        assert sorted(url for url, _ in results) == sorted(urls)
+        assert max(peak) == 2
+
+    def test_extraction_job(
+        self,
+        mocked_components: Dict[str, Mock],
+        sample_url: str
+    ):
+        """Test that a submitted job can be polled until its lines are available."""
+        with TestClient(app) as client:
+            response = client.post("/api/v1/documents/extract-jobs", json={"url": sample_url})
+            assert response.status_code == status.HTTP_202_ACCEPTED
+            job_id = response.json()["id"]
+
+            for _ in range(100):
+                job = client.get(f"/api/v1/documents/extract-jobs/{job_id}").json()
+                if job["status"] in ("succeeded", "failed"):
+                    break
+
+        assert job["status"] == "succeeded"
+        assert job["lines"] == ["Line1", "Line2"]
+
+    def test_extraction_job_not_found(self, app_client: TestClient):
+        """Test that polling an unknown job returns 404."""
+        response = app_client.get("/api/v1/documents/extract-jobs/missing")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.json()["detail"]["code"] == "JOB_NOT_FOUND_ERROR"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_are_coalesced(self, mocked_components: Dict[str, Mock]):
+        """Test that concurrent requests for one URL share a single fetch and extraction."""
+        async def fetch(url):
+            await asyncio.sleep(0.01)
+            return b"Sample PDF content"
+
+        mocked_components["pdf_fetcher"].fetch_pdf_async = AsyncMock(side_effect=fetch)
+        controller = EndpointController()
+
+        results = await asyncio.gather(
+            *(controller.process_pdf_async("http://example.com/test.pdf") for _ in range(4))
+        )
+
+        assert results == [["Line1", "Line2"]] * 4
+        assert mocked_components["pdf_fetcher"].fetch_pdf_async.await_count == 1
+        assert mocked_components["ocr_processor"].extract_text_async.await_count == 1
+        assert controller.coalescing_stats()["coalesced"] == 3
+
+    @pytest.mark.asyncio
+    async def test_identical_content_from_different_urls_is_extracted_once(
+        self,
+        mocked_components: Dict[str, Mock]
+    ):
+        """Test that concurrent extractions of the same content share one pdftotext run."""
+        async def extract(pdf_content, first_page=None, last_page=None, engine=None, clean=True):
+            await asyncio.sleep(0.01)
+            return "Sample extracted text"
+
+        mocked_components["ocr_processor"].extract_text_async = AsyncMock(side_effect=extract)
+        controller = EndpointController()
+
+        await asyncio.gather(
+            controller.process_pdf_async("http://example.com/a.pdf"),
+            controller.process_pdf_async("http://mirror.example.com/a.pdf")
+        )
+
+        assert mocked_components["pdf_fetcher"].fetch_pdf_async.await_count == 2
+        assert mocked_components["ocr_processor"].extract_text_async.await_count == 1
+
+    def test_coalescing_stats(self, test_client: TestClient, mocked_components: Dict[str, Mock]):
+        """Test that the coalescing counters are reported."""
+        response = test_client.get("/api/v1/coalescing/stats")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"enabled": True, "executions": 0, "coalesced": 0, "in_flight": 0}
+
+    def test_metrics_and_server_timing(
+        self,
+        app_client: TestClient,
+        mocked_components: Dict[str, Mock],
+        sample_url: str
+    ):
+        """Test that stages are reported in Server-Timing and counted in /metrics."""
+        response = app_client.get("/api/v1/documents/extract-text", params={"file": sample_url})
+
+        stages = [entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")]
+        assert stages == ["fetch", "ocr", "format", "encode", "total"]
+
+        mocked_components["pdf_fetcher"].fetch_pdf_async.side_effect = PDFTimeoutError("timed out")
+        app_client.get("/api/v1/documents/extract-text", params={"file": "http://example.com/other.pdf"})
+
+        metrics = app_client.get("/metrics")
+        assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert 'pdf_stage_duration_seconds_count{stage="ocr"} 1' in metrics.text
+        assert 'pdf_errors_total{code="PDF_TIMEOUT_ERROR"} 1' in metrics.text
+
+    @pytest.mark.parametrize("params, headers, timeout_max", [
+        ({"timeout": 0.05}, {}, 300.0),
+        ({}, {"X-Request-Timeout": "0.05"}, 300.0),
+        ({"timeout": 60}, {}, 0.05),
+    ])
+    def test_deadline_cancels_extraction(
+        self,
+        app_client: TestClient,
+        mocked_components: Dict[str, Mock],
+        sample_url: str,
+        monkeypatch,
+        params,
+        headers,
+        timeout_max
+    ):
+        """Test that work past the request deadline is cancelled and reported as a timeout."""
+        monkeypatch.setattr(get_settings(), "request_timeout_max", timeout_max)
+        cancelled = []
+
+        async def fetch(url):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(url)
+                raise
+
+        mocked_components["pdf_fetcher"].fetch_pdf_async = AsyncMock(side_effect=fetch)
+        response = app_client.get(
+            "/api/v1/documents/extract-text", params={"file": sample_url, **params}, headers=headers
+        )
+
+        assert response.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+        assert response.json()["detail"]["code"] == "DEADLINE_EXCEEDED_ERROR"
+        assert cancelled == [sample_url]
+
+    def test_invalid_timeout(self, app_client: TestClient, sample_url: str):
+        """Test that non-positive timeouts are rejected."""
+        response = app_client.get("/api/v1/documents/extract-text", params={"file": sample_url, "timeout": 0})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    @pytest.mark.asyncio
+    async def test_client_disconnect_cancels_work(self):
+        """Test that the work of a request is cancelled once its client disconnects."""
+        messages = [{"type": "http.request", "body": b"", "more_body": False}, {"type": "http.disconnect"}]
+        request = Mock()
+
+        async def receive():
+            await asyncio.sleep(0.01)
+            return messages.pop(0)
+
+        request.receive = receive
+        cancelled = asyncio.Event()
+
+        async def work():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(ClientDisconnectedError):
+            await cancel_on_disconnect(request, work())
+        await asyncio.wait_for(cancelled.wait(), 1)
@@ -0,0 +1,24 @@
+from app.core.metrics import get_metrics
+from app.errors import describe_exception
+from app.exceptions import JobInterruptedError, PDFInvalidURLError
+
+class TestDescribeException:
+    def test_known_exception(self):
+        status_code, detail = describe_exception(PDFInvalidURLError("Invalid URL", {"url": "x"}))
+
+        assert status_code == 400
+        assert detail.code == "PDF_INVALID_URL_ERROR"
+        assert detail.message == "Invalid URL"
+        assert detail.details == {"url": "x"}
+
+    def test_unknown_exception_is_internal(self):
+        status_code, detail = describe_exception(ValueError("boom"))
+
+        assert status_code == 500
+        assert detail.code == "INTERNAL_SERVER_ERROR"
+        assert detail.details == {"error": "boom"}
+
+    def test_errors_are_not_counted(self):
+        describe_exception(JobInterruptedError("Interrupted"))
+
+        assert get_metrics().errors.value(code="JOB_INTERRUPTED_ERROR") == 0
@@ -0,0 +1,101 @@
+import shutil
+import pytest
+from unittest.mock import patch
+from app.core.extraction_engine import PdfiumEngine
+from app.core.ocr_processor import OCRProcessor
+from app.core.pdf_payload import PDFPayload
+from app.core.worker_pool import WorkerPool
+from app.exceptions import OCRExtractionError, OCRToolNotFoundError
+from benchmarks.support import CORPUS_SPEC, build_corpus, make_pdf
+
+requires_pdfium = pytest.mark.skipif(not PdfiumEngine.available(), reason="pypdfium2 is not installed")
+
+class TestPdfiumEngine:
+    @pytest.fixture
+    def engine(self):
+        worker_pool = WorkerPool(1, 0, 0)
+        yield PdfiumEngine(worker_pool)
+        worker_pool.close()
+
+    @requires_pdfium
+    def test_pages_end_with_form_feeds(self, engine):
+        text = engine.extract_text(make_pdf(pages=3, lines_per_page=2))
+        pages = text.split("\f")
+        assert len(pages) == 4 and pages[-1] == ""
+        assert pages[1].startswith("00002 12:00")
+
+    @requires_pdfium
+    @pytest.mark.asyncio
+    async def test_page_range(self, engine):
+        text = await engine.extract_text_async(make_pdf(pages=5, lines_per_page=1), 2, 3)
+        assert [page.split()[0] for page in text.split("\f")[:-1]] == ["00001", "00002"]
+
+    @requires_pdfium
+    def test_spooled_payload_is_read_in_place(self, engine):
+        pdf_data = make_pdf(pages=2, lines_per_page=1)
+        payload = PDFPayload(max_size=len(pdf_data), spool_size=0)
+        payload.write(pdf_data)
+
+        assert engine.extract_text(payload.seal()) == engine.extract_text(pdf_data)
+        payload.close()
+
+    @requires_pdfium
+    @pytest.mark.asyncio
+    async def test_warm_up_runs_in_every_worker(self):
+        worker_pool = WorkerPool(2, 0, 0)
+        try:
+            texts = await PdfiumEngine(worker_pool).warm_up_async(make_pdf())
+            assert len(texts) == 2 and texts[0] == texts[1]
+            assert worker_pool.stats()["jobs"] == 2
+        finally:
+            worker_pool.close()
+
+    @requires_pdfium
+    def test_invalid_pdf(self, engine):
+        with pytest.raises(OCRExtractionError) as exc_info:
+            engine.extract_text(b"%PDF-1.4 truncated")
+        assert exc_info.value.details["engine"] == "pdfium"
+
+    def test_missing_dependency(self, engine):
+        with patch("app.core.extraction_engine.importlib.util.find_spec", return_value=None):
+            with pytest.raises(OCRToolNotFoundError) as exc_info:
+                engine.extract_text(make_pdf())
+        assert exc_info.value.details["tool"] == "pypdfium2"
+
+class TestOCRProcessorEngines:
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            OCRProcessor(engine="tesseract")
+
+    @requires_pdfium
+    def test_engine_selected_per_call(self):
+        with patch("subprocess.run") as mock_run:
+            text = OCRProcessor(engine="pdftotext").extract_text(make_pdf(), engine="pdfium")
+        mock_run.assert_not_called()
+        assert text.startswith("00000 12:00")
+
+    @requires_pdfium
+    @pytest.mark.skipif(shutil.which("pdftotext") is None, reason="pdftotext is not installed")
+    @pytest.mark.parametrize("name", list(CORPUS_SPEC))
+    def test_engines_agree_on_corpus(self, name):
+        """Both engines produce the same words on every page of the corpus."""
+        pdf_data = build_corpus([name])[f"{name}.pdf"]
+        ocr_processor = OCRProcessor()
+
+        pdftotext_pages = ocr_processor.extract_text(pdf_data, engine="pdftotext").split("\f")
+        pdfium_pages = ocr_processor.extract_text(pdf_data, engine="pdfium").split("\f")
+
+        assert [page.split() for page in pdftotext_pages] == [page.split() for page in pdfium_pages]
+
+    @pytest.mark.skipif(shutil.which("pdftotext") is None, reason="pdftotext is not installed")
+    @pytest.mark.asyncio
+    async def test_pdftotext_from_worker_pool_reads_shared_path(self):
+        pdf_data = make_pdf(pages=3, lines_per_page=2)
+        worker_pool = WorkerPool(1, 0, 0)
+        try:
+            with patch("app.core.ocr_processor.get_worker_pool", return_value=worker_pool):
+                pooled = await OCRProcessor(engine="pdftotext", use_worker_pool=True).extract_text_async(pdf_data)
+            assert worker_pool.stats()["jobs"] == 1
+        finally:
+            worker_pool.close()
+        assert pooled == await OCRProcessor(engine="pdftotext", use_worker_pool=False).extract_text_async(pdf_data)
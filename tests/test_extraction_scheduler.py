@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+from app.config import Settings
+from app.core.deadline import clear_deadline, start_deadline
+from app.core.extraction_scheduler import ExtractionScheduler, build_extraction_scheduler
+from app.exceptions import DeadlineExceededError, ExtractionQueueFullError
+
+class TestExtractionScheduler:
+    @pytest.mark.asyncio
+    async def test_wait_stops_at_deadline(self):
+        scheduler = ExtractionScheduler(max_workers=1, max_queue=10)
+        release = asyncio.Event()
+
+        async def extraction():
+            async with scheduler.slot():
+                await release.wait()
+
+        running = asyncio.create_task(extraction())
+        await asyncio.sleep(0)
+        start_deadline(0.02)
+        try:
+            with pytest.raises(DeadlineExceededError):
+                async with scheduler.slot():
+                    pass
+        finally:
+            clear_deadline()
+        assert scheduler.stats()["queue_depth"] == 0
+
+        release.set()
+        await running
+
+    @pytest.mark.asyncio
+    async def test_limits_concurrent_extractions(self):
+        scheduler = ExtractionScheduler(max_workers=2, max_queue=10)
+        peak = 0
+
+        async def extraction():
+            nonlocal peak
+            async with scheduler.slot():
+                peak = max(peak, scheduler.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(extraction() for _ in range(6)))
+        assert peak == 2
+        assert scheduler.stats()["admitted"] == 6
+        assert scheduler.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_is_full(self):
+        scheduler = ExtractionScheduler(max_workers=1, max_queue=1, retry_after=3)
+        release = asyncio.Event()
+
+        async def extraction():
+            async with scheduler.slot():
+                await release.wait()
+
+        running = asyncio.create_task(extraction())
+        queued = asyncio.create_task(extraction())
+        await asyncio.sleep(0)
+        assert scheduler.stats()["queue_depth"] == 1
+
+        with pytest.raises(ExtractionQueueFullError) as exc_info:
+            async with scheduler.slot():
+                pass
+        assert exc_info.value.details["retry_after"] == 3
+        assert scheduler.stats()["rejected"] == 1
+
+        release.set()
+        await asyncio.gather(running, queued)
+        assert scheduler.stats()["wait_time_max"] > 0
+
+    @pytest.mark.asyncio
+    async def test_spare_slot_never_queues(self):
+        scheduler = ExtractionScheduler(max_workers=2, max_queue=4)
+        async with scheduler.slot():
+            async with scheduler.spare_slot() as taken:
+                assert taken is True
+                assert scheduler.in_flight == 2
+                async with scheduler.spare_slot() as taken_again:
+                    assert taken_again is False
+                    assert scheduler.stats()["queue_depth"] == 0
+        assert scheduler.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_slot_released_on_error(self):
+        scheduler = ExtractionScheduler(max_workers=1, max_queue=0)
+        with pytest.raises(RuntimeError):
+            async with scheduler.slot():
+                raise RuntimeError("pdftotext crashed")
+        async with scheduler.slot():
+            assert scheduler.in_flight == 1
+
+    def test_defaults_to_core_count(self, monkeypatch):
+        monkeypatch.setattr("app.core.extraction_scheduler.os.cpu_count", lambda: 6)
+        assert build_extraction_scheduler(Settings()).max_workers == 6
+        assert build_extraction_scheduler(Settings(extraction_max_workers=2)).max_workers == 2
@@ -0,0 +1,50 @@
+from unittest.mock import patch
+from app.config import Settings
+from app.core.fetch_cache import FetchCache, build_fetch_cache
+
+class TestFetchCache:
+    def test_stores_only_responses_with_validators(self):
+        fetch_cache = FetchCache(max_entries=4)
+        fetch_cache.store("http://example.com/a.pdf", b"A", {"Content-Type": "binary/octet-stream"})
+        fetch_cache.store("http://example.com/b.pdf", b"B", {"ETag": '"b"'})
+        assert fetch_cache.get("http://example.com/a.pdf") is None
+        assert fetch_cache.get("http://example.com/b.pdf").content == b"B"
+
+    def test_conditional_headers(self):
+        fetch_cache = FetchCache(max_entries=4)
+        fetch_cache.store("http://example.com/a.pdf", b"A", {
+            "ETag": '"a"', "Last-Modified": "Thu, 12 Dec 2024 08:00:00 GMT"
+        })
+        assert fetch_cache.get("http://example.com/a.pdf").conditional_headers() == {
+            "If-None-Match": '"a"',
+            "If-Modified-Since": "Thu, 12 Dec 2024 08:00:00 GMT",
+        }
+
+    def test_freshness_window(self):
+        fetch_cache = FetchCache(max_entries=4, max_age=30)
+        with patch("app.core.fetch_cache.time.monotonic", return_value=100.0):
+            fetch_cache.store("http://example.com/a.pdf", b"A", {})
+        document = fetch_cache.get("http://example.com/a.pdf")
+        with patch("app.core.fetch_cache.time.monotonic", return_value=120.0):
+            assert fetch_cache.is_fresh(document)
+        with patch("app.core.fetch_cache.time.monotonic", return_value=131.0):
+            assert not fetch_cache.is_fresh(document)
+
+    def test_revalidation_restarts_freshness_window(self):
+        fetch_cache = FetchCache(max_entries=4, max_age=30)
+        with patch("app.core.fetch_cache.time.monotonic", return_value=100.0):
+            fetch_cache.store("http://example.com/a.pdf", b"A", {"ETag": '"a"'})
+        document = fetch_cache.get("http://example.com/a.pdf")
+        with patch("app.core.fetch_cache.time.monotonic", return_value=200.0):
+            assert fetch_cache.revalidated(document) == b"A"
+        with patch("app.core.fetch_cache.time.monotonic", return_value=220.0):
+            assert fetch_cache.is_fresh(document)
+
+    def test_bounded_entries(self):
+        fetch_cache = FetchCache(max_entries=1)
+        fetch_cache.store("http://example.com/a.pdf", b"A", {"ETag": '"a"'})
+        fetch_cache.store("http://example.com/b.pdf", b"B", {"ETag": '"b"'})
+        assert fetch_cache.get("http://example.com/a.pdf") is None
+
+    def test_disabled_by_settings(self):
+        assert build_fetch_cache(Settings(fetch_cache_enabled=False)) is None
@@ -0,0 +1,96 @@
+import asyncio
+import pytest
+import httpx
+from app.config import Settings
+from app.core.http_client import HTTPClientPool
+
+class TestHTTPClientPool:
+    @pytest.fixture
+    def settings(self):
+        return Settings(http_max_connections=8, http_max_connections_per_host=2)
+
+    def test_client_is_reused(self, settings):
+        pool = HTTPClientPool(settings)
+        assert pool.client is pool.client
+
+    @pytest.mark.asyncio
+    async def test_close_releases_client(self, settings):
+        pool = HTTPClientPool(settings)
+        first_client = pool.client
+        await pool.aclose()
+        assert first_client.is_closed
+        assert pool.client is not first_client
+
+    def test_http2_requires_h2(self, settings, monkeypatch):
+        monkeypatch.setattr("app.core.http_client.importlib.util.find_spec", lambda name: None)
+        assert HTTPClientPool(settings).http2_enabled is False
+
+    @pytest.mark.asyncio
+    async def test_per_host_limit(self, settings):
+        pool = HTTPClientPool(settings)
+        in_flight = {"example.com": 0, "other.com": 0}
+        peak = {"example.com": 0, "other.com": 0}
+
+        async def fetch(url, host):
+            async with pool.host_slot(url):
+                in_flight[host] += 1
+                peak[host] = max(peak[host], in_flight[host])
+                await asyncio.sleep(0.01)
+                in_flight[host] -= 1
+
+        await asyncio.gather(
+            *(fetch(f"http://example.com/{i}.pdf", "example.com") for i in range(6)),
+            *(fetch(f"http://other.com/{i}.pdf", "other.com") for i in range(6)),
+        )
+        assert peak == {"example.com": 2, "other.com": 2}
+
+    @pytest.mark.asyncio
+    async def test_idle_hosts_are_dropped(self, settings):
+        pool = HTTPClientPool(settings)
+        release = asyncio.Event()
+
+        async def fetch(url):
+            async with pool.host_slot(url):
+                await release.wait()
+
+        tasks = [asyncio.create_task(fetch(f"http://example.com/{i}.pdf")) for i in range(3)]
+        await asyncio.sleep(0)
+        assert pool.hosts == 1
+
+        # A request cancelled while waiting for a slot releases its hold on the host
+        tasks[-1].cancel()
+        release.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for i in range(100):
+            async with pool.host_slot(f"http://host{i}.example.com/a.pdf"):
+                pass
+
+        assert pool.hosts == 0
+
+    @pytest.mark.asyncio
+    async def test_stats_count_active_requests(self, settings):
+        pool = HTTPClientPool(settings)
+        release = asyncio.Event()
+
+        async def fetch(url):
+            async with pool.host_slot(url):
+                await release.wait()
+
+        tasks = [asyncio.create_task(fetch(f"http://example.com/{i}.pdf")) for i in range(3)]
+        tasks.append(asyncio.create_task(fetch("http://other.com/a.pdf")))
+        await asyncio.sleep(0)
+        stats = pool.stats()
+        release.set()
+        await asyncio.gather(*tasks)
+
+        assert stats["active"] == 3
+        assert stats["saturated_hosts"] == 1
+        assert pool.stats()["active"] == 0
+
+    @pytest.mark.asyncio
+    async def test_requests_go_through_transport(self, settings):
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, content=b"ok"))
+        pool = HTTPClientPool(settings, transport=transport)
+        response = await pool.client.get("http://example.com/test.pdf")
+        assert response.content == b"ok"
+        await pool.aclose()
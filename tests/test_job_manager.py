@@ -0,0 +1,281 @@
+import asyncio
+import json
+import time
+import pytest
+import httpx
+from unittest.mock import patch
+from app.api.router import get_endpoint_controller, get_job_manager
+from app.config import Settings
+from app.core.http_client import HTTPClientPool
+from app.core.job_manager import Job, JobManager, MemoryJobStore, SQLiteJobStore
+from app.core.metrics import get_metrics, start_server_timing
+from app.exceptions import ExtractionQueueFullError, JobNotFoundError, OCRExtractionError, PDFInvalidURLError
+from main import reload_configuration
+
+class TestJobManager:
+    @pytest.fixture
+    def calls(self):
+        return []
+
+    @pytest.fixture
+    def make_manager(self, calls):
+        def make(process=None, **kwargs):
+            async def extract(url, first_page=None, last_page=None, per_page=False, engine=None):
+                calls.append(url)
+                await asyncio.sleep(0)
+                return [f"Lines of {url}"]
+
+            options = dict(workers=2, max_pending=10, ttl=60)
+            options.update(kwargs)
+            manager = JobManager(
+                options.pop("store", MemoryJobStore()),
+                process or extract,
+                lambda e: {"code": type(e).__name__, "message": str(e), "details": None},
+                **options
+            )
+            return manager
+
+        return make
+
+    async def wait_finished(self, manager, job_id):
+        for _ in range(100):
+            job = manager.get(job_id)
+            if job.finished:
+                return job
+            await asyncio.sleep(0.01)
+        raise AssertionError("job did not finish")
+
+    @pytest.mark.asyncio
+    async def test_job_runs_in_background(self, make_manager):
+        manager = make_manager()
+        job = await manager.submit("http://example.com/a.pdf")
+        assert job.status == Job.QUEUED
+
+        job = await self.wait_finished(manager, job.id)
+        assert job.status == Job.SUCCEEDED
+        assert job.lines == ["Lines of http://example.com/a.pdf"]
+        await manager.aclose()
+
+    @pytest.mark.asyncio
+    async def test_failure_is_described(self, make_manager):
+        async def fail(url, **options):
+            raise OCRExtractionError("Text extraction failed")
+
+        manager = make_manager(process=fail)
+        job = await self.wait_finished(manager, (await manager.submit("http://example.com/a.pdf")).id)
+        assert job.status == Job.FAILED
+        assert job.error == {"code": "OCRExtractionError", "message": "Text extraction failed", "details": None}
+        await manager.aclose()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_submissions_are_coalesced(self, make_manager, calls):
+        manager = make_manager()
+        first = await manager.submit("http://example.com/a.pdf")
+        second = await manager.submit("http://example.com/a.pdf")
+        other_pages = await manager.submit("http://example.com/a.pdf", first_page=2)
+        assert second.id == first.id
+        assert other_pages.id != first.id
+
+        await self.wait_finished(manager, first.id)
+        await self.wait_finished(manager, other_pages.id)
+        assert calls == ["http://example.com/a.pdf"] * 2
+        await manager.aclose()
+
+    @pytest.mark.asyncio
+    async def test_queue_full(self, make_manager):
+        release = asyncio.Event()
+
+        async def block(url, **options):
+            await release.wait()
+            return []
+
+        manager = make_manager(process=block, workers=1, max_pending=1)
+        await manager.submit("http://example.com/a.pdf")
+        await asyncio.sleep(0)
+        await manager.submit("http://example.com/b.pdf")
+        with pytest.raises(ExtractionQueueFullError):
+            await manager.submit("http://example.com/c.pdf")
+        release.set()
+        await manager.aclose()
+
+    @pytest.mark.asyncio
+    async def test_finished_jobs_expire(self, make_manager):
+        manager = make_manager(ttl=0.2)
+        job = await self.wait_finished(manager, (await manager.submit("http://example.com/a.pdf")).id)
+        await asyncio.sleep(0.25)
+        with pytest.raises(JobNotFoundError):
+            manager.get(job.id)
+        await manager.aclose()
+
+    @pytest.mark.asyncio
+    async def test_unknown_job(self, make_manager):
+        with pytest.raises(JobNotFoundError):
+            make_manager().get("missing")
+
+    @pytest.mark.asyncio
+    async def test_webhook_receives_finished_job(self, make_manager):
+        delivered = []
+
+        def handler(request):
+            delivered.append(json.loads(request.content))
+            return httpx.Response(204)
+
+        http_pool = HTTPClientPool(Settings(), transport=httpx.MockTransport(handler))
+        manager = make_manager(http_pool=http_pool)
+        job = await manager.submit("http://example.com/a.pdf", webhook_url="http://hooks.example.com/done")
+        await self.wait_finished(manager, job.id)
+        await asyncio.sleep(0.01)
+
+        assert delivered[0]["id"] == job.id
+        assert delivered[0]["status"] == Job.SUCCEEDED
+        await manager.aclose()
+        await http_pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_invalid_webhook_url(self, make_manager):
+        with pytest.raises(PDFInvalidURLError):
+            await make_manager().submit("http://example.com/a.pdf", webhook_url="not a url")
+
+    @pytest.mark.asyncio
+    async def test_jobs_run_on_the_controller_rebuilt_on_reload(self, monkeypatch):
+        manager = get_job_manager()
+        reload_configuration()
+
+        async def extract(url, **options):
+            return [f"Reloaded {url}"]
+
+        monkeypatch.setattr(get_endpoint_controller(), "process_pdf_async", extract)
+        job = await manager.submit("http://example.com/a.pdf")
+
+        job = await self.wait_finished(manager, job.id)
+        assert job.lines == ["Reloaded http://example.com/a.pdf"]
+        await manager.aclose()
+
+    @pytest.mark.asyncio
+    async def test_jobs_do_not_report_to_the_submitting_request(self, make_manager):
+        async def extract(url, **options):
+            with get_metrics().stage("ocr"):
+                return ["Line1"]
+
+        manager = make_manager(process=extract)
+        timings = start_server_timing()
+        job = await manager.submit("http://example.com/a.pdf")
+
+        await self.wait_finished(manager, job.id)
+        assert timings == []
+        await manager.aclose()
+
+    @pytest.mark.asyncio
+    async def test_jobs_of_a_live_manager_sharing_the_store_are_kept(self, make_manager, tmp_path):
+        path = str(tmp_path / "jobs.db")
+        release = asyncio.Event()
+
+        async def extract(url, **options):
+            await release.wait()
+            return ["Line1"]
+
+        first = make_manager(process=extract, store=SQLiteJobStore(path), lease=0.1)
+        job = await first.submit("http://example.com/a.pdf")
+        second = make_manager(store=SQLiteJobStore(path), lease=0.1)
+        await second.start()
+
+        # The first manager keeps renewing the lease while the job runs past it
+        await asyncio.sleep(0.3)
+        assert second.get(job.id).status == Job.RUNNING
+
+        release.set()
+        assert (await self.wait_finished(second, job.id)).status == Job.SUCCEEDED
+        await first.aclose()
+        await second.aclose()
+
+    @pytest.mark.asyncio
+    async def test_jobs_of_a_stopped_manager_are_failed_once_their_lease_expires(self, make_manager, tmp_path):
+        path = str(tmp_path / "jobs.db")
+
+        async def hang(url, **options):
+            await asyncio.Event().wait()
+
+        first = make_manager(process=hang, store=SQLiteJobStore(path), lease=0.1)
+        job = await first.submit("http://example.com/a.pdf")
+        second = make_manager(store=SQLiteJobStore(path), lease=0.1)
+        await second.start()
+        await first.aclose()
+
+        job = await self.wait_finished(second, job.id)
+        assert job.status == Job.FAILED
+        assert job.error["code"] == "JobInterruptedError"
+        await second.aclose()
+
+    @pytest.mark.asyncio
+    async def test_jobs_interrupted_by_a_restart_are_failed(self, make_manager, tmp_path):
+        path = str(tmp_path / "jobs.db")
+        store = SQLiteJobStore(path)
+        queued = Job("http://example.com/a.pdf", {"per_page": False})
+        running = Job("http://example.com/b.pdf", {"per_page": False})
+        running.status = Job.RUNNING
+        store.put(queued)
+        store.put(running)
+        store.close()
+
+        manager = make_manager(store=SQLiteJobStore(path))
+        await manager.start()
+
+        for job_id in (queued.id, running.id):
+            job = manager.get(job_id)
+            assert job.status == Job.FAILED
+            assert job.error["code"] == "JobInterruptedError"
+            assert job.finished_at is not None
+        await manager.aclose()
+
+    @pytest.mark.asyncio
+    async def test_blocking_store_is_called_from_a_thread(self, make_manager, tmp_path):
+        manager = make_manager(store=SQLiteJobStore(str(tmp_path / "jobs.db")))
+
+        with patch("app.core.job_manager.asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+            job = await manager.submit("http://example.com/a.pdf")
+            await self.wait_finished(manager, job.id)
+            assert (await manager.get_async(job.id)).status == Job.SUCCEEDED
+
+        called = {call.args[0].__name__ for call in to_thread.call_args_list}
+        assert {"abandoned", "put", "get"} <= called
+        await manager.aclose()
+
+class TestSQLiteJobStore:
+    def test_round_trip_and_purge(self, tmp_path):
+        store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+        job = Job("http://example.com/a.pdf", {"per_page": False})
+        store.put(job)
+
+        job.status = Job.SUCCEEDED
+        job.lines = ["Line1"]
+        job.finished_at = time.time() - 10
+        store.put(job)
+
+        reopened = SQLiteJobStore(str(tmp_path / "jobs.db"))
+        assert reopened.get(job.id).to_dict() == job.to_dict()
+        assert reopened.purge(time.time()) == 1
+        assert reopened.get(job.id) is None
+        store.close()
+        reopened.close()
+
+    @pytest.mark.parametrize("make_store", [
+        lambda tmp_path: MemoryJobStore(), lambda tmp_path: SQLiteJobStore(str(tmp_path / "jobs.db"))
+    ])
+    def test_jobs_whose_lease_expired_are_abandoned(self, tmp_path, make_store):
+        store = make_store(tmp_path)
+        now = time.time()
+        leased = Job("http://example.com/a.pdf", {"per_page": False})
+        expired = Job("http://example.com/b.pdf", {"per_page": False})
+        unleased = Job("http://example.com/c.pdf", {"per_page": False})
+        store.put(leased, now + 10)
+        store.put(expired, now + 10)
+        store.put(unleased)
+
+        store.renew([expired.id], now - 1)
+
+        assert {job.id for job in store.abandoned(now)} == {expired.id, unleased.id}
+        expired.status = Job.FAILED
+        expired.finished_at = now
+        store.put(expired)
+        assert {job.id for job in store.abandoned(now)} == {unleased.id}
+        store.close()
@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from app.config import Settings
+from app.core.extraction_scheduler import ExtractionScheduler
+from app.core.http_client import HTTPClientPool
+from app.core.load_shedder import LoadShedder, build_load_shedder
+from app.core.metrics import get_metrics
+from app.exceptions import ServiceOverloadedError
+
+class TestLoadShedder:
+    @pytest.fixture
+    def http_pool(self):
+        return HTTPClientPool(Settings(http_max_connections=10, http_max_connections_per_host=10))
+
+    @pytest.mark.asyncio
+    async def test_saturated_once_workers_busy_and_queue_fills(self, http_pool):
+        scheduler = ExtractionScheduler(max_workers=1, max_queue=4)
+        shedder = LoadShedder(queue_ratio=0.5, http_ratio=1.0)
+        release = asyncio.Event()
+
+        async def extraction():
+            async with scheduler.slot():
+                await release.wait()
+
+        tasks = []
+        saturation = []
+        for _ in range(4):
+            tasks.append(asyncio.create_task(extraction()))
+            await asyncio.sleep(0)
+            saturation.append(shedder.saturation(shedder.load(scheduler, http_pool)))
+
+        # One running, then one, two and three waiting out of four
+        assert saturation == [[], [], ["extraction"], ["extraction"]]
+        release.set()
+        await asyncio.gather(*tasks)
+        assert shedder.saturation(shedder.load(scheduler, http_pool)) == []
+
+    @pytest.mark.asyncio
+    async def test_saturated_when_http_pool_is_in_use(self, http_pool):
+        scheduler = ExtractionScheduler(max_workers=1, max_queue=4)
+        shedder = LoadShedder(queue_ratio=1.0, http_ratio=0.5, retry_after=3)
+        release = asyncio.Event()
+
+        async def fetch(index):
+            async with http_pool.host_slot(f"http://example.com/{index}.pdf"):
+                await release.wait()
+
+        tasks = [asyncio.create_task(fetch(index)) for index in range(5)]
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(ServiceOverloadedError) as exc_info:
+                shedder.check(scheduler, http_pool)
+        finally:
+            release.set()
+            await asyncio.gather(*tasks)
+
+        assert exc_info.value.details["saturated"] == ["http"]
+        assert exc_info.value.details["retry_after"] == 3
+        assert exc_info.value.details["http"]["active"] == 5
+        assert get_metrics().requests_shed.value(reason="http") == 1
+        shedder.check(scheduler, http_pool)
+
+    def test_disabled_never_sheds(self, http_pool):
+        scheduler = ExtractionScheduler(max_workers=1, max_queue=0)
+        scheduler.in_flight = 1
+        shedder = build_load_shedder(Settings(load_shed_enabled=False))
+
+        shedder.check(scheduler, http_pool)
+        assert LoadShedder(0.5, 0.9).saturation(shedder.load(scheduler, http_pool)) == ["extraction"]
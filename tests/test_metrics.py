@@ -0,0 +1,68 @@
+import pytest
+from app.core.metrics import (
+    Counter, Gauge, Histogram, Metrics, server_timing_header, start_server_timing
+)
+
+class TestMetricTypes:
+    def test_counter_renders_labels(self):
+        counter = Counter("errors_total", "Errors.", ("code",))
+        counter.inc(code="PDF_TIMEOUT_ERROR")
+        counter.inc(2, code="PDF_TIMEOUT_ERROR")
+
+        assert counter.render() == [
+            "# HELP errors_total Errors.",
+            "# TYPE errors_total counter",
+            'errors_total{code="PDF_TIMEOUT_ERROR"} 3',
+        ]
+
+    def test_label_values_are_escaped(self):
+        counter = Counter("errors_total", "Errors.", ("code",))
+        counter.inc(code='a"b\\c')
+        assert counter.render()[-1] == 'errors_total{code="a\\"b\\\\c"} 1'
+
+    def test_wrong_labels_are_rejected(self):
+        with pytest.raises(ValueError):
+            Counter("errors_total", "Errors.", ("code",)).inc(stage="fetch")
+
+    def test_gauge_goes_up_and_down(self):
+        gauge = Gauge("in_flight", "In flight.")
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+        assert gauge.value() == 1
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("duration_seconds", "Duration.", buckets=(0.1, 1))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        assert histogram.render()[2:] == [
+            'duration_seconds_bucket{le="0.1"} 1',
+            'duration_seconds_bucket{le="1"} 2',
+            'duration_seconds_bucket{le="+Inf"} 3',
+            "duration_seconds_sum 5.55",
+            "duration_seconds_count 3",
+        ]
+
+class TestMetrics:
+    def test_stage_is_timed_and_reported_in_server_timing(self):
+        metrics = Metrics()
+        timings = start_server_timing()
+
+        with metrics.stage("fetch"):
+            assert metrics.stage_in_flight.value(stage="fetch") == 1
+
+        assert metrics.stage_in_flight.value(stage="fetch") == 0
+        assert metrics.stage_duration.count(stage="fetch") == 1
+        assert [name for name, _ in timings] == ["fetch"]
+
+    def test_render_includes_every_metric(self):
+        text = Metrics().render()
+        for name in ("pdf_stage_duration_seconds", "pdf_fetched_bytes_total", "pdf_pages",
+                     "ocr_tool_exits_total", "pdf_errors_total", "http_requests_in_flight"):
+            assert f"# TYPE {name} " in text
+
+    def test_server_timing_header(self):
+        header = server_timing_header([("ocr", 0.010), ("fetch", 0.002), ("ocr", 0.005)], 0.02)
+        assert header == "ocr;dur=15.0, fetch;dur=2.0, total;dur=20.0"
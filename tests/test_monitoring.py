@@ -0,0 +1,97 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from app.api.router import get_job_manager
+from app.config import get_settings
+from app.core.extraction_scheduler import get_extraction_scheduler
+from app.core.job_manager import Job, SQLiteJobStore
+from app.core.result_cache import get_result_cache
+from app.core.warmup import get_warm_up
+from app.core.worker_pool import get_worker_pool
+
+class TestReadinessEndpoint:
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    def test_not_ready_during_warm_up(self, client):
+        response = client.get("/readyz")
+
+        assert response.status_code == 503
+        assert response.json()["ready"] is False
+        assert response.json()["reasons"] == ["warm_up"]
+
+    def test_ready_once_warmed_up(self, client):
+        get_warm_up().skip()
+
+        response = client.get("/readyz")
+
+        assert response.status_code == 200
+        assert response.json()["ready"] is True
+        assert response.json()["load"]["extraction"]["in_flight"] == 0
+
+    def test_failed_step_is_reported(self, client):
+        warm_up = get_warm_up()
+        warm_up.skip()
+        warm_up.steps["pdftotext"] = {"ok": False, "required": True, "duration_ms": 1.0, "error": "OCR tool not found"}
+
+        response = client.get("/readyz")
+
+        assert response.status_code == 503
+        assert response.json()["reasons"] == ["pdftotext"]
+        assert response.json()["pdftotext"] is False
+        assert response.json()["steps"]["pdftotext"]["error"] == "OCR tool not found"
+
+    def test_ready_at_startup_without_warm_up(self, monkeypatch):
+        monkeypatch.setattr(get_settings(), "warmup_enabled", False)
+
+        with TestClient(app) as client:
+            response = client.get("/readyz")
+
+        assert response.status_code == 200
+
+    def test_saturated_extractions_are_not_ready(self, client):
+        get_warm_up().skip()
+        scheduler = get_extraction_scheduler()
+        scheduler.in_flight = scheduler.max_workers
+        scheduler.queue_depth = scheduler.max_queue
+
+        response = client.get("/readyz")
+
+        assert response.status_code == 503
+        assert response.json()["reasons"] == ["extraction"]
+        assert response.json()["load"]["extraction"]["queue_depth"] == scheduler.max_queue
+
+class TestLifespan:
+    def test_shutdown_closes_only_what_was_created(self, monkeypatch):
+        monkeypatch.setattr(get_settings(), "warmup_enabled", False)
+
+        with TestClient(app) as client:
+            client.get("/healthz")
+
+        assert get_job_manager.cache_info().currsize == 0
+        assert get_worker_pool.cache_info().currsize == 0
+        assert get_result_cache.cache_info().currsize == 0
+
+    def test_startup_fails_jobs_left_unfinished(self, monkeypatch, tmp_path):
+        path = str(tmp_path / "jobs.db")
+        store = SQLiteJobStore(path)
+        job = Job("http://example.com/a.pdf", {"per_page": False})
+        store.put(job)
+        store.close()
+        monkeypatch.setattr(get_settings(), "warmup_enabled", False)
+        monkeypatch.setattr(get_settings(), "job_store_path", path)
+
+        with TestClient(app) as client:
+            response = client.get(f"/api/v1/documents/extract-jobs/{job.id}")
+
+        assert response.json()["status"] == "failed"
+        assert response.json()["error"]["code"] == "JOB_INTERRUPTED_ERROR"
+
+class TestHealthEndpoint:
+    def test_alive_while_not_ready(self):
+        response = TestClient(app).get("/healthz")
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "alive"
+        assert response.json()["uptime"] >= 0
@@ -0,0 +1,48 @@
+import pytest
+from app.core.multipart_upload import iter_multipart_file
+from app.exceptions import PDFInvalidContentTypeError
+
+FORM = (
+    b'--abc\r\nContent-Disposition: form-data; name="note"\r\n\r\nhello\r\n'
+    b'--abc\r\nContent-Disposition: form-data; name="file"; filename="a.pdf"\r\n'
+    b"Content-Type: application/pdf\r\n\r\n%PDF-1.4\r\ndata\r\n"
+    b'--abc\r\nContent-Disposition: form-data; name="file"; filename="b.pdf"\r\n\r\nignored\r\n--abc--\r\n'
+)
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+async def collect(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+class TestIterMultipartFile:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("chunk_size", [1, 7, len(FORM)])
+    async def test_yields_first_file_field(self, chunk_size):
+        content = await collect(iter_multipart_file(chunked(FORM, chunk_size), "multipart/form-data; boundary=abc"))
+        assert content == b"%PDF-1.4\r\ndata"
+
+    @pytest.mark.asyncio
+    async def test_stops_reading_after_the_field(self):
+        received = []
+
+        async def body():
+            for chunk in [FORM[:200], b"never read"]:
+                received.append(chunk)
+                yield chunk
+
+        await collect(iter_multipart_file(body(), "multipart/form-data; boundary=abc"))
+        assert len(received) == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("content_type, body, message", [
+        ("multipart/form-data", FORM, "Missing multipart boundary"),
+        ("multipart/form-data; boundary=abc", FORM[:FORM.index(b"%PDF") + 4], "Incomplete multipart body"),
+        ("multipart/form-data; boundary=abc", FORM[:FORM.index(b"--abc", 10)] + b"--abc--\r\n", "No file in multipart body"),
+        ("multipart/form-data; boundary=xyz", FORM, "Invalid multipart body"),
+    ])
+    async def test_invalid_body(self, content_type, body, message):
+        with pytest.raises(PDFInvalidContentTypeError) as exc_info:
+            await collect(iter_multipart_file(chunked(body, 16), content_type))
+        assert exc_info.value.message == message
@@ -1,7 +1,10 @@
 import pytest
-from unittest.mock import patch, Mock
+from unittest.mock import AsyncMock, patch, Mock
+from app.config import get_settings
 from app.core.ocr_processor import OCRProcessor
-from app.exceptions import OCRToolNotFoundError, OCRExtractionError, OCRTimeoutError
+from app.core.pdf_payload import PDFPayload
+from app.exceptions import OCRToolNotFoundError, OCRExtractionError, OCRInvalidPageRangeError, OCRTimeoutError
+import asyncio
 import subprocess
 
 class TestOCRProcessor:
@@ -12,8 +15,8 @@ class TestOCRProcessor:
     def test_extract_text_from_valid_content(self, ocr_processor, sample_pdf_content):
         with patch('subprocess.run') as mock_run:
             mock_run.return_value = Mock(
-                stdout="Gare de Lausanne\nDestination\nVoie",
-                stderr="",
+                stdout=b"Gare de Lausanne\nDestination\nVoie",
+                stderr=b"",
                 returncode=0
             )
             result = ocr_processor.extract_text(sample_pdf_content)
@@ -30,7 +33,7 @@ class TestOCRProcessor:
             mock_run.side_effect = subprocess.CalledProcessError(
                 returncode=1,
                 cmd="pdftotext",
-                stderr="Syntax Error: Not a PDF file"
+                stderr=b"Syntax Error: Not a PDF file"
             )
             with pytest.raises(OCRExtractionError) as exc_info:
                 ocr_processor.extract_text(sample_pdf_content)
@@ -56,8 +59,8 @@ class TestOCRProcessor:
     def test_extract_text_preserves_structure(self, ocr_processor, sample_pdf_content, expected_json_data):
         with patch('subprocess.run') as mock_run:
             mock_run.return_value = Mock(
-                stdout="\n".join(expected_json_data),
-                stderr="",
+                stdout="\n".join(expected_json_data).encode(),
+                stderr=b"",
                 returncode=0
             )
             result = ocr_processor.extract_text(sample_pdf_content)
@@ -66,4 +69,255 @@ class TestOCRProcessor:
             # Check key structural elements
             assert any("Heure de départ" in line for line in lines)
             assert any("Destination" in line for line in lines)
-            assert any("Voie" in line for line in lines) 
\ No newline at end of file
+            assert any("Voie" in line for line in lines) 
+
+class TestOCRProcessorAsync:
+    @pytest.fixture
+    def ocr_processor(self):
+        return OCRProcessor()
+
+    @pytest.fixture
+    def mock_process(self):
+        process = Mock()
+        process.returncode = 0
+        process.communicate = AsyncMock(return_value=(b"Gare de Lausanne\nVoie\n", b""))
+        process.wait = AsyncMock(return_value=0)
+        with patch("asyncio.create_subprocess_exec", AsyncMock(return_value=process)):
+            yield process
+
+    @pytest.mark.asyncio
+    async def test_extract_text(self, ocr_processor, mock_process):
+        result = await ocr_processor.extract_text_async(b"%PDF-1.4 content")
+        assert result == "Gare de Lausanne\nVoie"
+
+    @pytest.mark.asyncio
+    async def test_extract_text_handles_empty_content(self, ocr_processor):
+        with pytest.raises(OCRExtractionError):
+            await ocr_processor.extract_text_async(b"")
+
+    @pytest.mark.asyncio
+    async def test_extract_text_handles_failure(self, ocr_processor, mock_process):
+        mock_process.returncode = 1
+        mock_process.communicate.return_value = (b"", b"Syntax Error: Not a PDF file")
+        with pytest.raises(OCRExtractionError) as exc_info:
+            await ocr_processor.extract_text_async(b"%PDF-1.4 content")
+        assert exc_info.value.details["return_code"] == 1
+
+    @pytest.mark.asyncio
+    async def test_extract_text_timeout_kills_process(self, ocr_processor, mock_process):
+        mock_process.communicate.side_effect = asyncio.TimeoutError()
+        with pytest.raises(OCRTimeoutError):
+            await ocr_processor.extract_text_async(b"%PDF-1.4 content")
+        mock_process.kill.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_cancellation_kills_process(self, ocr_processor, mock_process):
+        async def communicate(stdin):
+            await asyncio.sleep(10)
+
+        mock_process.returncode = None
+        mock_process.communicate.side_effect = communicate
+        extraction = asyncio.ensure_future(ocr_processor.extract_text_async(b"%PDF-1.4 content"))
+        await asyncio.sleep(0.01)
+        extraction.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await extraction
+        mock_process.kill.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_pdftotext_not_found(self, ocr_processor):
+        with patch("asyncio.create_subprocess_exec", AsyncMock(side_effect=FileNotFoundError())):
+            with pytest.raises(OCRToolNotFoundError):
+                await ocr_processor.extract_text_async(b"%PDF-1.4 content")
+
+
+class TestOCRProcessorInputModes:
+    @pytest.fixture
+    def cat_command(self):
+        """Replace pdftotext with cat so the child echoes the document it was given."""
+        with patch.object(OCRProcessor, "_build_command", lambda self, path, *page_range: ["cat", path]):
+            yield
+
+    @pytest.mark.parametrize("input_mode", ["memfd", "stdin", "tempfile", "auto"])
+    def test_child_reads_document(self, input_mode, cat_command):
+        ocr_processor = OCRProcessor(input_mode=input_mode)
+        assert ocr_processor.extract_text(b"%PDF-1.4 content") == "%PDF-1.4 content"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("input_mode", ["memfd", "stdin", "tempfile"])
+    async def test_child_reads_document_async(self, input_mode, cat_command):
+        ocr_processor = OCRProcessor(input_mode=input_mode)
+        assert await ocr_processor.extract_text_async(b"%PDF-1.4 content") == "%PDF-1.4 content"
+
+    def test_memfd_mode_passes_descriptor(self):
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = Mock(stdout=b"text", stderr=b"", returncode=0)
+            OCRProcessor(input_mode="memfd").extract_text(b"%PDF-1.4 content")
+
+        command = mock_run.call_args.args[0]
+        pass_fds = mock_run.call_args.kwargs["pass_fds"]
+        assert command[2] == f"/dev/fd/{pass_fds[0]}"
+        assert mock_run.call_args.kwargs["input"] is None
+
+    def test_stdin_mode_pipes_document(self):
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = Mock(stdout=b"text", stderr=b"", returncode=0)
+            OCRProcessor(input_mode="stdin").extract_text(b"%PDF-1.4 content")
+
+        assert mock_run.call_args.args[0][2] == "-"
+        assert bytes(mock_run.call_args.kwargs["input"]) == b"%PDF-1.4 content"
+
+    def test_spooled_payload_is_read_in_place(self):
+        payload = PDFPayload(max_size=100, spool_size=4)
+        payload.write(b"%PDF-1.4 content")
+        payload.seal()
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = Mock(stdout=b"text", stderr=b"", returncode=0)
+            OCRProcessor(input_mode="memfd").extract_text(payload)
+
+        assert mock_run.call_args.args[0][2] == payload.path
+        assert mock_run.call_args.kwargs["pass_fds"] == ()
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            OCRProcessor(input_mode="socket")
+
+
+class TestOCRProcessorPages:
+    @pytest.fixture
+    def ocr_processor(self):
+        return OCRProcessor(input_mode="memfd")
+
+    def test_page_range_is_passed_to_pdftotext(self, ocr_processor):
+        with patch('subprocess.run') as mock_run:
+            mock_run.return_value = Mock(stdout=b"Page2\fPage3\f", stderr=b"", returncode=0)
+            result = ocr_processor.extract_text(b"%PDF-1.4 content", first_page=2, last_page=3)
+
+        command = mock_run.call_args.args[0]
+        assert command[:6] == ["pdftotext", "-layout", "-f", "2", "-l", "3"]
+        assert result == "Page2\fPage3\f"
+
+    @pytest.mark.parametrize("first_page, last_page", [(0, None), (None, 0), (3, 2)])
+    def test_invalid_page_range(self, ocr_processor, first_page, last_page):
+        with pytest.raises(OCRInvalidPageRangeError):
+            ocr_processor.extract_text(b"%PDF-1.4 content", first_page, last_page)
+
+    def test_timeout_scales_with_page_range(self, ocr_processor, monkeypatch):
+        settings = get_settings()
+        monkeypatch.setattr(settings, "ocr_timeout_base", 10.0)
+        monkeypatch.setattr(settings, "ocr_timeout_per_page", 0.5)
+        monkeypatch.setattr(settings, "ocr_timeout_max", 60.0)
+
+        assert ocr_processor.timeout(b"%PDF-1.4", 1, 1) == 10.5
+        assert ocr_processor.timeout(b"%PDF-1.4", 11, 30) == 20.0
+        assert ocr_processor.timeout(b"%PDF-1.4", 1, 1000) == 60.0
+
+    def test_timeout_estimates_pages_without_last_page(self, ocr_processor, monkeypatch):
+        settings = get_settings()
+        monkeypatch.setattr(settings, "ocr_timeout_base", 10.0)
+        monkeypatch.setattr(settings, "ocr_timeout_per_page", 1.0)
+        monkeypatch.setattr(settings, "ocr_timeout_max", 60.0)
+        pdf = b"%PDF-1.4 << /Type /Pages >> " + b"<< /Type/Page >> " * 4
+
+        assert ocr_processor.timeout(pdf) == 14.0
+        assert ocr_processor.timeout(pdf, first_page=3) == 12.0
+        assert ocr_processor.timeout(b"%PDF-1.4 compressed") == 60.0
+
+    def test_scaled_timeout_is_passed_to_pdftotext(self, ocr_processor, monkeypatch):
+        monkeypatch.setattr(get_settings(), "ocr_timeout_per_page", 2.0)
+        with patch('subprocess.run') as mock_run:
+            mock_run.side_effect = subprocess.TimeoutExpired(cmd="pdftotext", timeout=1)
+            with pytest.raises(OCRTimeoutError) as exc_info:
+                ocr_processor.extract_text(b"%PDF-1.4 content", first_page=1, last_page=5)
+
+        expected = get_settings().ocr_timeout_base + 10.0
+        assert mock_run.call_args.kwargs["timeout"] == expected
+        assert exc_info.value.details["timeout"] == expected
+
+    @pytest.mark.asyncio
+    async def test_count_pages(self, ocr_processor):
+        process = Mock(returncode=0)
+        process.communicate = AsyncMock(return_value=(b"Producer: test\nPages:          12\n", b""))
+        with patch("asyncio.create_subprocess_exec", AsyncMock(return_value=process)) as mock_exec:
+            assert await ocr_processor.count_pages_async(b"%PDF-1.4 content") == 12
+        assert mock_exec.call_args.args[0] == "pdfinfo"
+
+    @pytest.mark.asyncio
+    async def test_extract_bbox_runs_pdftotext_bbox_layout(self, ocr_processor):
+        process = Mock(returncode=0)
+        process.communicate = AsyncMock(return_value=(b"<doc><page></page></doc>", b""))
+        with patch("asyncio.create_subprocess_exec", AsyncMock(return_value=process)) as mock_exec:
+            result = await ocr_processor.extract_bbox_async(b"%PDF-1.4 content", first_page=2, last_page=3)
+
+        assert mock_exec.call_args.args[:6] == ("pdftotext", "-bbox-layout", "-f", "2", "-l", "3")
+        assert result == "<doc><page></page></doc>"
+
+    @pytest.mark.asyncio
+    async def test_tool_version(self, ocr_processor):
+        process = Mock(returncode=0)
+        process.communicate = AsyncMock(return_value=(b"", b"pdftotext version 24.02.0\nCopyright 2005-2024\n"))
+        with patch("asyncio.create_subprocess_exec", AsyncMock(return_value=process)) as mock_exec:
+            assert await ocr_processor.tool_version_async() == "pdftotext version 24.02.0"
+        assert mock_exec.call_args.args == ("pdftotext", "-v")
+
+    @pytest.mark.asyncio
+    async def test_tool_version_tool_not_found(self, ocr_processor):
+        with patch("asyncio.create_subprocess_exec", AsyncMock(side_effect=FileNotFoundError())):
+            with pytest.raises(OCRToolNotFoundError):
+                await ocr_processor.tool_version_async()
+
+
+class TestOCRProcessorStreaming:
+    @pytest.fixture
+    def ocr_processor(self):
+        return OCRProcessor(input_mode="memfd")
+
+    def use_command(self, command):
+        return patch.object(OCRProcessor, "_build_command", lambda self, path, *page_range: command)
+
+    async def collect(self, lines):
+        return [line async for line in lines]
+
+    @pytest.mark.asyncio
+    async def test_yields_lines_as_written(self, ocr_processor):
+        with self.use_command(["printf", "Gare de Lausanne\\r\\n\\nVoie\\n"]):
+            lines = await self.collect(ocr_processor.iter_lines_async(b"%PDF-1.4 content"))
+        assert lines == ["Gare de Lausanne", "", "Voie"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("input_mode", ["stdin", "tempfile"])
+    async def test_reads_document_from_source(self, input_mode):
+        with self.use_command(["sh", "-c", 'cat "$0"', "-"]) if input_mode == "stdin" else \
+                patch.object(OCRProcessor, "_build_command", lambda self, path, *page_range: ["cat", path]):
+            lines = await self.collect(
+                OCRProcessor(input_mode=input_mode).iter_lines_async(b"%PDF-1.4\nline two\n")
+            )
+        assert lines == ["%PDF-1.4", "line two"]
+
+    @pytest.mark.asyncio
+    async def test_failure_after_partial_output(self, ocr_processor):
+        lines = []
+        with self.use_command(["sh", "-c", "echo partial; echo broken >&2; exit 3"]):
+            with pytest.raises(OCRExtractionError) as exc_info:
+                async for line in ocr_processor.iter_lines_async(b"%PDF-1.4 content"):
+                    lines.append(line)
+        assert lines == ["partial"]
+        assert exc_info.value.details["return_code"] == 3
+        assert "broken" in exc_info.value.details["stderr"]
+
+    @pytest.mark.asyncio
+    async def test_early_close_kills_process(self, ocr_processor):
+        spawned = []
+        create_subprocess_exec = asyncio.create_subprocess_exec
+
+        async def spawn(*args, **kwargs):
+            process = await create_subprocess_exec(*args, **kwargs)
+            spawned.append(process)
+            return process
+
+        with self.use_command(["yes", "line"]), patch("asyncio.create_subprocess_exec", spawn):
+            lines = ocr_processor.iter_lines_async(b"%PDF-1.4 content")
+            assert await lines.__anext__() == "line"
+            await lines.aclose()
+
+        assert spawned[0].returncode is not None
@@ -1,7 +1,15 @@
 import pytest
 from unittest.mock import patch, Mock
+from app.core.fetch_cache import FetchCache
+from app.core.http_client import HTTPClientPool
 from app.core.pdf_fetcher import PDFFetcher
-from app.exceptions import PDFInvalidURLError, PDFNetworkError, PDFInvalidContentTypeError, PDFTimeoutError
+from app.config import get_settings
+from app.exceptions import (
+    PDFInvalidURLError, PDFNetworkError, PDFInvalidContentTypeError, PDFTimeoutError, PDFTooLargeError
+)
+import asyncio
+import time
+import httpx
 import requests
 
 class TestPDFFetcher:
@@ -10,15 +18,15 @@ class TestPDFFetcher:
         return PDFFetcher()
 
     def test_fetch_valid_pdf(self, pdf_fetcher, sample_pdf_content):
-        with patch("app.core.pdf_fetcher.requests.get") as mock_get:
+        with patch("requests.get") as mock_get:
             mock_response = Mock()
-            mock_response.content = sample_pdf_content
+            mock_response.iter_content.return_value = [sample_pdf_content]
             mock_response.status_code = 200
             mock_response.headers = {"Content-Type": "binary/octet-stream"}
             mock_get.return_value = mock_response
 
             result = pdf_fetcher.fetch_pdf("http://example.com/test.pdf")
-            assert result == sample_pdf_content
+            assert bytes(result) == sample_pdf_content
 
     def test_fetch_invalid_url(self, pdf_fetcher):
         with pytest.raises(PDFInvalidURLError) as exc_info:
@@ -27,7 +35,7 @@ class TestPDFFetcher:
         assert "url" in exc_info.value.details
 
     def test_fetch_network_error(self, pdf_fetcher):
-        with patch("app.core.pdf_fetcher.requests.get") as mock_get:
+        with patch("requests.get") as mock_get:
             mock_get.side_effect = requests.RequestException("Network error")
             
             with pytest.raises(PDFNetworkError) as exc_info:
@@ -36,7 +44,7 @@ class TestPDFFetcher:
             assert "url" in exc_info.value.details
 
     def test_fetch_non_pdf_content(self, pdf_fetcher, invalid_pdf_content):
-        with patch("app.core.pdf_fetcher.requests.get") as mock_get:
+        with patch("requests.get") as mock_get:
             mock_response = Mock()
             mock_response.content = invalid_pdf_content
             mock_response.status_code = 200
@@ -49,7 +57,7 @@ class TestPDFFetcher:
             assert "content_type" in exc_info.value.details
 
     def test_fetch_server_error(self, pdf_fetcher):
-        with patch("app.core.pdf_fetcher.requests.get") as mock_get:
+        with patch("requests.get") as mock_get:
             mock_response = Mock()
             mock_response.status_code = 500
             mock_response.raise_for_status.side_effect = requests.HTTPError("500 Server Error")
@@ -60,10 +68,331 @@ class TestPDFFetcher:
             assert "Failed to fetch PDF" in str(exc_info.value)
 
     def test_fetch_timeout(self, pdf_fetcher):
-        with patch("app.core.pdf_fetcher.requests.get") as mock_get:
+        with patch("requests.get") as mock_get:
             mock_get.side_effect = requests.Timeout("Request timed out")
             
             with pytest.raises(PDFTimeoutError) as exc_info:
                 pdf_fetcher.fetch_pdf("http://example.com/test.pdf")
             assert "PDF fetch operation timed out" in str(exc_info.value)
-            assert "timeout" in exc_info.value.details 
\ No newline at end of file
+            assert "timeout" in exc_info.value.details 
+
+class TestPDFFetcherAsync:
+    @pytest.fixture
+    def responder(self):
+        """Holds the handler answering requests sent through the mock transport."""
+        return {"handler": lambda request: httpx.Response(
+            200, content=b"%PDF-1.4 content", headers={"Content-Type": "binary/octet-stream"}
+        )}
+
+    @pytest.fixture
+    def pdf_fetcher(self, responder):
+        transport = httpx.MockTransport(lambda request: responder["handler"](request))
+        return PDFFetcher(http_pool=HTTPClientPool(transport=transport))
+
+    @pytest.mark.asyncio
+    async def test_fetch_valid_pdf(self, pdf_fetcher):
+        result = await pdf_fetcher.fetch_pdf_async("http://example.com/test.pdf")
+        assert bytes(result) == b"%PDF-1.4 content"
+        assert result.path is None
+
+    @pytest.mark.asyncio
+    async def test_fetch_invalid_url(self, pdf_fetcher):
+        with pytest.raises(PDFInvalidURLError):
+            await pdf_fetcher.fetch_pdf_async("not-a-valid-url")
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("status_code", [301, 302])
+    async def test_fetch_follows_redirects(self, pdf_fetcher, responder, status_code):
+        pdf_response = responder["handler"]
+
+        def handler(request):
+            if request.url.path == "/moved.pdf":
+                return httpx.Response(status_code, headers={"Location": "http://cdn.example.com/test.pdf"})
+            return pdf_response(request)
+        responder["handler"] = handler
+
+        result = await pdf_fetcher.fetch_pdf_async("http://example.com/moved.pdf")
+        assert bytes(result) == b"%PDF-1.4 content"
+
+    @pytest.mark.asyncio
+    async def test_fetch_timeout(self, pdf_fetcher, responder):
+        def raise_timeout(request):
+            raise httpx.ReadTimeout("Request timed out", request=request)
+        responder["handler"] = raise_timeout
+
+        with pytest.raises(PDFTimeoutError) as exc_info:
+            await pdf_fetcher.fetch_pdf_async("http://example.com/test.pdf")
+        assert "timeout" in exc_info.value.details
+
+    @pytest.mark.asyncio
+    async def test_fetch_server_error(self, pdf_fetcher, responder):
+        responder["handler"] = lambda request: httpx.Response(500)
+
+        with pytest.raises(PDFNetworkError):
+            await pdf_fetcher.fetch_pdf_async("http://example.com/test.pdf")
+
+    @pytest.mark.asyncio
+    async def test_fetch_non_pdf_content(self, pdf_fetcher, responder):
+        responder["handler"] = lambda request: httpx.Response(
+            200, content=b"text", headers={"Content-Type": "text/plain"}
+        )
+
+        with pytest.raises(PDFInvalidContentTypeError):
+            await pdf_fetcher.fetch_pdf_async("http://example.com/not-pdf.txt")
+
+
+class TestPDFFetcherRevalidation:
+    @pytest.fixture
+    def origin(self):
+        """Origin answering 304 when the client presents the current ETag."""
+        state = {"requests": []}
+
+        def handler(request):
+            state["requests"].append(request)
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(
+                200,
+                content=b"%PDF-1.4 content",
+                headers={"Content-Type": "binary/octet-stream", "ETag": '"v1"'}
+            )
+
+        state["handler"] = handler
+        return state
+
+    def make_fetcher(self, origin, max_age=0.0):
+        transport = httpx.MockTransport(origin["handler"])
+        return PDFFetcher(
+            http_pool=HTTPClientPool(transport=transport),
+            fetch_cache=FetchCache(max_entries=4, max_age=max_age)
+        )
+
+    @pytest.mark.asyncio
+    async def test_not_modified_reuses_content(self, origin):
+        pdf_fetcher = self.make_fetcher(origin)
+        first = await pdf_fetcher.fetch_pdf_async("http://example.com/test.pdf")
+        second = await pdf_fetcher.fetch_pdf_async("http://example.com/test.pdf")
+
+        assert second is first
+        assert bytes(first) == b"%PDF-1.4 content"
+        assert "If-None-Match" not in origin["requests"][0].headers
+        assert origin["requests"][1].headers["If-None-Match"] == '"v1"'
+        assert pdf_fetcher.fetch_cache.revalidations == 1
+
+    @pytest.mark.asyncio
+    async def test_fresh_document_skips_network(self, origin):
+        pdf_fetcher = self.make_fetcher(origin, max_age=60)
+        await pdf_fetcher.fetch_pdf_async("http://example.com/test.pdf")
+        result = await pdf_fetcher.fetch_pdf_async("http://example.com/test.pdf")
+
+        assert bytes(result) == b"%PDF-1.4 content"
+        assert len(origin["requests"]) == 1
+        assert pdf_fetcher.fetch_cache.fresh_hits == 1
+
+    def test_sync_not_modified_reuses_content(self):
+        pdf_fetcher = PDFFetcher(fetch_cache=FetchCache(max_entries=4))
+        with patch("requests.get") as mock_get:
+            mock_get.return_value = Mock(
+                status_code=200,
+                iter_content=Mock(return_value=[b"%PDF-1.4 content"]),
+                headers={"Content-Type": "binary/octet-stream", "Last-Modified": "Thu, 12 Dec 2024 08:00:00 GMT"}
+            )
+            pdf_fetcher.fetch_pdf("http://example.com/test.pdf")
+
+            mock_get.return_value = Mock(status_code=304, headers={})
+            result = pdf_fetcher.fetch_pdf("http://example.com/test.pdf")
+
+        assert bytes(result) == b"%PDF-1.4 content"
+        assert mock_get.call_args.kwargs["headers"] == {
+            "If-Modified-Since": "Thu, 12 Dec 2024 08:00:00 GMT"
+        }
+
+
+class TestPDFFetcherStreaming:
+    @pytest.fixture
+    def settings(self, monkeypatch):
+        settings = get_settings()
+        monkeypatch.setattr(settings, "fetch_max_size", 64)
+        monkeypatch.setattr(settings, "fetch_spool_size", 16)
+        monkeypatch.setattr(settings, "fetch_chunk_size", 8)
+        return settings
+
+    def make_fetcher(self, handler):
+        return PDFFetcher(http_pool=HTTPClientPool(transport=httpx.MockTransport(handler)))
+
+    @pytest.mark.asyncio
+    async def test_large_pdf_is_spooled_to_disk(self, settings):
+        content = b"%PDF-1.4 " + b"x" * 40
+        pdf_fetcher = self.make_fetcher(lambda request: httpx.Response(
+            200, content=content, headers={"Content-Type": "application/pdf"}
+        ))
+        result = await pdf_fetcher.fetch_pdf_async("http://example.com/test.pdf")
+
+        assert result.path is not None
+        assert bytes(result) == content
+        assert len(result) == len(content)
+
+    @pytest.mark.asyncio
+    async def test_declared_length_over_limit_is_rejected(self, settings):
+        pdf_fetcher = self.make_fetcher(lambda request: httpx.Response(
+            200, content=b"%PDF-" + b"x" * 95,
+            headers={"Content-Type": "application/pdf", "Content-Length": "100"}
+        ))
+        with pytest.raises(PDFTooLargeError) as exc_info:
+            await pdf_fetcher.fetch_pdf_async("http://example.com/test.pdf")
+        assert exc_info.value.details["content_length"] == 100
+
+    @pytest.mark.asyncio
+    async def test_streamed_body_over_limit_is_aborted(self, settings):
+        async def endless_body():
+            yield b"%PDF-1.4"
+            while True:
+                yield b"x" * 8
+
+        pdf_fetcher = self.make_fetcher(lambda request: httpx.Response(
+            200, content=endless_body(), headers={"Content-Type": "application/pdf"}
+        ))
+        with pytest.raises(PDFTooLargeError):
+            await pdf_fetcher.fetch_pdf_async("http://example.com/test.pdf")
+
+    @pytest.mark.asyncio
+    async def test_non_pdf_body_is_rejected_on_first_chunk(self, settings):
+        chunks_sent = []
+
+        async def html_body():
+            for chunk in [b"<html>"] + [b"<p>text</p>"] * 10:
+                chunks_sent.append(chunk)
+                yield chunk
+
+        pdf_fetcher = self.make_fetcher(lambda request: httpx.Response(
+            200, content=html_body(), headers={"Content-Type": "binary/octet-stream"}
+        ))
+        with pytest.raises(PDFInvalidContentTypeError) as exc_info:
+            await pdf_fetcher.fetch_pdf_async("http://example.com/test.pdf")
+        assert exc_info.value.message == "Content is not a PDF"
+        assert len(chunks_sent) < 11
+
+    @pytest.mark.asyncio
+    async def test_total_timeout_bounds_slow_download(self, settings, monkeypatch):
+        monkeypatch.setattr(settings, "fetch_timeout", 0.05)
+
+        async def slow_body():
+            yield b"%PDF-1.4"
+            while True:
+                await asyncio.sleep(0.01)
+                yield b" "
+
+        pdf_fetcher = self.make_fetcher(lambda request: httpx.Response(
+            200, content=slow_body(), headers={"Content-Type": "application/pdf"}
+        ))
+        with pytest.raises(PDFTimeoutError) as exc_info:
+            await pdf_fetcher.fetch_pdf_async("http://example.com/test.pdf")
+        assert exc_info.value.details["timeout"] == 0.05
+
+    @pytest.mark.asyncio
+    async def test_total_timeout_bounds_wait_for_saturated_host(self, settings, monkeypatch):
+        monkeypatch.setattr(settings, "fetch_timeout", 0.05)
+        monkeypatch.setattr(settings, "http_max_connections_per_host", 1)
+        pdf_fetcher = self.make_fetcher(lambda request: httpx.Response(
+            200, content=b"%PDF-1.4", headers={"Content-Type": "application/pdf"}
+        ))
+        release = asyncio.Event()
+
+        async def hold_host():
+            async with pdf_fetcher.http_pool.host_slot("http://example.com/other.pdf"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold_host())
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(PDFTimeoutError):
+                await asyncio.wait_for(pdf_fetcher.fetch_pdf_async("http://example.com/test.pdf"), 1)
+        finally:
+            release.set()
+            await holder
+
+    def test_sync_total_timeout_bounds_slow_download(self, settings, monkeypatch):
+        monkeypatch.setattr(settings, "fetch_timeout", 0.02)
+
+        def slow_body(chunk_size):
+            yield b"%PDF-1.4"
+            while True:
+                time.sleep(0.01)
+                yield b" "
+
+        with patch("requests.get") as mock_get:
+            mock_get.return_value = Mock(
+                status_code=200,
+                headers={"Content-Type": "application/pdf"},
+                iter_content=slow_body
+            )
+            with pytest.raises(PDFTimeoutError):
+                PDFFetcher().fetch_pdf("http://example.com/test.pdf")
+
+        # Connecting and reading cannot take longer than the whole download
+        assert mock_get.call_args.kwargs["timeout"] == (0.02, 0.02)
+
+    def test_sync_fetch_streams_chunks(self, settings):
+        with patch("requests.get") as mock_get:
+            mock_get.return_value = Mock(
+                status_code=200,
+                headers={"Content-Type": "application/pdf"},
+                iter_content=Mock(return_value=[b"%PDF-1.4", b" content"])
+            )
+            result = PDFFetcher().fetch_pdf("http://example.com/test.pdf")
+
+        assert bytes(result) == b"%PDF-1.4 content"
+        assert mock_get.call_args.kwargs["stream"] is True
+        mock_get.return_value.close.assert_called_once()
+
+
+class TestPDFFetcherUpload:
+    @pytest.fixture
+    def settings(self, monkeypatch):
+        settings = get_settings()
+        monkeypatch.setattr(settings, "fetch_max_size", 64)
+        monkeypatch.setattr(settings, "fetch_spool_size", 16)
+        return settings
+
+    async def body(self, *chunks):
+        for chunk in chunks:
+            yield chunk
+
+    @pytest.mark.asyncio
+    async def test_raw_body_is_spooled(self, settings):
+        content = b"%PDF-1.4 " + b"x" * 40
+        result = await PDFFetcher().receive_pdf_async(self.body(content[:10], content[10:]), "application/pdf")
+
+        assert result.path is not None
+        assert bytes(result) == content
+
+    @pytest.mark.asyncio
+    async def test_multipart_file_field(self, settings):
+        form = (
+            b'--b\r\nContent-Disposition: form-data; name="file"; filename="a.pdf"\r\n\r\n'
+            b"%PDF-1.4 content\r\n--b--\r\n"
+        )
+        result = await PDFFetcher().receive_pdf_async(self.body(form[:30], form[30:]), "multipart/form-data; boundary=b")
+
+        assert bytes(result) == b"%PDF-1.4 content"
+
+    @pytest.mark.asyncio
+    async def test_declared_length_over_limit_is_rejected(self, settings):
+        with pytest.raises(PDFTooLargeError):
+            await PDFFetcher().receive_pdf_async(self.body(b"%PDF-1.4"), "application/pdf", "100")
+
+    @pytest.mark.asyncio
+    async def test_body_over_limit_is_aborted(self, settings):
+        with pytest.raises(PDFTooLargeError):
+            await PDFFetcher().receive_pdf_async(self.body(b"%PDF-1.4", b"x" * 64), "application/pdf")
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("content_type, body", [
+        ("text/html", b"%PDF-1.4"),
+        ("application/pdf", b"<html>"),
+        ("multipart/form-data", b"%PDF-1.4"),
+        ("multipart/form-data; boundary=b", b'--b\r\nContent-Disposition: form-data; name="x"\r\n\r\n1\r\n--b--\r\n'),
+    ])
+    async def test_invalid_upload(self, settings, content_type, body):
+        with pytest.raises(PDFInvalidContentTypeError):
+            await PDFFetcher().receive_pdf_async(self.body(body), content_type)
@@ -0,0 +1,100 @@
+import hashlib
+import pytest
+from app.core.pdf_payload import PDFPayload, shared_path
+from app.exceptions import PDFTooLargeError
+
+class TestPDFPayload:
+    def test_small_payload_stays_in_memory(self):
+        payload = PDFPayload(max_size=100, spool_size=50)
+        payload.write(b"%PDF-1.4 ")
+        payload.write(b"content")
+        assert payload.path is None
+        assert bytes(payload.getbuffer()) == b"%PDF-1.4 content"
+        assert payload.looks_like_pdf()
+
+    def test_large_payload_spills_to_disk(self):
+        payload = PDFPayload(max_size=100, spool_size=10)
+        payload.write(b"%PDF-1.4 ")
+        payload.write(b"content")
+        payload.seal()
+        assert payload.path is not None
+        with open(payload.path, "rb") as spooled:
+            assert spooled.read() == b"%PDF-1.4 content"
+        payload.close()
+
+    def test_digest_matches_content(self):
+        payload = PDFPayload.from_bytes(b"%PDF-1.4 content")
+        assert payload.digest().hexdigest() == hashlib.sha256(b"%PDF-1.4 content").hexdigest()
+
+    def test_head_is_sniffed_across_chunks(self):
+        payload = PDFPayload(max_size=100, spool_size=50)
+        payload.write(b"%P")
+        payload.write(b"DF-1.4")
+        assert payload.head == b"%PDF-"
+
+    def test_size_limit(self):
+        payload = PDFPayload(max_size=10, spool_size=5)
+        payload.write(b"%PDF-")
+        with pytest.raises(PDFTooLargeError) as exc_info:
+            payload.write(b"123456")
+        assert exc_info.value.details["max_size"] == 10
+
+    def test_file_is_mapped_in_place(self, tmp_path):
+        pdf_path = tmp_path / "document.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4 content")
+
+        payload = PDFPayload.from_path(str(pdf_path), max_size=100)
+
+        assert payload.path == str(pdf_path)
+        assert bytes(payload.getbuffer()) == b"%PDF-1.4 content"
+        assert payload.digest().hexdigest() == hashlib.sha256(b"%PDF-1.4 content").hexdigest()
+        assert payload.looks_like_pdf()
+        payload.close()
+        assert pdf_path.exists()
+
+    def test_mapped_file_size_limit(self, tmp_path):
+        pdf_path = tmp_path / "document.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4 content")
+        with pytest.raises(PDFTooLargeError):
+            PDFPayload.from_path(str(pdf_path), max_size=10)
+
+    def test_empty_file(self, tmp_path):
+        pdf_path = tmp_path / "empty.pdf"
+        pdf_path.write_bytes(b"")
+
+        payload = PDFPayload.from_path(str(pdf_path), max_size=10)
+
+        assert len(payload) == 0
+        assert not payload.looks_like_pdf()
+
+class TestSharedPath:
+    def test_content_in_memory_is_shared_without_a_named_file(self):
+        payload = PDFPayload(max_size=100, spool_size=100)
+        payload.write(b"%PDF-1.4 content")
+
+        with shared_path(payload.seal()) as pdf_path:
+            # Opened through the /proc entry as another process would
+            with open(pdf_path, "rb") as pdf_file:
+                assert pdf_file.read() == b"%PDF-1.4 content"
+
+    def test_bytes_are_shared(self):
+        with shared_path(b"%PDF-1.4 content") as pdf_path:
+            with open(pdf_path, "rb") as pdf_file:
+                assert pdf_file.read() == b"%PDF-1.4 content"
+
+    def test_spooled_payload_is_shared_in_place(self):
+        payload = PDFPayload(max_size=100, spool_size=4)
+        payload.write(b"%PDF-1.4 content")
+
+        with shared_path(payload.seal()) as pdf_path:
+            assert pdf_path == payload.path
+        payload.close()
+
+    def test_mapped_file_is_shared_in_place(self, tmp_path):
+        pdf_path = tmp_path / "document.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4 content")
+        payload = PDFPayload.from_path(str(pdf_path), max_size=100)
+
+        with shared_path(payload) as shared:
+            assert shared == str(pdf_path)
+        payload.close()
@@ -0,0 +1,153 @@
+import asyncio
+import gzip
+import json
+import zlib
+import pytest
+from app.config import Settings
+from app.core.response_encoding import (
+    JSON, MSGPACK, ResponseEncoder, build_response_encoder, parse_qualities
+)
+
+class TestResponseEncoder:
+    @pytest.fixture
+    def encoder(self):
+        return ResponseEncoder(min_size=16)
+
+    def test_parse_qualities(self):
+        assert parse_qualities("gzip, br;q=0.8 , zstd; q=0.5, deflate;q=oops") == {
+            "gzip": 1.0, "br": 0.8, "zstd": 0.5, "deflate": 0.0
+        }
+        assert parse_qualities(None) == {}
+
+    def test_negotiate_coding_prefers_highest_quality_then_server_order(self, encoder, monkeypatch):
+        monkeypatch.setattr(ResponseEncoder, "codings", property(lambda self: ["zstd", "br", "gzip"]))
+
+        assert encoder.negotiate_coding("gzip, deflate, br, zstd") == "zstd"
+        assert encoder.negotiate_coding("gzip, br;q=0.9") == "gzip"
+        assert encoder.negotiate_coding("x-gzip") == "gzip"
+        assert encoder.negotiate_coding("*;q=0.5, zstd;q=0") == "br"
+        assert encoder.negotiate_coding("deflate") is None
+        assert encoder.negotiate_coding("identity, gzip;q=0.5") is None
+        assert encoder.negotiate_coding(None) is None
+
+    def test_negotiate_coding_offers_only_installed_codings(self, encoder, monkeypatch):
+        monkeypatch.setattr("app.core.response_encoding._installed", lambda module: False)
+
+        assert encoder.codings == ["gzip"]
+        assert encoder.negotiate_coding("zstd, br, gzip;q=0.1") == "gzip"
+
+    def test_compression_disabled(self):
+        encoder = ResponseEncoder(compression_enabled=False)
+        assert encoder.negotiate_coding("gzip") is None
+
+    def test_negotiate_media_type(self, encoder):
+        pytest.importorskip("msgpack")
+
+        assert encoder.negotiate_media_type(None) == JSON
+        assert encoder.negotiate_media_type("*/*") == JSON
+        assert encoder.negotiate_media_type("application/x-msgpack") == MSGPACK
+        assert encoder.negotiate_media_type("application/vnd.msgpack, application/json;q=0.5") == MSGPACK
+        assert encoder.negotiate_media_type("application/x-msgpack, */*") == JSON
+        assert encoder.negotiate_media_type("application/x-msgpack;q=0.5, application/json") == JSON
+
+    def test_serialize(self, encoder):
+        lines = ["Gare de Lausanne", "Départ 12:04"]
+
+        body = encoder.serialize(lines)
+
+        assert json.loads(body) == lines
+        assert "Départ".encode("utf-8") in body
+        assert b", " not in body
+
+    def test_serialize_msgpack(self, encoder):
+        msgpack = pytest.importorskip("msgpack")
+        tables = [{"page": 1, "caption": [], "header": ["Heure"], "rows": [["12:04"]]}]
+
+        assert msgpack.unpackb(encoder.serialize(tables, MSGPACK)) == tables
+
+    @pytest.mark.parametrize("coding", ["gzip", "zstd", "br"])
+    def test_compress_round_trip(self, encoder, coding):
+        require(coding)
+        body = json.dumps([f"Line {number}" for number in range(1000)]).encode()
+
+        compressed = encoder.compress(body, coding)
+
+        assert len(compressed) < len(body) / 4
+        assert decompress(compressed, coding) == body
+
+    def test_unsupported_coding(self, encoder):
+        with pytest.raises(ValueError):
+            encoder.compressor("deflate")
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("coding", ["gzip", "zstd", "br"])
+    async def test_compress_stream_flushes_when_source_pauses(self, encoder, coding):
+        require(coding)
+        first_sent = asyncio.Event()
+
+        async def chunks():
+            for number in range(100):
+                yield f"Line {number}\n".encode()
+            await first_sent.wait()
+            yield b"Last line\n"
+
+        stream = encoder.compress_stream(chunks(), coding)
+        first = await stream.__anext__()
+        first_sent.set()
+        rest = [chunk async for chunk in stream]
+
+        # Everything the source had ready is decodable from the first chunk alone
+        assert decompress_partial(first, coding).endswith(b"Line 99\n")
+        body = decompress(first + b"".join(rest), coding)
+        assert body.endswith(b"Line 99\nLast line\n")
+        assert body.count(b"\n") == 101
+
+    @pytest.mark.asyncio
+    async def test_compress_stream_closes_source(self, encoder):
+        closed = asyncio.Event()
+
+        async def chunks():
+            try:
+                while True:
+                    yield b"Line\n"
+                    await asyncio.sleep(0)
+            finally:
+                closed.set()
+
+        stream = encoder.compress_stream(chunks(), "gzip")
+        await stream.__anext__()
+        await stream.aclose()
+
+        assert closed.is_set()
+
+    def test_build_from_settings(self):
+        encoder = build_response_encoder(Settings(
+            response_compression_min_size=4096, response_compression_enabled=False
+        ))
+
+        assert encoder.min_size == 4096
+        assert encoder.compression_enabled is False
+
+def require(coding: str) -> None:
+    """Skip unless the package compressing with the coding is installed."""
+    if coding != "gzip":
+        pytest.importorskip({"zstd": "zstandard", "br": "brotli"}[coding])
+
+def decompress(body: bytes, coding: str) -> bytes:
+    if coding == "gzip":
+        return gzip.decompress(body)
+    if coding == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    import brotli
+    return brotli.decompress(body)
+
+def decompress_partial(body: bytes, coding: str) -> bytes:
+    """Decompress the start of a stream that has not ended yet."""
+    if coding == "gzip":
+        return zlib.decompressobj(31).decompress(body)
+    if coding == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    import brotli
+    return brotli.Decompressor().process(body)
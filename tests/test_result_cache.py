@@ -0,0 +1,109 @@
+import asyncio
+import sqlite3
+import pytest
+from unittest.mock import patch
+from app.config import Settings
+from app.core.result_cache import (
+    MemoryCacheBackend, ResultCache, SQLiteCacheBackend, build_result_cache
+)
+
+class TestResultCache:
+    @pytest.fixture
+    def result_cache(self):
+        return ResultCache(MemoryCacheBackend(max_entries=2, ttl=60))
+
+    def test_key_depends_on_content_and_options(self):
+        key = ResultCache.make_key(b"%PDF-1.4 a", {"layout": True})
+        assert key == ResultCache.make_key(b"%PDF-1.4 a", {"layout": True})
+        assert key != ResultCache.make_key(b"%PDF-1.4 b", {"layout": True})
+        assert key != ResultCache.make_key(b"%PDF-1.4 a", {"layout": False})
+
+    def test_miss_then_hit(self, result_cache):
+        assert result_cache.get("key") is None
+        result_cache.set("key", ["Line1", "Line2"])
+        assert result_cache.get("key") == ["Line1", "Line2"]
+        assert result_cache.stats()["hits"] == 1
+        assert result_cache.stats()["misses"] == 1
+
+    def test_returned_lines_are_copies(self, result_cache):
+        result_cache.set("key", ["Line1"])
+        result_cache.get("key").append("Line2")
+        assert result_cache.get("key") == ["Line1"]
+
+    def test_lru_eviction(self, result_cache):
+        result_cache.set("a", ["A"])
+        result_cache.set("b", ["B"])
+        result_cache.get("a")
+        result_cache.set("c", ["C"])
+        assert result_cache.get("b") is None
+        assert result_cache.get("a") == ["A"]
+        assert result_cache.stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        result_cache = ResultCache(MemoryCacheBackend(max_entries=2, ttl=10))
+        with patch("app.core.result_cache.time.monotonic", return_value=100.0):
+            result_cache.set("key", ["Line1"])
+        with patch("app.core.result_cache.time.monotonic", return_value=111.0):
+            assert result_cache.get("key") is None
+        assert result_cache.stats()["evictions"] == 1
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        first = ResultCache(MemoryCacheBackend(2, 60), SQLiteCacheBackend(path, 10, 60))
+        first.set("key", ["Line1", "Line2"])
+        first.close()
+
+        second = ResultCache(MemoryCacheBackend(2, 60), SQLiteCacheBackend(path, 10, 60))
+        assert second.get("key") == ["Line1", "Line2"]
+        assert second.stats()["memory_entries"] == 1
+        second.close()
+
+    def test_disk_tier_evicts_least_recently_used(self, tmp_path):
+        disk = SQLiteCacheBackend(str(tmp_path / "cache.sqlite"), max_entries=2, ttl=60)
+        disk.set("a", ["A"])
+        disk.set("b", ["B"])
+        disk.set("c", ["C"])
+        assert len(disk) == 2
+        assert disk.get("a") is None
+        assert disk.evictions == 1
+        disk.close()
+
+    def test_disk_tier_reads_do_not_commit(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        disk = SQLiteCacheBackend(path, max_entries=2, ttl=60)
+        disk.set("a", ["A"])
+        disk.set("b", ["B"])
+        def accessed_at():
+            reader = sqlite3.connect(path)
+            try:
+                return reader.execute("SELECT accessed_at FROM extraction_results WHERE key = 'a'").fetchone()
+            finally:
+                reader.close()
+
+        written = accessed_at()
+        assert disk.get("a") == ["A"]
+        assert accessed_at() == written
+
+        # The pending access time still decides the next eviction
+        disk.set("c", ["C"])
+        assert disk.get("b") is None
+        assert disk.get("a") == ["A"]
+        disk.close()
+
+    @pytest.mark.asyncio
+    async def test_async_access_uses_a_thread_for_the_disk_tier(self, tmp_path):
+        disk = SQLiteCacheBackend(str(tmp_path / "cache.sqlite"), 10, 60)
+        result_cache = ResultCache(MemoryCacheBackend(2, 60), disk)
+
+        with patch("app.core.result_cache.asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+            await result_cache.set_async("key", ["Line1"])
+            result_cache.memory = MemoryCacheBackend(2, 60)
+            assert await result_cache.get_async("key") == ["Line1"]
+            assert await result_cache.get_async("key") == ["Line1"]
+
+        assert [call.args[0] for call in to_thread.call_args_list] == [disk.set, disk.get]
+        assert result_cache.stats()["hits"] == 2
+        result_cache.close()
+
+    def test_disabled_by_settings(self):
+        assert build_result_cache(Settings(result_cache_enabled=False)) is None
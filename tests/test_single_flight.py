@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+from app.core.single_flight import SingleFlight
+
+class TestSingleFlight:
+    @pytest.fixture
+    def flights(self):
+        return SingleFlight()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_call(self, flights):
+        calls = []
+
+        async def call():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return ["Line1"]
+
+        results = await asyncio.gather(*(flights.run("key", call) for _ in range(5)))
+
+        assert results == [["Line1"]] * 5
+        assert len(calls) == 1
+        assert flights.stats() == {"executions": 1, "coalesced": 4, "in_flight": 0}
+
+    @pytest.mark.asyncio
+    async def test_error_is_shared(self, flights):
+        async def call():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(flights.run("key", call) for _ in range(3)), return_exceptions=True)
+
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flights.executions == 1
+
+    @pytest.mark.asyncio
+    async def test_later_calls_run_again(self, flights):
+        async def call():
+            return 1
+
+        await flights.run("key", call)
+        await flights.run("key", call)
+        assert flights.stats() == {"executions": 2, "coalesced": 0, "in_flight": 0}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_others(self, flights):
+        async def call():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        first = asyncio.ensure_future(flights.run("key", call))
+        second = asyncio.ensure_future(flights.run("key", call))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        assert await second == "done"
+
+    @pytest.mark.asyncio
+    async def test_call_is_cancelled_when_every_caller_is(self, flights):
+        cancelled = asyncio.Event()
+
+        async def call():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        callers = [asyncio.ensure_future(flights.run("key", call)) for _ in range(2)]
+        await asyncio.sleep(0)
+        callers[0].cancel()
+        await asyncio.sleep(0)
+        assert not cancelled.is_set()
+
+        callers[1].cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert flights.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_caller_arriving_after_cancellation_starts_a_new_call(self, flights):
+        async def call():
+            await asyncio.sleep(0.01)
+            return "done"
+
+        caller = asyncio.ensure_future(flights.run("key", call))
+        await asyncio.sleep(0)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+
+        # The abandoned call may not have finished cancelling yet
+        assert await flights.run("key", call) == "done"
+        assert flights.stats() == {"executions": 2, "coalesced": 0, "in_flight": 0}
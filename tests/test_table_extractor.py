@@ -0,0 +1,64 @@
+import pytest
+from app.core.table_extractor import TableExtractor
+from app.exceptions import EmptyTextError, TextParsingError
+
+def word(x_min: float, y_min: float, x_max: float, text: str, height: float = 10) -> str:
+    return f'<word xMin="{x_min}" yMin="{y_min}" xMax="{x_max}" yMax="{y_min + height}">{text}</word>'
+
+def bbox_html(*pages: str) -> str:
+    """Wrap pages of words like pdftotext -bbox-layout does."""
+    body = "".join(
+        f'<page width="612" height="792"><flow><block><line>{words}</line></block></flow></page>'
+        for words in pages
+    )
+    return (
+        '<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" '
+        '"http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">\n'
+        f'<html xmlns="http://www.w3.org/1999/xhtml"><head><title></title></head><body><doc>{body}</doc></body></html>'
+    )
+
+TIMETABLE = "".join([
+    word(50, 10, 120, "Departures"),
+    word(50, 30, 80, "Time"), word(150, 30, 180, "Train"), word(250, 30, 290, "Platform"),
+    word(50, 50, 80, "12:00"), word(150, 50, 160, "IC"), word(163, 50, 170, "5"), word(250, 50, 255, "3"),
+    word(50, 71, 80, "12:30"), word(150, 70, 170, "IR"),
+])
+
+class TestTableExtractor:
+    @pytest.fixture
+    def table_extractor(self):
+        return TableExtractor()
+
+    def test_rebuilds_rows_and_columns(self, table_extractor):
+        tables = table_extractor.extract_tables(bbox_html(TIMETABLE))
+
+        assert tables == [{
+            "page": 1,
+            "caption": ["Departures"],
+            "header": ["Time", "Train", "Platform"],
+            "rows": [["12:00", "IC 5", "3"], ["12:30", "IR", ""]],
+        }]
+
+    def test_words_are_ordered_by_position(self, table_extractor):
+        shuffled = word(150, 30, 160, "B") + word(50, 50, 60, "C") + word(50, 30, 60, "A") + word(150, 50, 160, "D")
+
+        tables = table_extractor.extract_tables(bbox_html(shuffled))
+
+        assert tables[0]["header"] == ["A", "B"]
+        assert tables[0]["rows"] == [["C", "D"]]
+
+    def test_numbers_pages_and_skips_empty_ones(self, table_extractor):
+        tables = table_extractor.extract_tables(bbox_html(TIMETABLE, "", word(50, 10, 60, "End")), first_page=4)
+
+        assert [table["page"] for table in tables] == [4, 6]
+        assert tables[1] == {"page": 6, "caption": [], "header": ["End"], "rows": []}
+
+    def test_no_words(self, table_extractor):
+        with pytest.raises(EmptyTextError) as exc_info:
+            table_extractor.extract_tables(bbox_html("", ""))
+        assert exc_info.value.details["page_count"] == 2
+
+    @pytest.mark.parametrize("bbox_output", ["<doc><page>", '<doc><page><word xMin="a">x</word></page></doc>'])
+    def test_invalid_output(self, table_extractor, bbox_output):
+        with pytest.raises(TextParsingError):
+            table_extractor.extract_tables(bbox_output)
@@ -42,4 +42,81 @@ class TestTextLineFormatter:
     def test_format_handles_special_characters(self, text_formatter):
         input_text = "Line1 © ®\nLine2 € £\nLine3 → ←"
         result = text_formatter.format_text(input_text)
-        assert len(result) == 3 
\ No newline at end of file
+        assert len(result) == 3
+
+    def test_format_pages_splits_on_form_feeds(self, text_formatter):
+        input_text = "Page1 Line1\n\nPage1 Line2\fPage2 Line1\f"
+        result = text_formatter.format_pages(input_text)
+        assert result == [["Page1 Line1", "Page1 Line2"], ["Page2 Line1"]]
+
+    def test_format_pages_keeps_empty_pages(self, text_formatter):
+        result = text_formatter.format_pages("Page1\f\fPage3\f")
+        assert result == [["Page1"], [], ["Page3"]]
+
+    def test_format_pages_without_form_feed(self, text_formatter):
+        assert text_formatter.format_pages("Line1\nLine2") == [["Line1", "Line2"]]
+
+    def test_format_pages_only_blank_pages(self, text_formatter):
+        with pytest.raises(EmptyTextError) as exc_info:
+            text_formatter.format_pages("  \f \n\f")
+        assert exc_info.value.details["page_count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_aiter_format_streams_non_empty_lines(self, text_formatter):
+        async def lines():
+            for line in ["  Line1 ", "", "\fLine2", "   "]:
+                yield line
+
+        result = [line async for line in text_formatter.aiter_format(lines())]
+        assert result == ["Line1", "Line2"]
+
+    @pytest.mark.asyncio
+    async def test_aiter_format_only_blank_lines(self, text_formatter):
+        async def lines():
+            for line in ["", "  "]:
+                yield line
+
+        with pytest.raises(EmptyTextError) as exc_info:
+            [line async for line in text_formatter.aiter_format(lines())]
+        assert exc_info.value.details["line_count"] == 2
+
+    def test_split_columns_at_gutters(self, text_formatter):
+        assert text_formatter.split_columns("12:00  IC 5   Lausanne\tRenens VD") == [
+            "12:00", "IC 5", "Lausanne", "Renens VD"
+        ]
+        assert TextLineFormatter(column_gap=3).split_columns("a  b   c") == ["a  b", "c"]
+
+    def test_format_text_columns(self, text_formatter):
+        result = text_formatter.format_text("Name   Price\n\n  Tea    2.50  ", columns=True)
+        assert result == [["Name", "Price"], ["Tea", "2.50"]]
+
+    def test_format_text_offsets_across_pages(self, text_formatter):
+        result = text_formatter.format_text("Title\n\nBody\fNext  page\n\f", offsets=True)
+        assert result == [
+            {"page": 1, "line": 1, "text": "Title"},
+            {"page": 1, "line": 3, "text": "Body"},
+            {"page": 2, "line": 1, "text": "Next  page"},
+        ]
+
+    def test_format_pages_columns_and_offsets(self, text_formatter):
+        result = text_formatter.format_pages("a  b\f\fc\f", columns=True, offsets=True)
+        assert result == [
+            [{"page": 1, "line": 1, "cells": ["a", "b"]}],
+            [],
+            [{"page": 3, "line": 1, "cells": ["c"]}],
+        ]
+
+    def test_iter_format_is_lazy(self, text_formatter):
+        raw_lines = iter(["a", "b  c", "d"])
+        formatted = text_formatter.iter_format(raw_lines, columns=True)
+        assert next(formatted) == ["a"]
+        assert next(raw_lines) == "b  c"
+
+    @pytest.mark.asyncio
+    async def test_aiter_format_offsets(self, text_formatter):
+        async def lines():
+            for line in ["x  y", "", "\fz"]:
+                yield line
+
+        result = [line async for line in text_formatter.aiter_format(lines(), offsets=True)]
+        assert result == [{"page": 1, "line": 1, "text": "x  y"}, {"page": 2, "line": 1, "text": "z"}]
@@ -0,0 +1,90 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+import pytest
+from app.config import get_settings
+from app.core.warmup import WarmUp
+from app.core.worker_pool import WorkerPool
+from app.exceptions import OCRToolNotFoundError
+
+class TestWarmUp:
+    @pytest.fixture
+    def http_pool(self):
+        return Mock(start=AsyncMock())
+
+    @pytest.fixture
+    def ocr_processor(self):
+        ocr_processor = Mock()
+        ocr_processor.tool_version_async = AsyncMock(return_value="pdftotext version 24.02.0")
+        ocr_processor.extract_text_async = AsyncMock(return_value="warm-up\f")
+        ocr_processor.warm_up_workers_async = AsyncMock(return_value=["warm-up\f"] * 3)
+        with patch("app.core.warmup.OCRProcessor", return_value=ocr_processor):
+            yield ocr_processor
+
+    @pytest.mark.asyncio
+    async def test_ready_after_every_step(self, http_pool, ocr_processor):
+        warm_up = WarmUp()
+        build_controller = Mock()
+
+        assert not warm_up.ready
+        assert await warm_up.run(get_settings(), http_pool, build_controller)
+
+        http_pool.start.assert_awaited_once()
+        build_controller.assert_called_once()
+        ocr_processor.extract_text_async.assert_awaited_once_with(WarmUp.DOCUMENT)
+        status = warm_up.status()
+        assert list(status["steps"]) == ["http_pool", "controller", "pdftotext", "extraction"]
+        assert status["steps"]["pdftotext"]["detail"] == "pdftotext version 24.02.0"
+        assert status["warm_up_ms"] is not None
+
+    @pytest.mark.asyncio
+    async def test_missing_pdftotext_is_not_ready(self, http_pool, ocr_processor):
+        ocr_processor.tool_version_async.side_effect = OCRToolNotFoundError(
+            message="OCR tool not found", details={"tool": "pdftotext"}
+        )
+        warm_up = WarmUp()
+
+        assert not await warm_up.run(get_settings(), http_pool, Mock())
+
+        assert warm_up.done
+        assert warm_up.steps["pdftotext"] == {
+            "ok": False, "required": True, "error": "OCR tool not found",
+            "duration_ms": warm_up.steps["pdftotext"]["duration_ms"]
+        }
+        assert "extraction" not in warm_up.steps
+        ocr_processor.extract_text_async.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_pdftotext_is_optional_for_other_engines(self, monkeypatch, http_pool, ocr_processor):
+        monkeypatch.setattr(get_settings(), "ocr_engine", "pdfium")
+        ocr_processor.tool_version_async.side_effect = OCRToolNotFoundError(
+            message="OCR tool not found", details={"tool": "pdftotext"}
+        )
+        worker_pool = Mock(spec=WorkerPool, size=3)
+        warm_up = WarmUp()
+
+        assert await warm_up.run(get_settings(), http_pool, Mock(), worker_pool)
+
+        worker_pool.start.assert_called_once()
+        # Every worker extracts the document so each of them loads the engine
+        ocr_processor.warm_up_workers_async.assert_awaited_once_with(WarmUp.DOCUMENT)
+        ocr_processor.extract_text_async.assert_not_awaited()
+        assert not warm_up.steps["pdftotext"]["ok"]
+
+    @pytest.mark.asyncio
+    async def test_timeout(self, monkeypatch, http_pool, ocr_processor):
+        monkeypatch.setattr(get_settings(), "warmup_timeout", 0.01)
+
+        async def extract(pdf_data):
+            await asyncio.sleep(10)
+
+        ocr_processor.extract_text_async.side_effect = extract
+        warm_up = WarmUp()
+
+        assert not await warm_up.run(get_settings(), http_pool, Mock())
+        assert warm_up.steps["extraction"]["error"] == "Warm-up timed out after 0.01s"
+
+    def test_skip_is_ready(self):
+        warm_up = WarmUp()
+        warm_up.skip()
+        assert warm_up.ready
+        assert warm_up.status()["steps"] == {}
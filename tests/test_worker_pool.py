@@ -0,0 +1,114 @@
+import asyncio
+import os
+import time
+import pytest
+from app.core.worker_pool import WorkerPool
+from app.exceptions import OCRExtractionError, OCRInvalidPageRangeError, OCRTimeoutError
+
+def echo(value):
+    return value
+
+def pid():
+    return os.getpid()
+
+def crash():
+    os._exit(3)
+
+def hang():
+    time.sleep(10)
+
+def invalid_range():
+    raise OCRInvalidPageRangeError(message="Invalid page range", details={"first_page": 3, "last_page": 1})
+
+def fail():
+    raise RuntimeError("boom")
+
+class TestWorkerPool:
+    @pytest.fixture
+    def pool(self):
+        pool = WorkerPool(1, 0, 0)
+        yield pool
+        pool.close()
+
+    def test_run_returns_result(self, pool):
+        assert pool.run(echo, b"%PDF-1.4", timeout=10) == b"%PDF-1.4"
+        assert pool.stats()["jobs"] == 1
+
+    def test_worker_is_reused(self, pool):
+        assert pool.run(pid, timeout=10) == pool.run(pid, timeout=10)
+
+    @pytest.mark.asyncio
+    async def test_run_async(self, pool):
+        assert await pool.run_async(echo, "text", timeout=10) == "text"
+
+    @pytest.mark.asyncio
+    async def test_run_on_each_runs_in_every_worker(self):
+        pool = WorkerPool(3, 0, 0)
+        try:
+            pids = await pool.run_on_each_async(pid, timeout=10)
+            assert len(set(pids)) == 3
+            assert pool.stats()["jobs"] == 3
+        finally:
+            pool.close()
+
+    def test_run_on_each_reraises_errors_after_every_worker(self):
+        pool = WorkerPool(2, 0, 0)
+        try:
+            with pytest.raises(OCRInvalidPageRangeError):
+                pool.run_on_each(invalid_range, timeout=10)
+            assert pool.run(echo, 1, timeout=10) == 1
+            assert pool.stats()["jobs"] == 3
+        finally:
+            pool.close()
+
+    def test_recycles_after_max_jobs(self):
+        pool = WorkerPool(1, 2, 0)
+        try:
+            first = pool.run(pid, timeout=10)
+            assert pool.run(pid, timeout=10) == first
+            assert pool.run(pid, timeout=10) != first
+            assert pool.stats()["recycled"]["jobs"] == 1
+        finally:
+            pool.close()
+
+    def test_recycles_above_max_rss(self):
+        pool = WorkerPool(1, 0, 0.001)
+        try:
+            first = pool.run(pid, timeout=10)
+            assert pool.run(pid, timeout=10) != first
+            assert pool.stats()["recycled"]["rss"] == 2
+        finally:
+            pool.close()
+
+    def test_crash_fails_only_its_call(self, pool):
+        with pytest.raises(OCRExtractionError) as exc_info:
+            pool.run(crash, timeout=10)
+        assert exc_info.value.details["exit_code"] == 3
+        assert pool.run(echo, 1, timeout=10) == 1
+        assert pool.stats()["recycled"]["crash"] == 1
+
+    def test_hung_worker_is_replaced(self, pool):
+        with pytest.raises(OCRTimeoutError):
+            pool.run(hang, timeout=0.2)
+        assert pool.run(echo, 1, timeout=10) == 1
+        assert pool.stats()["recycled"]["timeout"] == 1
+
+    def test_application_errors_are_reraised(self, pool):
+        with pytest.raises(OCRInvalidPageRangeError) as exc_info:
+            pool.run(invalid_range, timeout=10)
+        assert exc_info.value.details == {"first_page": 3, "last_page": 1}
+
+    def test_unexpected_errors_become_extraction_errors(self, pool):
+        with pytest.raises(OCRExtractionError) as exc_info:
+            pool.run(fail, timeout=10)
+        assert exc_info.value.details == {"error": "boom", "type": "RuntimeError"}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_call_kills_worker(self, pool):
+        call = asyncio.ensure_future(pool.run_async(hang, timeout=10))
+        await asyncio.sleep(0.2)
+        call.cancel()
+        started_at = time.monotonic()
+        assert await pool.run_async(echo, 1, timeout=10) == 1
+        assert time.monotonic() - started_at < 5
+        assert pool.stats()["recycled"]["cancelled"] == 1